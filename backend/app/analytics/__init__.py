@@ -0,0 +1,21 @@
+from app.analytics.rollups import (
+    rollup_key,
+    apply_rollup_deltas,
+    record_alert_created,
+    record_alert_created_async,
+    record_alert_updated,
+    record_alert_deleted,
+    rebuild_rollups,
+    backfill_rollups_if_empty
+)
+
+__all__ = [
+    'rollup_key',
+    'apply_rollup_deltas',
+    'record_alert_created',
+    'record_alert_created_async',
+    'record_alert_updated',
+    'record_alert_deleted',
+    'rebuild_rollups',
+    'backfill_rollups_if_empty'
+]
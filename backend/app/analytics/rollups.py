@@ -0,0 +1,180 @@
+"""
+Incrementally maintained daily alert counts.
+
+Every write path that creates, updates or deletes an Alert calls one of
+the record_* helpers inside the same transaction, so the dashboards can
+aggregate alert_daily_rollups (days x categories rows) instead of
+scanning the alerts table. rebuild_rollups() recomputes everything from
+scratch for backfills:
+
+    python -m app.analytics.rollups
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.alert import Alert
+from app.models.alert_rollup import AlertDailyRollup
+
+KEY_COLUMNS = ("day", "alert_type", "severity", "status", "location_name")
+
+
+def rollup_key(alert: Alert) -> Dict:
+    """The rollup row an alert is counted in"""
+    created_at = alert.created_at or datetime.utcnow()
+    return {
+        "day": created_at.date(),
+        "alert_type": alert.alert_type,
+        "severity": alert.severity,
+        "status": alert.status or "active",
+        "location_name": alert.location_name or "",
+    }
+
+
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def rollup_upsert(dialect_name: str, key: Dict, delta: int):
+    """
+    INSERT ... ON CONFLICT adding delta to the rollup row for key, or
+    None on dialects without it (those update first, then insert).
+    """
+    dialect_insert = UPSERT_DIALECTS.get(dialect_name)
+    if dialect_insert is None:
+        return None
+    table = AlertDailyRollup.__table__
+    stmt = dialect_insert(table).values(**key, count=delta)
+    return stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={"count": table.c.count + stmt.excluded.count}
+    )
+
+
+def _rollup_update(key: Dict, delta: int):
+    table = AlertDailyRollup.__table__
+    return table.update().where(
+        *(table.c[column] == key[column] for column in KEY_COLUMNS)
+    ).values(count=table.c.count + delta)
+
+
+def apply_rollup_delta(db: Session, key: Dict, delta: int) -> None:
+    upsert = rollup_upsert(db.get_bind().dialect.name, key, delta)
+    if upsert is not None:
+        db.execute(upsert)
+        return
+    if db.execute(_rollup_update(key, delta)).rowcount:
+        return
+    try:
+        # A savepoint, so losing an insert race to another writer only
+        # undoes this insert; the row exists now, so update it instead
+        with db.begin_nested():
+            db.execute(insert(AlertDailyRollup.__table__).values(**key, count=delta))
+    except IntegrityError:
+        db.execute(_rollup_update(key, delta))
+
+
+def apply_rollup_deltas(db: Session, deltas: List[Dict]) -> None:
+    """
+    Add many deltas at once, each a rollup key plus "count", as one
+    executemany upsert; for bulk loads that touch thousands of rows.
+    """
+    if not deltas:
+        return
+    dialect_insert = UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        for delta in deltas:
+            key = {column: delta[column] for column in KEY_COLUMNS}
+            apply_rollup_delta(db, key, delta["count"])
+        return
+    table = AlertDailyRollup.__table__
+    stmt = dialect_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={"count": table.c.count + stmt.excluded.count}
+    )
+    db.execute(stmt, deltas)
+
+
+async def apply_rollup_delta_async(db: AsyncSession, key: Dict, delta: int) -> None:
+    upsert = rollup_upsert(db.get_bind().dialect.name, key, delta)
+    if upsert is not None:
+        await db.execute(upsert)
+        return
+    if (await db.execute(_rollup_update(key, delta))).rowcount:
+        return
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(AlertDailyRollup.__table__).values(**key, count=delta))
+    except IntegrityError:
+        await db.execute(_rollup_update(key, delta))
+
+
+def record_alert_created(db: Session, alert: Alert) -> None:
+    apply_rollup_delta(db, rollup_key(alert), 1)
+
+
+async def record_alert_created_async(db: AsyncSession, alert: Alert) -> None:
+    await apply_rollup_delta_async(db, rollup_key(alert), 1)
+
+
+def record_alert_updated(db: Session, alert: Alert, previous_key: Dict) -> None:
+    """Move an alert between rollup rows after its counted fields changed"""
+    key = rollup_key(alert)
+    if key != previous_key:
+        apply_rollup_delta(db, previous_key, -1)
+        apply_rollup_delta(db, key, 1)
+
+
+def record_alert_deleted(db: Session, alert: Alert) -> None:
+    apply_rollup_delta(db, rollup_key(alert), -1)
+
+
+def rebuild_rollups(db: Session, since: Optional[datetime] = None) -> int:
+    """Recompute rollup rows from the alerts table; returns rows written"""
+    day = func.date(Alert.created_at)
+    status = func.coalesce(Alert.status, "active")
+    location_name = func.coalesce(Alert.location_name, "")
+
+    source = select(
+        day, Alert.alert_type, Alert.severity, status, location_name, func.count(Alert.id)
+    ).where(Alert.created_at.isnot(None))
+    delete_stmt = AlertDailyRollup.__table__.delete()
+    if since is not None:
+        source = source.where(Alert.created_at >= datetime.combine(since.date(), datetime.min.time()))
+        delete_stmt = delete_stmt.where(AlertDailyRollup.day >= since.date())
+    source = source.group_by(day, Alert.alert_type, Alert.severity, status, location_name)
+
+    db.execute(delete_stmt)
+    result = db.execute(
+        insert(AlertDailyRollup.__table__).from_select(list(KEY_COLUMNS) + ["count"], source)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def backfill_rollups_if_empty(db: Session) -> int:
+    """Build the rollups once for databases that predate them"""
+    has_rollups = db.query(AlertDailyRollup.id).first() is not None
+    has_alerts = db.query(Alert.id).first() is not None
+    if has_rollups or not has_alerts:
+        return 0
+    rows = rebuild_rollups(db)
+    print(f"✅ Backfilled alert rollups ({rows} rows)")
+    return rows
+
+
+if __name__ == "__main__":
+    from app.database.connection import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        rows = rebuild_rollups(db)
+        print(f"✅ Rebuilt alert rollups ({rows} rows)")
+    finally:
+        db.close()
@@ -5,6 +5,91 @@ class Settings(BaseSettings):
     database_url: str
     secret_key: str
     firebase_credentials_path: str
+    # "firebase" for the Realtime Database, "memory" for the in-process stand-in
+    firebase_backend: str = "firebase"
+    
+    # SQLAlchemy connection pool
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0         # seconds to wait for a free connection
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800           # seconds before a connection is replaced
+    db_statement_timeout_ms: int = 0      # PostgreSQL statement_timeout, 0 disables
+    
+    # Background Firebase writes
+    firebase_fanout_queue_size: int = 10000
+    firebase_fanout_workers: int = 4
+    firebase_fanout_max_retries: int = 5
+    # Transactional outbox relay
+    firebase_outbox_batch_size: int = 500
+    firebase_outbox_poll_interval: float = 2.0   # seconds between background sweeps
+    firebase_outbox_max_attempts: int = 20
+    # Serve /firebase/alerts reads from a listener-fed in-memory mirror
+    firebase_mirror: bool = False
+    firebase_mirror_max_staleness: float = 0.0   # resubscribe after this many quiet seconds, 0 disables
+    
+    # WebSocket/SSE alert stream
+    realtime_queue_size: int = 256              # events buffered per subscriber before a resync
+    realtime_max_subscribers: int = 10000
+    realtime_heartbeat_interval: float = 15.0   # seconds between SSE keep-alives
+    
+    # Geofence index over locations
+    geo_index_cell_deg: float = 0.25            # grid cell edge in degrees
+    geo_index_refresh_interval: float = 30.0    # seconds between catch-ups on rows from other workers
+    geofence_default_radius_km: float = 5.0     # for alerts without a radius
+    
+    # Merge crowdsourced submissions that repeat a recent alert
+    dedup_enabled: bool = True
+    dedup_radius_km: float = 0.5
+    dedup_window_minutes: float = 30.0
+    dedup_refresh_interval: float = 30.0        # seconds between catch-ups on rows from other workers
+    
+    # Alert attachments (content-addressed by SHA-256)
+    attachments_dir: str = "uploads"
+    attachment_chunk_size: int = 1024 * 1024
+    attachment_max_bytes: int = 20 * 1024 * 1024           # per file
+    attachment_max_request_bytes: int = 50 * 1024 * 1024   # all files of one submission
+    attachment_max_files: int = 10
+    attachment_workers: int = 2                            # thumbnail/metadata threads
+    attachment_thumbnail_size: int = 320
+    
+    # bcrypt password hashing (process pool, 0 workers hashes inline)
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64         # queued hashes before callers wait
+    password_bcrypt_rounds: int = 12            # cost factor; each +1 doubles hash time
+    user_import_max_records: int = 10000        # per /admin/users/import request
+    
+    # /admin/alerts/bulk historical imports
+    alert_bulk_chunk_size: int = 5000           # rows per transaction
+    alert_bulk_max_rows: int = 1000000          # per request
+    alert_bulk_max_errors: int = 1000           # per-row errors listed in the response
+    
+    # ML models, loaded on first use from app/ml/models (or ml_models_dir)
+    ml_models_dir: str = ""
+    ml_warmup: bool = True                      # load every model in the background after startup
+    ml_model_poll_interval: float = 10.0        # seconds between checks for new .pkl files, 0 disables
+    ml_mmap_mode: str = "r"                     # how .trees exports are opened; "" reads them into private memory
+    # "numpy" scores batches of up to ml_numpy_max_rows rows of pickled forests
+    # with the flat-array evaluator in app/ml/tree_arrays.py instead of sklearn
+    ml_inference_backend: str = "sklearn"
+    ml_numpy_max_rows: int = 512
+    ml_batch_max_records: int = 100000          # per /admin/predict/{model}/batch request
+    # Cached predictions per (model version, feature vector); 0 disables the cache
+    ml_prediction_cache_size: int = 100000
+    ml_prediction_cache_ttl: float = 3600.0
+    ml_prediction_cache_digits: int = 0          # round features to this many significant digits first, 0 = exact
+    # Per-area crime model features (app/ml/feature_store.py): a CSV or Parquet
+    # file of demographics by area name, pincode or lat/lng; "" uses defaults
+    area_features_path: str = ""
+    area_features_cell_deg: float = 0.1          # grid cell edge for rows keyed by latitude/longitude
+    area_features_refresh_interval: float = 60.0 # seconds between checks for a changed file
+    area_incident_window_days: int = 365         # prior_incidents counts alerts this recent, 0 = all
+    area_incident_cache_ttl: float = 60.0
+    
+    # Seconds /admin/overview results are reused across requests
+    overview_cache_ttl: float = 5.0
+    # Seconds a listing's total count is reused when total=cached
+    pagination_total_cache_ttl: float = 30.0
     
     class Config:
         env_file = ".env"
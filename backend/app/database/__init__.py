@@ -1,2 +1,2 @@
-from app.database.connection import Base, engine, get_db
+from app.database.connection import Base, engine, get_db, get_async_db
 from app.database.init_db import create_tables
\ No newline at end of file
@@ -1,11 +1,34 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
+from app.database.pool_metrics import InstrumentedQueuePool
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url)
+def engine_options(database_url: str) -> dict:
+    """Pool and connection settings for create_engine, taken from Settings"""
+    url = make_url(database_url)
+    options = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    # In-memory SQLite uses a single shared connection, not a sized pool
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    
+    options.update({
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+    })
+    if url.get_backend_name() == "postgresql" and settings.db_statement_timeout_ms:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    return options
+
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -14,4 +37,62 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def async_database_url(database_url: str):
+    """The same database behind an asyncio driver (asyncpg / aiosqlite)"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+asyncpg")
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    raise ValueError(f"No async driver configured for {backend}")
+
+def async_engine_options(database_url: str) -> dict:
+    """engine_options() translated for create_async_engine"""
+    options = engine_options(database_url)
+    options.pop("poolclass", None)  # async engines need an asyncio-aware pool
+    connect_args = options.pop("connect_args", None)
+    if connect_args and settings.db_statement_timeout_ms:
+        # asyncpg takes server settings instead of libpq options
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}
+        }
+    return options
+
+# The async engine is created on first use so the asyncpg/aiosqlite driver
+# is only required by deployments that serve the async endpoints.
+_async_engine = None
+_async_session_factory = None
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        _async_engine = create_async_engine(
+            async_database_url(settings.database_url),
+            **async_engine_options(settings.database_url)
+        )
+    return _async_engine
+
+def get_async_session_factory():
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
+
+async def dispose_async_engine():
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
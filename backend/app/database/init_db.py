@@ -1,9 +1,12 @@
 from app.database.connection import Base, engine
+from app.database.migrations import ensure_columns, ensure_indexes
 from app.models import User, Alert, Location
 
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
+    ensure_columns(engine)
+    ensure_indexes(engine)
     print("✅ All tables created successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+"""
+Schema upgrades for databases created before a column or index was
+declared on the models. These run from the explicit migration step
+(python -m app.database.migrations, or init_db), never at import time,
+so workers don't race each other or block boot on a long index build.
+Both functions are idempotent and safe to re-run after a failure.
+Run as a script, the step also builds the alert rollups for databases
+that predate them.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+from app.database.connection import Base, engine
+
+
+def ensure_columns(bind: Engine = engine) -> list:
+    """
+    Add nullable columns declared on the models that are missing from
+    existing tables (create_all() never alters a table that exists).
+    """
+    from app import models  # noqa: F401 - register all tables on Base.metadata
+
+    added = []
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=conn.dialect)
+                default = ""
+                if column.server_default is not None:
+                    default = f" DEFAULT {column.server_default.arg}"
+                if_not_exists = " IF NOT EXISTS" if conn.dialect.name == "postgresql" else ""
+                print(f"🔧 Adding column {table.name}.{column.name}...")
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN{if_not_exists} {column.name} {column_type}{default}'
+                ))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def _invalid_indexes(conn) -> set:
+    """Names of PostgreSQL indexes left INVALID by a failed CONCURRENTLY build"""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE NOT i.indisvalid"
+    ))
+    return {row[0] for row in rows}
+
+
+def ensure_indexes(bind: Engine = engine, concurrently: bool = True) -> list:
+    """
+    Create indexes declared on the models that are missing from an
+    existing database. create_all() only adds indexes together with new
+    tables, so databases created before an index was declared need this.
+    On PostgreSQL indexes are built CONCURRENTLY by default so writes to
+    the table are not blocked while a large index builds; an index left
+    INVALID by an interrupted build is dropped and built again.
+    """
+    from app import models  # noqa: F401 - register all tables on Base.metadata
+
+    created = []
+    is_postgres = bind.dialect.name == "postgresql"
+    use_concurrently = is_postgres and concurrently
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if is_postgres:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        invalid = _invalid_indexes(conn) if is_postgres else set()
+
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in invalid:
+                    print(f"🔧 Dropping invalid index {index.name} on {table.name}...")
+                    conn.execute(text(
+                        f'DROP INDEX {"CONCURRENTLY " if use_concurrently else ""}IF EXISTS "{index.name}"'
+                    ))
+                elif index.name in existing:
+                    continue
+                index.dialect_kwargs["postgresql_concurrently"] = use_concurrently
+                try:
+                    print(f"🔧 Creating index {index.name} on {table.name}...")
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+                finally:
+                    index.dialect_kwargs["postgresql_concurrently"] = False
+                created.append(index.name)
+    return created
+
+
+def drop_indexes(bind: Engine = engine, table_name: str = "alerts") -> list:
+    """Drop the non-primary-key indexes declared on a table (used by benchmarks)"""
+    from app import models  # noqa: F401
+
+    dropped = []
+    table = Base.metadata.tables[table_name]
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        existing = {ix["name"] for ix in inspect(conn).get_indexes(table_name)}
+        for index in table.indexes:
+            if index.name in existing and not index.name.startswith(f"ix_{table_name}_id"):
+                index.drop(conn)
+                dropped.append(index.name)
+    return dropped
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    added = ensure_columns()
+    created = ensure_indexes()
+    from app.analytics import backfill_rollups_if_empty
+    from app.database.connection import SessionLocal
+
+    db = SessionLocal()
+    try:
+        backfill_rollups_if_empty(db)
+    finally:
+        db.close()
+    print(f"✅ Migration complete, {len(added)} column(s) added, {len(created)} index(es) created")
@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Counters for connection pool checkouts, waits and overflow"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)  # recent checkout waits in seconds
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._waits.clear()
+            self.checkouts = 0
+            self.overflow_checkouts = 0
+            self.timeouts = 0
+            self.max_wait = 0.0
+
+    def record_checkout(self, wait: float, overflowed: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self._waits.append(wait)
+            self.max_wait = max(self.max_wait, wait)
+            if overflowed:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self, wait: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self, pool=None) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 3) if waits else 0.0,
+                "wait_ms_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 3) if waits else 0.0,
+                "wait_ms_max": round(self.max_wait * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return stats
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout(time.perf_counter() - start)
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start, self.overflow() > 0)
+        return connection
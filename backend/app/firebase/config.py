@@ -7,6 +7,9 @@ settings = get_settings()
 
 def initialize_firebase():
     """Initialize Firebase Admin SDK"""
+    if settings.firebase_backend == "memory":
+        print(" Using in-memory Firebase stand-in")
+        return True
     try:
         # Get absolute path of credentials file
         creds_path = os.path.abspath(settings.firebase_credentials_path)
@@ -33,10 +36,17 @@ def initialize_firebase():
         print(f" Firebase initialization error: {e}")
         return False
 
+def firebase_reference(path: str = "/"):
+    """Reference to path on the configured backend (Firebase or in-memory)"""
+    if settings.firebase_backend == "memory":
+        from app.firebase.memory import memory_database
+        return memory_database.reference(path)
+    return db.reference(path)
+
 def get_firebase_db():
     """Get Firebase database reference"""
     try:
-        return db.reference()
+        return firebase_reference()
     except Exception as e:
         print(f" Error getting Firebase database: {e}")
         return None
\ No newline at end of file
@@ -0,0 +1,139 @@
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+@dataclass
+class FanoutJob:
+    fn: Callable
+    args: Tuple[Any, ...]
+    description: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class FirebaseFanout:
+    """
+    Bounded queue of Firebase writes drained by background worker threads.
+    The Firebase Admin SDK is blocking, so request handlers submit() the
+    write and return; failed writes are retried with exponential backoff
+    and jitter. When the queue is full submit() refuses the job instead of
+    letting memory grow.
+    """
+
+    def __init__(self, maxsize: int, workers: int, max_retries: int,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.queue: "queue.Queue[Optional[FanoutJob]]" = queue.Queue(maxsize=maxsize)
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._threads = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.in_flight = 0
+        self.last_lag = 0.0
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"firebase-fanout-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Finish queued jobs (up to timeout), then stop the workers"""
+        deadline = time.monotonic() + timeout
+        while not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stopping.set()
+        for _ in self._threads:
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def submit(self, fn: Callable, *args, description: str = "") -> bool:
+        """Queue fn(*args); returns False if the queue is full"""
+        try:
+            self.queue.put_nowait(FanoutJob(fn, args, description))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            print(f"⚠️ Firebase fan-out queue full, dropped {description}")
+            return False
+
+    def _run(self) -> None:
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self.in_flight += 1
+            try:
+                self._execute(job)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+    def _execute(self, job: FanoutJob) -> None:
+        while True:
+            try:
+                job.fn(*job.args)
+                with self._lock:
+                    self.processed += 1
+                    self.last_lag = time.monotonic() - job.enqueued_at
+                return
+            except Exception as e:
+                job.attempts += 1
+                if job.attempts > self.max_retries or self._stopping.is_set():
+                    with self._lock:
+                        self.failed += 1
+                    print(f"❌ Firebase fan-out gave up on {job.description} after {job.attempts} attempts: {e}")
+                    return
+                with self._lock:
+                    self.retried += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (job.attempts - 1))
+                self._stopping.wait(delay * random.uniform(0.5, 1.0))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self.queue.mutex:
+            depth = len(self.queue.queue)
+            head = next((job for job in self.queue.queue if job is not None), None)
+        with self._lock:
+            return {
+                "depth": depth,
+                "in_flight": self.in_flight,
+                "capacity": self.queue.maxsize,
+                "oldest_lag_seconds": round(time.monotonic() - head.enqueued_at, 3) if head else 0.0,
+                "last_lag_seconds": round(self.last_lag, 3),
+                "processed": self.processed,
+                "retried": self.retried,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "workers": len(self._threads),
+            }
+
+
+firebase_fanout = FirebaseFanout(
+    maxsize=settings.firebase_fanout_queue_size,
+    workers=settings.firebase_fanout_workers,
+    max_retries=settings.firebase_fanout_max_retries
+)
@@ -0,0 +1,260 @@
+"""
+In-process stand-in for the Firebase Realtime Database.
+
+Implements the subset of firebase_admin.db.Reference used by this app
+(child, get, set, update with multi-path keys, push, delete, and
+order_by_* / start_at / end_at / equal_to / limit_to_* queries, and
+listen() with put/patch events) on a plain dict, for local development and tests without Firebase credentials.
+Enable it with FIREBASE_BACKEND=memory.
+"""
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+class InMemoryEvent:
+    """Same shape as firebase_admin.db.Event"""
+
+    def __init__(self, event_type: str, path: str, data: Any):
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class InMemoryListenerRegistration:
+    def __init__(self, database: "InMemoryDatabase", parts: List[str], callback: Callable):
+        self._db = database
+        self.parts = parts
+        self.callback = callback
+
+    def close(self) -> None:
+        with self._db.lock:
+            if self in self._db.listeners:
+                self._db.listeners.remove(self)
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.lock = threading.RLock()
+        self.writes = 0
+        self.listeners: List[InMemoryListenerRegistration] = []
+
+    def _events_for(self, base: List[str], event_type: str, data: Dict[str, Any]) -> List[tuple]:
+        """
+        Events each listener sees for a write of {relative path: value}
+        under base. Called with the lock held; callbacks run after release.
+        """
+        events = []
+        for listener in self.listeners:
+            scope = listener.parts
+            if event_type == "patch" and base[:len(scope)] == scope:
+                rel = base[len(scope):]
+                events.append((listener, InMemoryEvent("patch", "/" + "/".join(rel), copy.deepcopy(data))))
+                continue
+            resend = False
+            for path, value in data.items():
+                target = base + _split(path)
+                if target[:len(scope)] == scope:
+                    rel = target[len(scope):]
+                    events.append((listener, InMemoryEvent("put", "/" + "/".join(rel), copy.deepcopy(_prune(value)))))
+                elif scope[:len(target)] == target:
+                    resend = True
+            if resend:
+                # Write above the listener: re-send its whole subtree
+                events.append((listener, InMemoryEvent("put", "/", InMemoryReference(self, scope).get())))
+        return events
+
+    def reference(self, path: str = "/") -> "InMemoryReference":
+        return InMemoryReference(self, _split(path))
+
+
+def _split(path: str) -> List[str]:
+    return [part for part in path.strip("/").split("/") if part]
+
+
+def _prune(value: Any) -> Any:
+    """Firebase drops null values and empty containers"""
+    if isinstance(value, dict):
+        pruned = {k: _prune(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v is not None} or None
+    return value
+
+
+def _sort_value(value: Any) -> tuple:
+    """Firebase ordering: null, false, true, numbers, strings, objects"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    return (4, 0)
+
+
+class InMemoryQuery:
+    """Mirrors firebase_admin.db.Query; get() returns an OrderedDict"""
+
+    def __init__(self, reference: "InMemoryReference", order_by: str, child_path: Optional[str] = None):
+        self._reference = reference
+        self._order_by = order_by  # "child", "key" or "value"
+        self._child_path = _split(child_path) if child_path else []
+        self._start = None
+        self._end = None
+        self._limit_first: Optional[int] = None
+        self._limit_last: Optional[int] = None
+
+    def start_at(self, start: Any) -> "InMemoryQuery":
+        if start is None:
+            raise ValueError("Start value must not be None.")
+        self._start = _sort_value(start)
+        return self
+
+    def end_at(self, end: Any) -> "InMemoryQuery":
+        if end is None:
+            raise ValueError("End value must not be None.")
+        self._end = _sort_value(end)
+        return self
+
+    def equal_to(self, value: Any) -> "InMemoryQuery":
+        if value is None:
+            raise ValueError("Equal to value must not be None.")
+        self._start = self._end = _sort_value(value)
+        return self
+
+    def limit_to_first(self, limit: int) -> "InMemoryQuery":
+        if self._limit_last is not None:
+            raise ValueError("Cannot set both first and last limits.")
+        self._limit_first = limit
+        return self
+
+    def limit_to_last(self, limit: int) -> "InMemoryQuery":
+        if self._limit_first is not None:
+            raise ValueError("Cannot set both first and last limits.")
+        self._limit_last = limit
+        return self
+
+    def _sort_key(self, item) -> tuple:
+        key, value = item
+        if self._order_by == "key":
+            return (_sort_value(key), key)
+        if self._order_by == "value":
+            return (_sort_value(value), key)
+        for part in self._child_path:
+            value = value.get(part) if isinstance(value, dict) else None
+        return (_sort_value(value), key)
+
+    def get(self) -> "OrderedDict[str, Any]":
+        data = self._reference.get()
+        if not isinstance(data, dict):
+            return OrderedDict()
+        entries = []
+        for item in sorted(data.items(), key=self._sort_key):
+            position = self._sort_key(item)[0]
+            if self._start is not None and position < self._start:
+                continue
+            if self._end is not None and position > self._end:
+                continue
+            entries.append(item)
+        if self._limit_first is not None:
+            entries = entries[:self._limit_first]
+        elif self._limit_last is not None:
+            entries = entries[-self._limit_last:] if self._limit_last else []
+        return OrderedDict(entries)
+
+
+class InMemoryReference:
+    def __init__(self, database: InMemoryDatabase, parts: List[str]):
+        self._db = database
+        self._parts = parts
+
+    @property
+    def key(self) -> Optional[str]:
+        return self._parts[-1] if self._parts else None
+
+    @property
+    def path(self) -> str:
+        return "/" + "/".join(self._parts)
+
+    def child(self, path: str) -> "InMemoryReference":
+        return InMemoryReference(self._db, self._parts + _split(path))
+
+    def get(self) -> Any:
+        with self._db.lock:
+            node = self._db.data
+            for part in self._parts:
+                if not isinstance(node, dict) or part not in node:
+                    return None
+                node = node[part]
+            return copy.deepcopy(node) if node != {} else None
+
+    def set(self, value: Any) -> None:
+        with self._db.lock:
+            self._write(self._parts, copy.deepcopy(value))
+            self._db.writes += 1
+            events = self._db._events_for(self._parts, "put", {"": value})
+        _dispatch(events)
+
+    def update(self, value: Dict[str, Any]) -> None:
+        """Multi-path update: each key is a path relative to this reference"""
+        if not isinstance(value, dict) or not value:
+            raise ValueError("Value argument must be a non-empty dictionary")
+        with self._db.lock:
+            for path, child_value in value.items():
+                self._write(self._parts + _split(path), copy.deepcopy(child_value))
+            self._db.writes += 1
+            events = self._db._events_for(self._parts, "patch", value)
+        _dispatch(events)
+
+    def listen(self, callback: Callable) -> InMemoryListenerRegistration:
+        """Register callback(event); it first receives a put of the current tree"""
+        with self._db.lock:
+            registration = InMemoryListenerRegistration(self._db, list(self._parts), callback)
+            self._db.listeners.append(registration)
+            initial = InMemoryEvent("put", "/", self.get())
+        callback(initial)
+        return registration
+
+    def push(self, value: Any = "") -> "InMemoryReference":
+        from app.firebase.realtime_alerts import generate_push_id
+        ref = self.child(generate_push_id())
+        ref.set(value)
+        return ref
+
+    def delete(self) -> None:
+        self.set(None)
+
+    def order_by_child(self, path: str) -> InMemoryQuery:
+        return InMemoryQuery(self, "child", path)
+
+    def order_by_key(self) -> InMemoryQuery:
+        return InMemoryQuery(self, "key")
+
+    def order_by_value(self) -> InMemoryQuery:
+        return InMemoryQuery(self, "value")
+
+    def _write(self, parts: List[str], value: Any) -> None:
+        value = _prune(value)
+        if not parts:
+            self._db.data = value if isinstance(value, dict) else {}
+            return
+        node = self._db.data
+        for part in parts[:-1]:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+
+
+def _dispatch(events: List[tuple]) -> None:
+    for listener, event in events:
+        listener.callback(event)
+
+
+memory_database = InMemoryDatabase()
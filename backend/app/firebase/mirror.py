@@ -0,0 +1,239 @@
+"""
+In-process mirror of the Firebase /alerts tree.
+
+AlertMirror subscribes once with ref.listen() and applies the put/patch
+events to a local dict, indexed by status and timestamp, so reads are
+served from memory instead of a network fetch per request. Firebase
+re-sends the whole tree as a put at "/" whenever the stream reconnects,
+which replaces the local copy; a watchdog re-subscribes if the listener
+thread dies or nothing has arrived for firebase_mirror_max_staleness.
+
+Tests can skip listen() entirely and feed events to apply_event().
+"""
+import copy
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.firebase.realtime_alerts import alert_cursor, parse_alert_cursor
+
+settings = get_settings()
+
+RANGE_END = "\uffff"
+
+
+def _split(path: str) -> List[str]:
+    return [part for part in path.strip("/").split("/") if part]
+
+
+class AlertMirror:
+
+    def __init__(self, max_staleness: float = 0.0, check_interval: float = 5.0):
+        self.max_staleness = max_staleness
+        self.check_interval = check_interval
+        self.alerts: Dict[str, Dict[str, Any]] = {}
+        self._all: List[Tuple[str, str]] = []  # sorted (timestamp, key)
+        self._by_status: Dict[str, List[Tuple[str, str]]] = {}
+        self._lock = threading.RLock()
+        self._ref = None
+        self._registration = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.ready = False
+        self.events = 0
+        self.resyncs = 0
+        self.errors = 0
+        self._last_event = 0.0
+        self.last_event_at: Optional[datetime] = None
+
+    # --- event handling -------------------------------------------------
+
+    def apply_event(self, event_type: str, path: str, data: Any) -> None:
+        """Apply one listener event; path is relative to /alerts"""
+        parts = _split(path)
+        with self._lock:
+            if event_type == "put":
+                if not parts:
+                    self._replace(data or {})
+                    self.ready = True
+                else:
+                    self._put(parts, data)
+            elif event_type == "patch":
+                for child, value in (data or {}).items():
+                    self._put(parts + _split(child), value)
+            self.events += 1
+            self._last_event = time.monotonic()
+            self.last_event_at = datetime.utcnow()
+
+    def _on_event(self, event) -> None:
+        # An exception here would end the SDK's listener thread
+        try:
+            self.apply_event(event.event_type, event.path, event.data)
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ Firebase mirror could not apply event at {event.path}: {e}")
+
+    def _replace(self, tree: Dict[str, Any]) -> None:
+        self.alerts = {}
+        self._all = []
+        self._by_status = {}
+        for key, alert in tree.items():
+            if isinstance(alert, dict):
+                self.alerts[key] = alert
+                self._index(key, alert)
+        self._all.sort()
+        for entries in self._by_status.values():
+            entries.sort()
+
+    def _put(self, parts: List[str], value: Any) -> None:
+        key = parts[0]
+        previous = self.alerts.get(key)
+        if len(parts) == 1:
+            alert = value if isinstance(value, dict) else None
+        else:
+            alert = copy.deepcopy(previous) if previous else {}
+            node = alert
+            for part in parts[1:-1]:
+                if not isinstance(node.get(part), dict):
+                    node[part] = {}
+                node = node[part]
+            if value is None:
+                node.pop(parts[-1], None)
+            else:
+                node[parts[-1]] = value
+
+        if previous is not None:
+            self._unindex(key, previous)
+        if alert:
+            self.alerts[key] = alert
+            self._index(key, alert, ordered=True)
+        else:
+            self.alerts.pop(key, None)
+
+    @staticmethod
+    def _entry(key: str, alert: Dict[str, Any]) -> Tuple[str, str]:
+        return (str(alert.get("timestamp") or ""), key)
+
+    def _index(self, key: str, alert: Dict[str, Any], ordered: bool = False) -> None:
+        entry = self._entry(key, alert)
+        status_entries = self._by_status.setdefault(alert.get("status"), [])
+        if ordered:
+            insort(self._all, entry)
+            insort(status_entries, entry)
+        else:
+            self._all.append(entry)
+            status_entries.append(entry)
+
+    def _unindex(self, key: str, alert: Dict[str, Any]) -> None:
+        entry = self._entry(key, alert)
+        for entries in (self._all, self._by_status.get(alert.get("status"), [])):
+            i = bisect_left(entries, entry)
+            if i < len(entries) and entries[i] == entry:
+                del entries[i]
+
+    # --- reads ----------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            alert = self.alerts.get(key)
+            return copy.deepcopy(alert) if alert is not None else None
+
+    def get_all(self) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self.alerts)
+
+    def query_alerts(self, status: Optional[str] = None, since: Optional[str] = None,
+                     until: Optional[str] = None, before: Optional[str] = None,
+                     limit: int = 100) -> Tuple[Dict, Optional[str]]:
+        """Same contract as FirebaseAlertService.query_alerts"""
+        with self._lock:
+            entries = self._by_status.get(status, []) if status else self._all
+            lo = bisect_left(entries, (since or "",))
+            hi = len(entries)
+            if until:
+                hi = min(hi, bisect_right(entries, (until, RANGE_END)))
+            if before:
+                hi = min(hi, bisect_left(entries, parse_alert_cursor(before)))
+            start = max(lo, hi - limit)
+            rows = entries[start:hi]
+            next_cursor = alert_cursor(*rows[0]) if start > lo and rows else None
+            return {key: copy.deepcopy(self.alerts[key]) for _, key in rows}, next_cursor
+
+    @property
+    def staleness_seconds(self) -> Optional[float]:
+        """Seconds since the last event; None until the first sync"""
+        if not self.ready:
+            return None
+        return time.monotonic() - self._last_event
+
+    # --- lifecycle ------------------------------------------------------
+
+    def start(self, ref) -> None:
+        if self._ref is not None:
+            return
+        self._ref = ref
+        self._stopping.clear()
+        self._listen()
+        self._watchdog = threading.Thread(target=self._watch, name="firebase-mirror-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def _listen(self) -> None:
+        self._registration = self._ref.listen(self._on_event)
+
+    def resync(self) -> None:
+        """Drop the stream and subscribe again; the first event re-sends the tree"""
+        with self._lock:
+            self.ready = False
+        if self._registration is not None:
+            try:
+                self._registration.close()
+            except Exception as e:
+                print(f"⚠️ Firebase mirror listener close failed: {e}")
+        self.resyncs += 1
+        self._listen()
+
+    def _listener_alive(self) -> bool:
+        thread = getattr(self._registration, "_thread", None)
+        return thread is None or thread.is_alive()
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.check_interval):
+            staleness = self.staleness_seconds
+            stale = self.max_staleness > 0 and staleness is not None and staleness > self.max_staleness
+            if self._listener_alive() and not stale:
+                continue
+            try:
+                print("🔄 Resyncing Firebase mirror")
+                self.resync()
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Firebase mirror resync failed: {e}")
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._watchdog is not None:
+            self._watchdog.join(self.check_interval + 1)
+            self._watchdog = None
+        if self._registration is not None:
+            self._registration.close()
+            self._registration = None
+        self._ref = None
+        self.ready = False
+
+    def metrics(self) -> Dict[str, Any]:
+        staleness = self.staleness_seconds
+        return {
+            "ready": self.ready,
+            "alerts": len(self.alerts),
+            "events": self.events,
+            "resyncs": self.resyncs,
+            "errors": self.errors,
+            "staleness_seconds": round(staleness, 3) if staleness is not None else None,
+            "last_event_at": self.last_event_at.isoformat() if self.last_event_at else None,
+        }
+
+
+alert_mirror = AlertMirror(max_staleness=settings.firebase_mirror_max_staleness)
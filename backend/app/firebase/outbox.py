@@ -0,0 +1,361 @@
+"""
+Transactional outbox for PostgreSQL -> Firebase replication.
+
+Writers add a FirebaseOutbox row with add_outbox_event() in the same
+transaction as the Alert change, so an alert is replicated if and only
+if it was committed. OutboxRelay drains pending rows in id order and
+applies each batch with one multi-path update() on the database root.
+Writes to one path are applied in order: only one relay drains at a
+time (a PostgreSQL advisory lock), and an event waiting for a retry, or
+dead after max_attempts, holds back every later event for its path.
+Writes are idempotent (set/update/delete of fixed paths), so a batch
+replayed after a crash converges to the same state.
+
+    python -m app.firebase.outbox relay            # run the relay in the foreground
+    python -m app.firebase.outbox replay --since 2025-01-01
+    python -m app.firebase.outbox backfill         # enqueue every alert
+    python -m app.firebase.outbox retry-dead       # retry events that ran out of attempts
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import exists, func, or_, text
+from sqlalchemy.orm import aliased
+
+from app.config import get_settings
+from app.models.alert import Alert
+from app.models.outbox import FirebaseOutbox
+
+settings = get_settings()
+
+OPERATIONS = ("set", "update", "delete")
+OUTBOX_LOCK_KEY = 0x5AFE360  # pg advisory lock held by the draining relay
+
+
+def add_outbox_event(db, path: str, operation: str, payload: Optional[Dict[str, Any]] = None) -> FirebaseOutbox:
+    """Stage a Firebase write on a sync or async session; it commits with the caller"""
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown outbox operation: {operation}")
+    event = FirebaseOutbox(
+        path=path.strip("/"),
+        operation=operation,
+        payload=json.dumps(payload, default=str) if payload is not None else None
+    )
+    db.add(event)
+    return event
+
+
+def alert_firebase_payload(alert: Alert) -> Dict[str, Any]:
+    """Firebase document for an alert row, for backfills of existing alerts"""
+    from app.firebase.realtime_alerts import STATUS_TIMESTAMP, status_timestamp
+
+    timestamp = (alert.created_at or datetime.utcnow()).isoformat()
+    status = alert.status or "active"
+    return {
+        "id": alert.firebase_id,
+        "postgresql_id": alert.id,
+        "alert_type": alert.alert_type,
+        "severity": alert.severity,
+        "title": alert.title,
+        "description": alert.description,
+        "latitude": alert.latitude,
+        "longitude": alert.longitude,
+        "location_name": alert.location_name,
+        "status": status,
+        "timestamp": timestamp,
+        STATUS_TIMESTAMP: status_timestamp(status, timestamp),
+    }
+
+
+def _overlaps(path: str, other: str) -> bool:
+    return path == other or path.startswith(other + "/") or other.startswith(path + "/")
+
+
+def build_update_batches(events: List[FirebaseOutbox]) -> List[tuple]:
+    """
+    Group events into multi-path update dicts, in order. Firebase rejects
+    an update whose paths overlap, so a new batch starts whenever an
+    event touches a path already written by the current batch.
+    Returns [(update_dict, [events]), ...].
+    """
+    batches = []
+    current: Dict[str, Any] = {}
+    members: List[FirebaseOutbox] = []
+    for event in events:
+        payload = json.loads(event.payload) if event.payload else None
+        if event.operation == "update":
+            writes = {f"{event.path}/{key}": value for key, value in (payload or {}).items()}
+        else:
+            writes = {event.path: payload if event.operation == "set" else None}
+
+        if any(_overlaps(path, existing) for path in writes for existing in current):
+            batches.append((current, members))
+            current, members = {}, []
+        current.update(writes)
+        members.append(event)
+    if members:
+        batches.append((current, members))
+    return batches
+
+
+class OutboxRelay:
+    """Drains the outbox to Firebase; one drain runs at a time per process (and per database on PostgreSQL)"""
+
+    def __init__(self, session_factory: Callable, root_ref_factory: Callable,
+                 batch_size: int, max_attempts: int, poll_interval: float):
+        self.session_factory = session_factory
+        self.root_ref_factory = root_ref_factory
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._drain_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.replicated = 0
+        self.failed_batches = 0
+        self.last_drain_at: Optional[datetime] = None
+
+    def _try_lock(self, db) -> bool:
+        """
+        Take the cross-process drain lock for this transaction. Only one
+        relay may drain at a time, or a second worker could apply later
+        events for a path while the first still holds earlier ones.
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            return True  # SQLite serializes writers; run one relay process
+        return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": OUTBOX_LOCK_KEY}).scalar())
+
+    def _ready_events(self, db, now: datetime) -> List[FirebaseOutbox]:
+        """
+        Pending events that are due, in id order, skipping any whose path
+        (or a parent or child path) has an earlier event still waiting for
+        a retry or dead after max_attempts, so per-path order is kept.
+        """
+        earlier = aliased(FirebaseOutbox)
+        blocked = exists().where(
+            earlier.id < FirebaseOutbox.id,
+            earlier.processed_at.is_(None),
+            or_(earlier.available_at > now, earlier.attempts >= self.max_attempts),
+            or_(
+                earlier.path == FirebaseOutbox.path,
+                func.substr(FirebaseOutbox.path, 1, func.length(earlier.path) + 1) == earlier.path.concat("/"),
+                func.substr(earlier.path, 1, func.length(FirebaseOutbox.path) + 1) == FirebaseOutbox.path.concat("/")
+            )
+        )
+        return db.query(FirebaseOutbox).filter(
+            FirebaseOutbox.processed_at.is_(None),
+            FirebaseOutbox.available_at <= now,
+            FirebaseOutbox.attempts < self.max_attempts,
+            ~blocked
+        ).order_by(FirebaseOutbox.id).limit(self.batch_size).all()
+
+    def drain_once(self) -> int:
+        """Replicate one batch of pending events; returns events replicated"""
+        db = self.session_factory()
+        try:
+            if not self._try_lock(db):
+                db.commit()
+                return 0
+            now = datetime.utcnow()
+            events = self._ready_events(db, now)
+            if not events:
+                db.commit()
+                return 0
+
+            root = self.root_ref_factory()
+            replicated = 0
+            for update, members in build_update_batches(events):
+                try:
+                    root.update(update)
+                except Exception as e:
+                    # Later events on these paths wait behind them; events
+                    # not attempted yet stay due for the next drain
+                    self._record_failure(members, e)
+                    break
+                for event in members:
+                    event.processed_at = now
+                replicated += len(members)
+            db.commit()
+            self.replicated += replicated
+            self.last_drain_at = now
+            return replicated
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _record_failure(self, events: List[FirebaseOutbox], error: Exception) -> None:
+        """Back off a failed batch; every event in it gets the same available_at"""
+        self.failed_batches += 1
+        print(f"⚠️ Outbox relay failed to replicate {len(events)} event(s): {error}")
+        attempts = max(event.attempts for event in events) + 1
+        delay = min(300.0, 2 ** attempts) * random.uniform(0.5, 1.0)
+        available_at = datetime.utcnow() + timedelta(seconds=delay)
+        for event in events:
+            event.attempts += 1
+            event.last_error = str(error)[:1000]
+            event.available_at = available_at
+            if event.attempts >= self.max_attempts:
+                print(f"❌ Outbox event {event.id} ({event.operation} {event.path}) gave up after "
+                      f"{event.attempts} attempts; later writes to that path are held until it is retried")
+
+    def drain_pending(self) -> int:
+        """Drain until nothing is ready; returns immediately if a drain is running"""
+        if not self._drain_lock.acquire(blocking=False):
+            return 0
+        try:
+            total = 0
+            while True:
+                replicated = self.drain_once()
+                total += replicated
+                if replicated < self.batch_size:
+                    return total
+        finally:
+            self._drain_lock.release()
+
+    def start(self) -> None:
+        """Sweep the outbox every poll_interval seconds in a background thread"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="firebase-outbox-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.drain_pending()
+            except Exception as e:
+                print(f"❌ Outbox relay error: {e}")
+            self._stopping.wait(self.poll_interval)
+
+    def metrics(self) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            pending = db.query(FirebaseOutbox).filter(FirebaseOutbox.processed_at.is_(None))
+            oldest = pending.order_by(FirebaseOutbox.id).first()
+            return {
+                "pending": pending.count(),
+                "dead": pending.filter(FirebaseOutbox.attempts >= self.max_attempts).count(),
+                "oldest_pending_seconds": round(
+                    (datetime.utcnow() - oldest.created_at).total_seconds(), 3
+                ) if oldest else 0.0,
+                "replicated": self.replicated,
+                "failed_batches": self.failed_batches,
+                "last_drain_at": self.last_drain_at.isoformat() if self.last_drain_at else None,
+            }
+        finally:
+            db.close()
+
+
+def replay(db, since: datetime) -> int:
+    """Mark events processed since `since` as pending again"""
+    count = db.query(FirebaseOutbox).filter(FirebaseOutbox.processed_at >= since).update(
+        {"processed_at": None, "attempts": 0, "available_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    return count
+
+
+def retry_dead(db, max_attempts: int = settings.firebase_outbox_max_attempts) -> int:
+    """Give events that ran out of attempts (and the paths they hold) another go"""
+    count = db.query(FirebaseOutbox).filter(
+        FirebaseOutbox.processed_at.is_(None),
+        FirebaseOutbox.attempts >= max_attempts
+    ).update({"attempts": 0, "available_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    return count
+
+
+def backfill(db, only_missing: bool = False, chunk_size: int = 1000) -> int:
+    """Enqueue a full set of every alert (or only alerts never replicated)"""
+    from app.firebase.realtime_alerts import generate_push_id
+
+    query = db.query(Alert)
+    if only_missing:
+        query = query.filter(Alert.firebase_id.is_(None))
+    total = 0
+    last_id = 0
+    while True:
+        alerts = query.filter(Alert.id > last_id).order_by(Alert.id).limit(chunk_size).all()
+        if not alerts:
+            return total
+        for alert in alerts:
+            if not alert.firebase_id:
+                alert.firebase_id = generate_push_id()
+            add_outbox_event(db, f"alerts/{alert.firebase_id}", "set", alert_firebase_payload(alert))
+        db.commit()
+        total += len(alerts)
+        last_id = alerts[-1].id
+
+
+def _root_ref():
+    from app.firebase.config import firebase_reference
+    return firebase_reference("/")
+
+
+def _session():
+    from app.database.connection import SessionLocal
+    return SessionLocal()
+
+
+outbox_relay = OutboxRelay(
+    session_factory=_session,
+    root_ref_factory=_root_ref,
+    batch_size=settings.firebase_outbox_batch_size,
+    max_attempts=settings.firebase_outbox_max_attempts,
+    poll_interval=settings.firebase_outbox_poll_interval
+)
+
+
+if __name__ == "__main__":
+    from app.database.connection import Base, SessionLocal, engine
+    from app.firebase.config import initialize_firebase
+
+    parser = argparse.ArgumentParser(description="Firebase outbox relay and maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("relay", help="drain the outbox continuously")
+    commands.add_parser("retry-dead", help="retry events that ran out of attempts")
+    replay_parser = commands.add_parser("replay", help="re-send events processed since a date")
+    replay_parser.add_argument("--since", required=True, type=datetime.fromisoformat)
+    backfill_parser = commands.add_parser("backfill", help="enqueue existing alerts")
+    backfill_parser.add_argument("--only-missing", action="store_true",
+                                 help="skip alerts that already have a firebase_id")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    initialize_firebase()
+    if args.command == "relay":
+        print("🚀 Outbox relay running (Ctrl+C to stop)")
+        try:
+            while True:
+                replicated = outbox_relay.drain_pending()
+                if replicated:
+                    print(f"✅ Replicated {replicated} event(s)")
+                time.sleep(outbox_relay.poll_interval)
+        except KeyboardInterrupt:
+            pass
+    else:
+        db = SessionLocal()
+        try:
+            if args.command == "replay":
+                print(f"✅ Re-queued {replay(db, args.since)} event(s)")
+            elif args.command == "retry-dead":
+                print(f"✅ Re-queued {retry_dead(db)} dead event(s)")
+            else:
+                print(f"✅ Enqueued {backfill(db, args.only_missing)} alert(s)")
+        finally:
+            db.close()
@@ -1,22 +1,86 @@
 from firebase_admin import db
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+import random
+import threading
+import time
+
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+_push_id_lock = threading.Lock()
+_last_push_time = 0
+_last_rand_chars = [0] * 12
+
+def generate_push_id() -> str:
+    """
+    Chronologically ordered key in the same format as ref.push(), made
+    locally so callers know an alert's Firebase id without a round trip.
+    """
+    global _last_push_time
+    with _push_id_lock:
+        now = int(time.time() * 1000)
+        if now == _last_push_time:
+            # Same millisecond: increment the random part to keep ordering
+            for i in range(11, -1, -1):
+                if _last_rand_chars[i] != 63:
+                    _last_rand_chars[i] += 1
+                    break
+                _last_rand_chars[i] = 0
+        else:
+            for i in range(12):
+                _last_rand_chars[i] = random.randrange(64)
+        _last_push_time = now
+        
+        time_chars = []
+        for _ in range(8):
+            time_chars.append(PUSH_CHARS[now % 64])
+            now //= 64
+        return "".join(reversed(time_chars)) + "".join(PUSH_CHARS[c] for c in _last_rand_chars)
+
+# Firebase queries order by a single child, so "status within a time
+# window" is served by a composite "<status>_<ISO timestamp>" child.
+# See backend/database.rules.json for the matching .indexOn rules.
+STATUS_TIMESTAMP = "status_timestamp"
+RANGE_END = "\uf8ff"
+
+def status_timestamp(status: str, timestamp: str) -> str:
+    return f"{status}_{timestamp}"
+
+# Page cursors are "<ISO timestamp>|<push id>" of the oldest alert already
+# returned, so alerts sharing a timestamp are neither skipped nor repeated.
+# A bare timestamp (older clients) pages strictly before it.
+def alert_cursor(timestamp: str, key: str) -> str:
+    return f"{timestamp}|{key}"
+
+def parse_alert_cursor(cursor: str) -> Tuple[str, str]:
+    timestamp, _, key = cursor.partition("|")
+    return timestamp, key
 
 class FirebaseAlertService:
     
-    def __init__(self):
-        from app.firebase.config import initialize_firebase
+    def __init__(self, ref=None, mirror=None):
+        from app.firebase.config import initialize_firebase, firebase_reference
         # Make sure Firebase is initialized
         initialize_firebase()
-        self.ref = db.reference('/alerts')
+        self.ref = ref if ref is not None else firebase_reference('/alerts')
+        # Optional AlertMirror; reads use it once it has synced
+        self.mirror = mirror
+    
+    def _mirror_ready(self) -> bool:
+        return self.mirror is not None and self.mirror.ready
     
-    def create_alert(self, alert_data: Dict[str, Any]) -> str:
-        """Create a new real-time alert in Firebase"""
+    def create_alert(self, alert_data: Dict[str, Any], alert_id: Optional[str] = None,
+                     timestamp: Optional[str] = None) -> str:
+        """
+        Create a new real-time alert in Firebase. Pass alert_id (from
+        generate_push_id) and timestamp when the write is deferred so the
+        caller can report the id before it is stored.
+        """
         try:
-            alert_id = self.ref.push().key
+            alert_id = alert_id or generate_push_id()
             alert_data['id'] = alert_id
-            alert_data['timestamp'] = datetime.utcnow().isoformat()
+            alert_data['timestamp'] = timestamp or datetime.utcnow().isoformat()
             alert_data['status'] = 'active'
+            alert_data[STATUS_TIMESTAMP] = status_timestamp('active', alert_data['timestamp'])
             
             self.ref.child(alert_id).set(alert_data)
             return alert_id
@@ -25,16 +89,66 @@ class FirebaseAlertService:
             raise
     
     def get_all_alerts(self) -> Optional[Dict]:
-        """Get all active alerts from Firebase"""
+        """Get the whole alerts tree; prefer query_alerts for anything user-facing"""
         try:
+            if self._mirror_ready():
+                return self.mirror.get_all()
             return self.ref.get()
         except Exception as e:
             print(f"Error getting alerts: {e}")
             return None
     
+    def query_alerts(self, status: Optional[str] = None, since: Optional[str] = None,
+                     until: Optional[str] = None, before: Optional[str] = None,
+                     limit: int = 100) -> Tuple[Dict, Optional[str]]:
+        """
+        Newest `limit` alerts, filtered by Firebase instead of in Python.
+        since/until bound the ISO timestamp (inclusive); before is the
+        exclusive (timestamp, key) cursor returned by the previous page.
+        Returns (alerts oldest-first, cursor for the next older page or None).
+        """
+        if self._mirror_ready():
+            return self.mirror.query_alerts(status, since, until, before, limit)
+        
+        before_ts, before_key = parse_alert_cursor(before) if before else (None, "")
+        end = min(until, before_ts) if until and before_ts else (before_ts or until)
+        
+        if status and not (since or end):
+            # Ties on status are ordered by key, and push keys are chronological
+            query = self.ref.order_by_child('status').equal_to(status)
+        elif status:
+            query = self.ref.order_by_child(STATUS_TIMESTAMP) \
+                .start_at(status_timestamp(status, since or "")) \
+                .end_at(status_timestamp(status, end or RANGE_END))
+        else:
+            query = self.ref.order_by_child('timestamp') \
+                .start_at(since or "").end_at(end or RANGE_END)
+        
+        # One extra row to detect another page. end_at() can't take the
+        # cursor key, so rows at the cursor timestamp that were already
+        # returned come back too; widen the fetch until enough remain.
+        fetch = limit + 1 + (1 if before else 0)
+        while True:
+            fetched = list((query.limit_to_last(fetch).get() or {}).items())
+            rows = fetched
+            if before:
+                rows = [
+                    (k, v) for k, v in rows
+                    if (str(v.get('timestamp', '')), k) < (before_ts, before_key)
+                ]
+            if len(rows) > limit or len(fetched) < fetch:
+                break
+            fetch *= 2
+        has_more = len(rows) > limit
+        rows = rows[-limit:] if limit else []
+        next_cursor = alert_cursor(str(rows[0][1].get('timestamp', '')), rows[0][0]) if has_more and rows else None
+        return dict(rows), next_cursor
+    
     def get_alert(self, alert_id: str) -> Optional[Dict]:
         """Get specific alert by ID"""
         try:
+            if self._mirror_ready():
+                return self.mirror.get(alert_id)
             return self.ref.child(alert_id).get()
         except Exception as e:
             print(f"Error getting alert: {e}")
@@ -43,6 +157,10 @@ class FirebaseAlertService:
     def update_alert(self, alert_id: str, update_data: Dict[str, Any]) -> bool:
         """Update existing alert"""
         try:
+            if 'status' in update_data and STATUS_TIMESTAMP not in update_data:
+                timestamp = update_data.get('timestamp') or self.ref.child(alert_id).child('timestamp').get()
+                if timestamp:
+                    update_data[STATUS_TIMESTAMP] = status_timestamp(update_data['status'], timestamp)
             self.ref.child(alert_id).update(update_data)
             return True
         except Exception as e:
@@ -58,15 +176,12 @@ class FirebaseAlertService:
             print(f"Error deleting alert: {e}")
             return False
     
-    def get_active_alerts(self) -> Dict:
-        """Get only active alerts"""
+    def get_active_alerts(self, since: Optional[str] = None, until: Optional[str] = None,
+                          limit: int = 100) -> Dict:
+        """Get the newest active alerts, optionally within a time window"""
         try:
-            all_alerts = self.ref.get()
-            if not all_alerts:
-                return {}
-            
-            active = {k: v for k, v in all_alerts.items() if v.get('status') == 'active'}
-            return active
+            alerts, _ = self.query_alerts('active', since=since, until=until, limit=limit)
+            return alerts
         except Exception as e:
             print(f"Error getting active alerts: {e}")
             return {}
\ No newline at end of file
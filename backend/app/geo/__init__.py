@@ -0,0 +1,7 @@
+from app.geo.grid import CLUSTER_MAX_ZOOM, cell_size_for_zoom, grid_cell_columns, bbox_filters, in_bbox
+from app.geo.spatial_index import SpatialIndex, LocationIndex, haversine_km, location_index, parse_location_types
+
+__all__ = [
+    'CLUSTER_MAX_ZOOM', 'cell_size_for_zoom', 'grid_cell_columns', 'bbox_filters', 'in_bbox',
+    'SpatialIndex', 'LocationIndex', 'haversine_km', 'location_index', 'parse_location_types'
+]
@@ -0,0 +1,77 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import func, or_
+
+# Grid cells per 256px map tile edge; 4 gives roughly 64px cells on screen
+CELLS_PER_TILE = 4
+MIN_ZOOM = 0
+MAX_ZOOM = 20
+# Below this zoom level map markers are clustered on the server
+CLUSTER_MAX_ZOOM = 13
+
+
+def cell_size_for_zoom(zoom: int) -> float:
+    """Grid cell edge in degrees for a web-map zoom level"""
+    zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def grid_cell_columns(lat_column, lng_column, cell_size: float) -> Tuple:
+    """
+    SQL expressions for the integer grid cell (row, col) of each point.
+    Group by both to aggregate points into cells inside the database.
+    """
+    return (
+        func.floor(lat_column / cell_size).label("cell_y"),
+        func.floor(lng_column / cell_size).label("cell_x"),
+    )
+
+
+def bbox_filters(
+    lat_column,
+    lng_column,
+    min_lat: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    min_lng: Optional[float] = None,
+    max_lng: Optional[float] = None
+) -> List:
+    """
+    Filter conditions for the given bounds; unset bounds are ignored.
+    A box with min_lng > max_lng is treated as crossing the antimeridian.
+    """
+    conditions = [lat_column.isnot(None), lng_column.isnot(None)]
+    if min_lat is not None:
+        conditions.append(lat_column >= min_lat)
+    if max_lat is not None:
+        conditions.append(lat_column <= max_lat)
+    if min_lng is not None and max_lng is not None and min_lng > max_lng:
+        conditions.append(or_(lng_column >= min_lng, lng_column <= max_lng))
+    else:
+        if min_lng is not None:
+            conditions.append(lng_column >= min_lng)
+        if max_lng is not None:
+            conditions.append(lng_column <= max_lng)
+    return conditions
+
+
+def in_bbox(
+    lat: Optional[float],
+    lng: Optional[float],
+    min_lat: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    min_lng: Optional[float] = None,
+    max_lng: Optional[float] = None
+) -> bool:
+    """Python counterpart of bbox_filters for a single point"""
+    if lat is None or lng is None:
+        return False
+    if min_lat is not None and lat < min_lat:
+        return False
+    if max_lat is not None and lat > max_lat:
+        return False
+    if min_lng is not None and max_lng is not None and min_lng > max_lng:
+        return lng >= min_lng or lng <= max_lng
+    if min_lng is not None and lng < min_lng:
+        return False
+    if max_lng is not None and lng > max_lng:
+        return False
+    return True
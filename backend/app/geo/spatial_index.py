@@ -0,0 +1,215 @@
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import get_settings
+
+settings = get_settings()
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+# Half the equator: every point on the globe is within this distance
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in km"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_location_types(location_type: Optional[str]) -> Optional[Set[str]]:
+    """'hospital,shelter' -> {'hospital', 'shelter'}"""
+    if not location_type:
+        return None
+    return {t.strip().lower() for t in location_type.split(",") if t.strip()} or None
+
+
+class SpatialIndex:
+    """
+    Points bucketed into a lat/lng grid of cell_deg-degree cells.
+
+    within_radius() only measures the points in cells overlapping the
+    circle's bounding box; nearest() widens the radius until k points are
+    found. Longitude wraps, so searches near the antimeridian see both
+    sides. Safe for concurrent readers and writers.
+    """
+
+    def __init__(self, cell_deg: float = 0.25):
+        self.cell_deg = cell_deg
+        self._cols = max(1, math.ceil(360.0 / cell_deg))
+        self._rows = max(1, math.ceil(180.0 / cell_deg))
+        self._cells: Dict[Tuple[int, int], List[Any]] = {}
+        self._points: Dict[Any, Tuple[float, float, Any, Tuple[int, int]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        row = min(self._rows - 1, max(0, int((lat + 90.0) // self.cell_deg)))
+        col = int(((lng + 180.0) % 360.0) // self.cell_deg) % self._cols
+        return row, col
+
+    def insert(self, key: Any, lat: float, lng: float, item: Any = None) -> None:
+        """Add or move a point"""
+        with self._lock:
+            self.remove(key)
+            cell = self._cell(lat, lng)
+            self._points[key] = (lat, lng, item, cell)
+            self._cells.setdefault(cell, []).append(key)
+
+    def remove(self, key: Any) -> bool:
+        with self._lock:
+            point = self._points.pop(key, None)
+            if point is None:
+                return False
+            bucket = self._cells[point[3]]
+            bucket.remove(key)
+            if not bucket:
+                del self._cells[point[3]]
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells = {}
+            self._points = {}
+
+    def _candidate_cells(self, lat: float, lng: float, radius_km: float) -> Iterable[Tuple[int, int]]:
+        lat_span = radius_km / KM_PER_DEGREE
+        min_row, _ = self._cell(max(-90.0, lat - lat_span), 0.0)
+        max_row, _ = self._cell(min(90.0, lat + lat_span), 0.0)
+        # Widest longitude span of the circle is at the latitude nearest a pole
+        edge_lat = min(89.999, abs(lat) + lat_span)
+        if lat + lat_span >= 90.0 or lat - lat_span <= -90.0:
+            cols: Iterable[int] = range(self._cols)
+        else:
+            lng_span = lat_span / math.cos(math.radians(edge_lat))
+            if lng_span >= 180.0:
+                cols = range(self._cols)
+            else:
+                _, first = self._cell(0.0, lng - lng_span)
+                count = min(self._cols, int(2 * lng_span // self.cell_deg) + 2)
+                cols = [(first + i) % self._cols for i in range(count)]
+        for row in range(min_row, max_row + 1):
+            for col in cols:
+                if (row, col) in self._cells:
+                    yield row, col
+
+    def within_radius(self, lat: float, lng: float, radius_km: float,
+                      predicate: Optional[Callable[[Any], bool]] = None) -> List[Tuple[Any, float]]:
+        """(item, distance_km) for every point within radius_km, nearest first"""
+        results = []
+        with self._lock:
+            for cell in self._candidate_cells(lat, lng, radius_km):
+                for key in self._cells[cell]:
+                    p_lat, p_lng, item, _ = self._points[key]
+                    if predicate is not None and not predicate(item):
+                        continue
+                    distance = haversine_km(lat, lng, p_lat, p_lng)
+                    if distance <= radius_km:
+                        results.append((item, distance))
+        results.sort(key=lambda result: result[1])
+        return results
+
+    def nearest(self, lat: float, lng: float, k: int, max_km: Optional[float] = None,
+                predicate: Optional[Callable[[Any], bool]] = None) -> List[Tuple[Any, float]]:
+        """k nearest (item, distance_km), optionally no further than max_km"""
+        limit = min(max_km, MAX_DISTANCE_KM) if max_km is not None else MAX_DISTANCE_KM
+        radius = min(limit, self.cell_deg * KM_PER_DEGREE)
+        while True:
+            # Everything within `radius` is found, so the k closest of
+            # those are the k closest overall once there are k of them
+            results = self.within_radius(lat, lng, radius, predicate)
+            if len(results) >= k or radius >= limit:
+                return results[:k]
+            radius = min(limit, radius * 4)
+
+
+class LocationIndex:
+    """
+    SpatialIndex over Location rows, loaded on first use and kept current
+    by add() on create plus a periodic catch-up of rows inserted by other
+    worker processes.
+    """
+
+    def __init__(self, cell_deg: float, refresh_interval: float):
+        self.index = SpatialIndex(cell_deg)
+        self.refresh_interval = refresh_interval
+        self._max_id = 0
+        self._loaded_at: Optional[float] = None
+        self._load_lock = threading.Lock()
+
+    @staticmethod
+    def _item(location) -> Dict[str, Any]:
+        return {
+            "id": location.id,
+            "name": location.name,
+            "city": location.city,
+            "state": location.state,
+            "country": location.country,
+            "latitude": location.latitude,
+            "longitude": location.longitude,
+            "location_type": location.location_type,
+        }
+
+    def add(self, location) -> None:
+        self.index.insert(location.id, location.latitude, location.longitude, self._item(location))
+        self._max_id = max(self._max_id, location.id)
+
+    def remove(self, location_id: int) -> None:
+        self.index.remove(location_id)
+
+    def ensure_loaded(self, db) -> None:
+        """Load every location once, then pick up new rows every refresh_interval"""
+        from app.models.location import Location
+
+        now = time.monotonic()
+        if self._loaded_at is not None and now - self._loaded_at < self.refresh_interval:
+            return
+        with self._load_lock:
+            if self._loaded_at is not None and now - self._loaded_at < self.refresh_interval:
+                return
+            query = db.query(Location)
+            if self._loaded_at is not None:
+                # add() may have raised _max_id before the first load, so
+                # only catch-ups are filtered by id
+                query = query.filter(Location.id > self._max_id)
+            rows = query.order_by(Location.id).yield_per(10000)
+            for location in rows:
+                self.add(location)
+            self._loaded_at = time.monotonic()
+
+    def reset(self) -> None:
+        with self._load_lock:
+            self.index.clear()
+            self._max_id = 0
+            self._loaded_at = None
+
+    @staticmethod
+    def _type_filter(location_types: Optional[Set[str]]) -> Optional[Callable[[Any], bool]]:
+        if not location_types:
+            return None
+        return lambda item: (item["location_type"] or "").lower() in location_types
+
+    def within_radius(self, lat: float, lng: float, radius_km: float,
+                      location_types: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        return [
+            {**item, "distance_km": round(distance, 3)}
+            for item, distance in self.index.within_radius(lat, lng, radius_km, self._type_filter(location_types))
+        ]
+
+    def nearest(self, lat: float, lng: float, k: int, max_km: Optional[float] = None,
+                location_types: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        return [
+            {**item, "distance_km": round(distance, 3)}
+            for item, distance in self.index.nearest(lat, lng, k, max_km, self._type_filter(location_types))
+        ]
+
+
+location_index = LocationIndex(settings.geo_index_cell_deg, settings.geo_index_refresh_interval)
@@ -0,0 +1,4 @@
+from app.ingest.dedup import AlertDeduplicator, alert_deduplicator
+from app.ingest.bulk import alert_row, insert_alert_chunk
+
+__all__ = ['AlertDeduplicator', 'alert_deduplicator', 'alert_row', 'insert_alert_chunk']
@@ -0,0 +1,125 @@
+"""
+Bulk loading of historical alerts for /admin/alerts/bulk.
+
+Rows arrive already validated (AlertImport) in chunks. Each chunk is
+written in its own transaction: on PostgreSQL with psycopg2/psycopg the
+alerts go through COPY ... FROM STDIN, elsewhere through one executemany
+INSERT. The daily rollups get one executemany upsert per chunk, one
+row per distinct rollup key. With replicate=True every alert also gets
+a Firebase push id and a "set" outbox row, which needs the generated
+ids, so the chunk is inserted with INSERT ... RETURNING instead of COPY.
+
+Bulk rows bypass the per-alert side effects of submissions: no dedup
+check and no WebSocket/SSE events.
+"""
+import io
+import json
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.analytics import apply_rollup_deltas, rollup_key
+from app.firebase.outbox import alert_firebase_payload
+from app.firebase.realtime_alerts import generate_push_id
+from app.models.alert import Alert
+from app.models.outbox import FirebaseOutbox
+from app.schemas.alert import AlertImport
+
+COPY_COLUMNS = (
+    "alert_type", "severity", "title", "description", "latitude", "longitude",
+    "location_name", "radius", "status", "is_active", "created_by", "created_at",
+    "resolved_at", "report_count", "firebase_id"
+)
+COPY_DRIVERS = ("psycopg2", "psycopg")
+
+
+def alert_row(alert: AlertImport, now: datetime) -> Dict[str, Any]:
+    """Column values for one validated import row"""
+    row = alert.model_dump()
+    if row["is_active"] is None:
+        row["is_active"] = row["status"] == "active"
+    row["created_at"] = row["created_at"] or now
+    row["report_count"] = 1
+    row["firebase_id"] = None
+    return row
+
+
+def _copy_value(value: Any) -> str:
+    # Unquoted empty is NULL in COPY's CSV format; everything else is quoted
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_buffer(rows: List[Dict[str, Any]]) -> io.StringIO:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_copy_value(row[column]) for column in COPY_COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def supports_copy(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver in COPY_DRIVERS
+
+
+def _copy_alerts(db: Session, rows: List[Dict[str, Any]]) -> None:
+    sql = f"COPY {Alert.__tablename__} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    buffer = copy_buffer(rows)
+    cursor = db.connection().connection.cursor()
+    try:
+        if db.get_bind().dialect.driver == "psycopg2":
+            cursor.copy_expert(sql, buffer)
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+def _enqueue_replication(db: Session, rows: List[Dict[str, Any]], ids: List[int], now: datetime) -> None:
+    events = []
+    for row, alert_id in zip(rows, ids):
+        payload = alert_firebase_payload(Alert(id=alert_id, **row))
+        events.append({
+            "path": f"alerts/{row['firebase_id']}",
+            "operation": "set",
+            "payload": json.dumps(payload, default=str),
+            "created_at": now,
+            "available_at": now,
+            "attempts": 0
+        })
+    db.execute(insert(FirebaseOutbox), events)
+
+
+def insert_alert_chunk(db: Session, rows: List[Dict[str, Any]], replicate: bool = False) -> int:
+    """Insert one chunk of alert rows and its rollup counts in one transaction"""
+    if not rows:
+        return 0
+    now = datetime.utcnow()
+    try:
+        if replicate:
+            for row in rows:
+                row["firebase_id"] = generate_push_id()
+            ids = list(db.scalars(insert(Alert).returning(Alert.id, sort_by_parameter_order=True), rows))
+            _enqueue_replication(db, rows, ids, now)
+        elif supports_copy(db):
+            _copy_alerts(db, rows)
+        else:
+            db.execute(insert(Alert), rows)
+
+        deltas = Counter(tuple(rollup_key(SimpleNamespace(**row)).items()) for row in rows)
+        apply_rollup_deltas(db, [{**dict(key), "count": delta} for key, delta in deltas.items()])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
@@ -0,0 +1,148 @@
+"""
+Near-duplicate detection for crowdsourced alert submissions.
+
+Recent active alerts are kept in a SpatialIndex. A submission of the
+same category within dedup_radius_km and dedup_window_minutes of one of
+them is merged into it (report_count + 1) instead of creating a new
+alert, Firebase node and heatmap point. The index is warmed from the
+database on first use and catches up on rows written by other workers
+every dedup_refresh_interval seconds. Catch-ups re-read created_at from
+REFRESH_OVERLAP before the previous one, since ids and created_at are
+assigned before commit and a row can become visible after later ones;
+alerts already tracked are skipped by id.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.geo import SpatialIndex
+
+settings = get_settings()
+
+# How far back each catch-up re-reads to pick up rows committed late
+REFRESH_OVERLAP = timedelta(minutes=2)
+
+
+class AlertDeduplicator:
+
+    def __init__(self, radius_km: float, window: timedelta, refresh_interval: float,
+                 enabled: bool = True, refresh_overlap: timedelta = REFRESH_OVERLAP):
+        self.radius_km = radius_km
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self.refresh_overlap = refresh_overlap
+        self.enabled = enabled
+        self.index = SpatialIndex(cell_deg=max(0.01, radius_km / 111.0))
+        self._expiry: Deque[Tuple[datetime, int]] = deque()  # (created_at, id) in insert order
+        self._seen: Set[int] = set()  # ids added and not yet expired, including removed ones
+        self._lock = threading.RLock()
+        self._refreshed_since: Optional[datetime] = None  # wall clock at the start of the last load
+        self._loaded_at: Optional[float] = None
+        self.merged = 0
+        self.checked = 0
+
+    @staticmethod
+    def _category(alert_type: Optional[str]) -> str:
+        return (alert_type or "").strip().lower()
+
+    def add(self, alert) -> None:
+        """Track a newly committed alert"""
+        if not self.enabled or alert.latitude is None or alert.longitude is None:
+            return
+        created_at = alert.created_at or datetime.utcnow()
+        with self._lock:
+            if alert.id in self._seen:
+                return
+            self._seen.add(alert.id)
+            self.index.insert(alert.id, alert.latitude, alert.longitude, {
+                "id": alert.id,
+                "category": self._category(alert.alert_type),
+                "created_at": created_at,
+            })
+            self._expiry.append((created_at, alert.id))
+
+    def remove(self, alert_id: int) -> None:
+        """Stop merging into an alert (resolved or deleted)"""
+        with self._lock:
+            self.index.remove(alert_id)
+
+    def _evict(self, now: datetime) -> None:
+        cutoff = now - self.window
+        while self._expiry and self._expiry[0][0] < cutoff:
+            _, alert_id = self._expiry.popleft()
+            self.index.remove(alert_id)
+            self._seen.discard(alert_id)
+
+    def find_duplicate(self, alert_type: str, latitude: float, longitude: float,
+                       at: Optional[datetime] = None) -> Optional[int]:
+        """Id of the nearest recent alert of the same category, if any"""
+        if not self.enabled:
+            return None
+        at = at or datetime.utcnow()
+        category = self._category(alert_type)
+        cutoff = at - self.window
+        with self._lock:
+            self._evict(at)
+            self.checked += 1
+            matches = self.index.within_radius(
+                latitude, longitude, self.radius_km,
+                lambda item: item["category"] == category and item["created_at"] >= cutoff
+            )
+        return matches[0][0]["id"] if matches else None
+
+    def _recent_alerts_query(self, now: datetime):
+        from app.models.alert import Alert
+
+        since = now - self.window
+        if self._refreshed_since is not None:
+            since = max(since, self._refreshed_since - self.refresh_overlap)
+        return select(Alert).where(
+            Alert.is_active == True,
+            Alert.created_at >= since
+        ).order_by(Alert.created_at)
+
+    def _needs_refresh(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval
+
+    def _loaded(self, now: datetime) -> None:
+        self._refreshed_since = now
+        self._loaded_at = time.monotonic()
+
+    def ensure_warm(self, db) -> None:
+        """Load recent alerts on a sync Session when the index is cold or stale"""
+        if not self.enabled or not self._needs_refresh():
+            return
+        now = datetime.utcnow()
+        for alert in db.execute(self._recent_alerts_query(now)).scalars():
+            self.add(alert)
+        self._loaded(now)
+
+    async def ensure_warm_async(self, db) -> None:
+        """ensure_warm for an AsyncSession"""
+        if not self.enabled or not self._needs_refresh():
+            return
+        now = datetime.utcnow()
+        for alert in (await db.execute(self._recent_alerts_query(now))).scalars():
+            self.add(alert)
+        self._loaded(now)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "tracked": len(self.index),
+            "checked": self.checked,
+            "merged": self.merged,
+        }
+
+
+alert_deduplicator = AlertDeduplicator(
+    radius_km=settings.dedup_radius_km,
+    window=timedelta(minutes=settings.dedup_window_minutes),
+    refresh_interval=settings.dedup_refresh_interval,
+    enabled=settings.dedup_enabled
+)
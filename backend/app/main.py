@@ -1,11 +1,29 @@
-from fastapi import FastAPI
+import asyncio
+import json
+from typing import Optional
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import alerts, users, locations, firebase_alerts, alert_submission, admin  # ← ADDED admin here
-from app.database.connection import engine, Base
-from app.firebase.config import initialize_firebase
+from app.routers import alerts, users, locations, firebase_alerts, alert_submission, admin, attachments  # ← ADDED admin here
+from app.database.connection import engine, Base, dispose_async_engine
+from app.database.pool_metrics import pool_metrics
+from app.config import get_settings
+from app.firebase.config import firebase_reference, initialize_firebase
+from app.firebase.fanout import firebase_fanout
+from app.firebase.mirror import alert_mirror
+from app.firebase.outbox import outbox_relay
+from app.ingest import alert_deduplicator
+from app.ml import area_feature_store, ml_service
+from app.realtime import SubscriberFilter, alert_broadcaster
+from app.security import password_hasher
+from app.storage import attachment_processor
+from app.utils.body_limit import BodySizeLimitMiddleware
 
-# Create tables on startup
+# Create missing tables on startup; columns and indexes missing from older
+# databases are added by the migration step (python -m app.database.migrations)
 Base.metadata.create_all(bind=engine)
+settings = get_settings()
 
 app = FastAPI(
     title="Alert System API",
@@ -13,6 +31,13 @@ app = FastAPI(
     description="Backend API for Real-time Alert System with PostgreSQL and Firebase"
 )
 
+# Cap alert submissions while they stream in; the allowance covers the
+# form fields and multipart framing around the files
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/submit-alert": settings.attachment_max_request_bytes + 1024 * 1024},
+)
+
 # CORS Configuration for React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -27,24 +52,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor"],
 )
 
 # Initialize Firebase on startup
 @app.on_event("startup")
 async def startup_event():
     print("🚀 Starting Alert System API...")
+    alert_broadcaster.bind(asyncio.get_running_loop())
+    firebase_fanout.start()
+    ml_service.registry.start()
+    if settings.ml_warmup:
+        # Models load in the background; requests that need one first wait for it
+        asyncio.get_running_loop().run_in_executor(None, ml_service.load_models)
     firebase_status = initialize_firebase()
     if firebase_status:
+        outbox_relay.start()
+        if settings.firebase_mirror:
+            await run_in_threadpool(alert_mirror.start, firebase_reference('/alerts'))
         print("✅ All systems initialized successfully!")
     else:
         print("⚠️ Firebase initialization failed, but API will continue running")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await run_in_threadpool(alert_mirror.stop)
+    await run_in_threadpool(ml_service.registry.stop)
+    await run_in_threadpool(outbox_relay.stop)
+    await run_in_threadpool(firebase_fanout.stop)
+    await run_in_threadpool(attachment_processor.shutdown)
+    await run_in_threadpool(password_hasher.shutdown)
+    await dispose_async_engine()
+
 # Include routers
 app.include_router(alerts.router)
 app.include_router(users.router)
 app.include_router(locations.router)
 app.include_router(firebase_alerts.router)
 app.include_router(alert_submission.router)
+app.include_router(attachments.router)
 app.include_router(admin.router)  # ← ADDED this line
 
 @app.get("/")
@@ -59,7 +105,9 @@ def read_root():
             "locations": "/locations",
             "admin": "/admin",  # ← ADDED this
             "docs": "/docs",
-            "health": "/health"
+            "health": "/health",
+            "metrics": "/metrics",
+            "stream": "/ws/alerts, /events/alerts"
         }
     }
 
@@ -69,4 +117,110 @@ def health_check():
         "status": "healthy",
         "database": "PostgreSQL connected",
         "realtime": "Firebase connected"
-    }
\ No newline at end of file
+    }
+
+@app.get("/metrics")
+def get_metrics():
+    """Runtime metrics for the database pool and background queues"""
+    return {
+        "db_pool": pool_metrics.snapshot(engine.pool),
+        "firebase_fanout": firebase_fanout.metrics(),
+        "firebase_outbox": outbox_relay.metrics(),
+        "firebase_mirror": alert_mirror.metrics(),
+        "realtime": alert_broadcaster.metrics(),
+        "dedup": alert_deduplicator.metrics(),
+        "attachments": attachment_processor.metrics(),
+        "password_hashing": password_hasher.metrics(),
+        "ml_models": ml_service.registry.metrics(),
+        "ml_prediction_cache": ml_service.cache_metrics(),
+        "area_features": area_feature_store.metrics()
+    }
+
+@app.get("/events/alerts")
+async def stream_alert_events(
+    request: Request,
+    min_lat: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    min_lng: Optional[float] = None,
+    max_lng: Optional[float] = None,
+    severity: Optional[str] = None,
+    alert_type: Optional[str] = None
+):
+    """
+    Server-Sent Events stream of alert created/updated/resolved/deleted
+    deltas. severity and alert_type take comma-separated values. A
+    "resync" event means events were dropped; refetch over REST.
+    """
+    subscriber = alert_broadcaster.subscribe(SubscriberFilter.from_params(
+        min_lat, max_lat, min_lng, max_lng, severity, alert_type
+    ))
+    if subscriber is None:
+        return Response(status_code=503, content="Too many subscribers")
+    
+    async def events():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=settings.realtime_heartbeat_interval
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            alert_broadcaster.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/alerts")
+async def alert_events_websocket(
+    websocket: WebSocket,
+    min_lat: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    min_lng: Optional[float] = None,
+    max_lng: Optional[float] = None,
+    severity: Optional[str] = None,
+    alert_type: Optional[str] = None
+):
+    """
+    WebSocket version of /events/alerts. Send {"filter": {...}} with the
+    same keys as the query parameters to change the filter in place.
+    """
+    subscriber = alert_broadcaster.subscribe(SubscriberFilter.from_params(
+        min_lat, max_lat, min_lng, max_lng, severity, alert_type
+    ))
+    if subscriber is None:
+        await websocket.close(code=1013)  # try again later
+        return
+    await websocket.accept()
+    
+    async def send_events():
+        while True:
+            await websocket.send_text(await subscriber.queue.get())
+    
+    async def receive_filters():
+        while True:
+            message = await websocket.receive_text()
+            try:
+                subscriber.filter = SubscriberFilter.from_params(**json.loads(message)["filter"])
+            except (ValueError, TypeError, KeyError) as e:
+                await websocket.send_text(json.dumps({"type": "error", "detail": f"Invalid filter: {e}"}))
+    
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(receive_filters())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                print(f"⚠️ Alert stream closed: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        alert_broadcaster.unsubscribe(subscriber)
@@ -1,3 +1,6 @@
 from app.ml.ml_service import MLService, ml_service, ML_AVAILABLE
+from app.ml.registry import ModelRegistry, model_memory_bytes
+from app.ml.tree_arrays import CompiledTreeModel, TreeEnsemble, compile_model
+from app.ml.feature_store import AreaFeatureStore, area_feature_store
 
-__all__ = ['MLService', 'ml_service', 'ML_AVAILABLE']
\ No newline at end of file
+__all__ = ['MLService', 'ml_service', 'ML_AVAILABLE', 'ModelRegistry', 'model_memory_bytes', 'TreeEnsemble', 'CompiledTreeModel', 'compile_model', 'AreaFeatureStore', 'area_feature_store']
\ No newline at end of file
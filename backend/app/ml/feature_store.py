@@ -0,0 +1,234 @@
+"""
+Per-area features for the crime model.
+
+Demographic features come from a local CSV or Parquet file
+(area_features_path) with one row per area. An area is identified by an
+`area` column, which holds a place name such as "Andheri" or
+"Mumbai", or a 6-digit pincode, or else by `latitude`/`longitude`
+columns that key it to an area_features_cell_deg grid cell. Other
+columns are feature names from CRIME_FEATURES; missing ones keep
+their defaults:
+
+    area,population_density,unemployment_rate,income_level,location_risk,economic_stress
+    mumbai,20667,7.1,52000,0.7,0.6
+    400001,31000,5.2,61000,0.8,0.4
+
+A location resolves to the first match of: its whole location_name, a
+pincode inside it, its last comma-separated part (the city of
+"address, city"), the grid cell of its coordinates, then the defaults.
+The file is re-read when it changes.
+
+Incident counts per area are sums over alert_daily_rollups, which every
+write path already maintains incrementally, so no alerts are scanned.
+
+crime_features() turns column lists of locations into the model's
+feature matrix with one lookup per distinct area, ready for a single
+MLService.score_matrix() call.
+"""
+import csv
+import os
+import re
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.ml.ml_service import CRIME_FEATURES
+from app.utils.cache import TTLCache
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet feature files need pyarrow
+    pq = None
+
+settings = get_settings()
+
+# Used for areas the feature file doesn't cover
+DEFAULT_AREA_FEATURES = {
+    "population_density": 1500,
+    "unemployment_rate": 6.0,
+    "income_level": 45000,
+    "location_risk": 0.6,
+    "economic_stress": 0.5,
+}
+FEATURE_NAMES = [name for name, _ in CRIME_FEATURES]
+MAX_RESOLVED_NAMES = 100000
+_PINCODE = re.compile(r"\b(\d{6})\b")
+
+
+def normalize_area(name: Optional[str]) -> str:
+    return " ".join((name or "").lower().split())
+
+
+class AreaFeatureStore:
+
+    def __init__(self, path: str = "", cell_deg: float = 0.1, refresh_interval: float = 60.0,
+                 incident_window_days: int = 365, incident_cache_ttl: float = 60.0):
+        self.path = Path(path) if path else None
+        self.cell_deg = cell_deg
+        self.refresh_interval = refresh_interval
+        self.incident_window_days = incident_window_days
+        defaults = dict(CRIME_FEATURES)
+        defaults.update(DEFAULT_AREA_FEATURES)
+        self.default_row = np.array([defaults[name] for name in FEATURE_NAMES], dtype=np.float64)
+        # Row 0 of the table is the default row; areas start at 1
+        self._table = self.default_row[None, :].copy()
+        self._area_rows: Dict[str, int] = {}
+        self._cell_rows: Dict[Tuple[int, int], int] = {}
+        self._resolved: Dict[str, Tuple[int, str]] = {}  # location_name -> (named row or 0, area key)
+        self._file_signature: Optional[Tuple[float, int]] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._incident_cache = TTLCache(ttl=incident_cache_ttl, maxsize=4)
+        self.load_errors = 0
+
+    # Demographic features
+
+    def _read_records(self) -> List[Dict[str, str]]:
+        if self.path.suffix.lower() == ".parquet":
+            if pq is None:
+                raise RuntimeError("Reading Parquet area features needs pyarrow")
+            return pq.read_table(self.path).to_pylist()
+        with open(self.path, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(np.floor(lat / self.cell_deg)), int(np.floor(lng / self.cell_deg))
+
+    def load(self) -> int:
+        """(Re)read the feature file; returns the number of areas"""
+        records = self._read_records()
+        rows = [self.default_row]
+        area_rows: Dict[str, int] = {}
+        cell_rows: Dict[Tuple[int, int], int] = {}
+        for record in records:
+            row = self.default_row.copy()
+            for i, name in enumerate(FEATURE_NAMES):
+                value = record.get(name)
+                if value not in (None, ""):
+                    row[i] = float(value)
+            area = normalize_area(str(record.get("area") or ""))
+            if area:
+                area_rows[area] = len(rows)
+            elif record.get("latitude") not in (None, "") and record.get("longitude") not in (None, ""):
+                cell_rows[self._cell(float(record["latitude"]), float(record["longitude"]))] = len(rows)
+            else:
+                continue
+            rows.append(row)
+        with self._lock:
+            self._table = np.vstack(rows)
+            self._area_rows = area_rows
+            self._cell_rows = cell_rows
+            self._resolved = {}
+        print(f"✅ Loaded features for {len(rows) - 1} areas from {self.path.name}")
+        return len(rows) - 1
+
+    def ensure_loaded(self) -> None:
+        """Load the file on first use and again whenever it changes"""
+        if self.path is None:
+            return
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+            return
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        signature = (stat.st_mtime, stat.st_size)
+        if signature == self._file_signature:
+            return
+        try:
+            self.load()
+            self._file_signature = signature
+        except Exception as e:
+            self.load_errors += 1
+            print(f"❌ Error loading area features from {self.path}: {e}")
+
+    def resolve(self, location_name: Optional[str]) -> Tuple[int, str]:
+        """(feature table row or 0, area key used for incident counts) for a location name"""
+        cached = self._resolved.get(location_name or "")
+        if cached is not None:
+            return cached
+        self.ensure_loaded()
+        name = normalize_area(location_name)
+        city = normalize_area(name.rsplit(",", 1)[-1])
+        pincode = _PINCODE.search(name)
+        candidates = [name] + ([pincode.group(1)] if pincode else []) + [city]
+        result = (0, city or "unknown")
+        for candidate in candidates:
+            row = self._area_rows.get(candidate)
+            if row is not None:
+                result = (row, candidate)
+                break
+        if len(self._resolved) >= MAX_RESOLVED_NAMES:
+            self._resolved = {}
+        self._resolved[location_name or ""] = result
+        return result
+
+    def crime_features(self, area_names: Sequence[Optional[str]], latitudes: Sequence[float],
+                       longitudes: Sequence[float], prior_incidents: Sequence[float]) -> np.ndarray:
+        """(N, len(CRIME_FEATURES)) matrix for N locations given as columns"""
+        self.ensure_loaded()
+        with self._lock:
+            table, cell_rows = self._table, self._cell_rows
+        names, inverse = np.unique(np.asarray(area_names, dtype=object).astype(str), return_inverse=True)
+        rows = np.array([self.resolve(name)[0] for name in names], dtype=np.intp)[inverse]
+        unmatched = np.flatnonzero(rows == 0)
+        if cell_rows and len(unmatched):
+            cells = np.floor(np.column_stack([
+                np.asarray(latitudes, dtype=np.float64)[unmatched],
+                np.asarray(longitudes, dtype=np.float64)[unmatched]
+            ]) / self.cell_deg).astype(np.int64)
+            unique_cells, cell_inverse = np.unique(cells, axis=0, return_inverse=True)
+            cell_row = np.array([cell_rows.get((int(y), int(x)), 0) for y, x in unique_cells], dtype=np.intp)
+            rows[unmatched] = cell_row[cell_inverse.reshape(-1)]
+        matrix = table[rows]
+        matrix[:, FEATURE_NAMES.index("prior_incidents")] = prior_incidents
+        return matrix
+
+    # Incident counts
+
+    def _area_incidents(self, db) -> Dict[str, int]:
+        from sqlalchemy import func
+        from app.models.alert_rollup import AlertDailyRollup
+
+        query = db.query(AlertDailyRollup.location_name, func.sum(AlertDailyRollup.count))
+        if self.incident_window_days:
+            query = query.filter(AlertDailyRollup.day >= date.today() - timedelta(days=self.incident_window_days))
+        counts: Dict[str, int] = {}
+        for location_name, count in query.group_by(AlertDailyRollup.location_name):
+            area = self.resolve(location_name)[1]
+            counts[area] = counts.get(area, 0) + int(count or 0)
+        return counts
+
+    def incident_counts(self, db, area_names: Sequence[Optional[str]]) -> np.ndarray:
+        """Alerts in each location's area over the incident window"""
+        self.ensure_loaded()
+        counts = self._incident_cache.get_or_set("areas", lambda: self._area_incidents(db))
+        names, inverse = np.unique(np.asarray(area_names, dtype=object).astype(str), return_inverse=True)
+        per_name = np.array([counts.get(self.resolve(name)[1], 0) for name in names], dtype=np.float64)
+        return per_name[inverse]
+
+    def metrics(self) -> Dict:
+        return {
+            "path": str(self.path) if self.path else None,
+            "areas": len(self._area_rows),
+            "cells": len(self._cell_rows),
+            "resolved_names": len(self._resolved),
+            "load_errors": self.load_errors,
+            "incident_cache": self._incident_cache.stats(),
+        }
+
+
+area_feature_store = AreaFeatureStore(
+    path=settings.area_features_path,
+    cell_deg=settings.area_features_cell_deg,
+    refresh_interval=settings.area_features_refresh_interval,
+    incident_window_days=settings.area_incident_window_days,
+    incident_cache_ttl=settings.area_incident_cache_ttl
+)
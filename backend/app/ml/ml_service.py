@@ -1,46 +1,299 @@
-import joblib
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Optional
-import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config import get_settings
+from app.ml.registry import ModelRegistry
+from app.utils.cache import TTLCache
+
+settings = get_settings()
 
 ML_AVAILABLE = True
 
+MODEL_NAMES = ("crime", "weather", "fraud")
+
+# Rows scored per predict_proba call by the batch APIs
+DEFAULT_BATCH_CHUNK_SIZE = 10000
+
+# Ordered (feature, default) pairs the crime model was trained on
+CRIME_FEATURES = [
+    ('population_density', 1000),
+    ('unemployment_rate', 5.0),
+    ('income_level', 50000),
+    ('prior_incidents', 0),
+    ('location_risk', 0.5),
+    ('economic_stress', 0.5),
+    ('is_night', 0),
+    ('is_weekend', 0),
+]
+
+# Ordered (feature, default) pairs the weather model was trained on
+WEATHER_FEATURES = [
+    ('temperature', 25),                 # Temperature
+    ('precipitation', 0),                # Precipitation
+    ('wind_speed', 10),                  # Wind Speed
+    ('humidity', 60),                    # Humidity
+    ('weather_encoded', 0),              # Weather Code
+    ('hour', 12),                        # Hour
+    ('month', 6),                        # Month
+    ('pressure', 1013.25),               # Air Pressure (hPa)
+    ('visibility', 10),                  # Visibility (km)
+    ('wind_direction', 180),             # Wind Direction (degrees)
+    ('cloud_cover', 50),                 # Cloud Cover (%)
+]
+
+# Ordered (feature, default) pairs the fraud model was trained on
+FRAUD_FEATURES = [
+    ('amount', 1000),
+    ('victim_income', 50000),
+    ('previous_frauds', 0),
+    ('detection_time_hours', 24),
+    ('fraud_type_encoded', 0),
+    ('channel_encoded', 0),
+]
+
+MODEL_FEATURES = {
+    "crime": CRIME_FEATURES,
+    "weather": WEATHER_FEATURES,
+    "fraud": FRAUD_FEATURES,
+}
+
+
+def build_feature_matrix(rows: List[Dict], features: List[Tuple[str, float]]) -> np.ndarray:
+    """Build an (N, len(features)) float matrix, filling missing keys with defaults"""
+    matrix = np.empty((len(rows), len(features)), dtype=np.float64)
+    for i, row in enumerate(rows):
+        matrix[i] = [row.get(name, default) for name, default in features]
+    return matrix
+
+
+def quantize_features(matrix: np.ndarray, digits: int) -> np.ndarray:
+    """Round every value to `digits` significant digits; 0 leaves the matrix unchanged"""
+    if not digits:
+        return matrix
+    scale = np.ones_like(matrix)
+    nonzero = np.isfinite(matrix) & (matrix != 0)
+    scale[nonzero] = 10.0 ** (np.floor(np.log10(np.abs(matrix[nonzero]))) - (digits - 1))
+    return np.round(matrix / scale) * scale
+
+
+def iter_chunks(rows: List, chunk_size: Optional[int]) -> Iterator[List]:
+    """Yield consecutive slices of rows, or all rows at once if chunk_size is falsy"""
+    if not chunk_size:
+        if rows:
+            yield rows
+        return
+    for start in range(0, len(rows), chunk_size):
+        yield rows[start:start + chunk_size]
+
+
+def _prediction_response(probability: float, factors: List[Dict], recommendations: List[str]) -> Dict:
+    return {
+        "risk_score": round(probability, 3),
+        "confidence": round(probability * 100, 1),
+        "factors": [{"name": f.get("name"), "weight": f.get("weight")} for f in factors],
+        "recommendations": recommendations
+    }
+
+
+def error_response() -> Dict:
+    """Response returned when a prediction could not be made"""
+    return {
+        "risk_score": 0.0,
+        "confidence": 0.0,
+        "factors": [],
+        "recommendations": ["Unable to generate recommendations due to error"]
+    }
+
+
+def crime_response(data: Dict, probability: float) -> Dict:
+    """Build the crime PredictionResponse for one record and its probability"""
+    factors = []
+    if data.get('population_density'):
+        factors.append({"name": "Population Density", "weight": 0.2})
+    if data.get('unemployment_rate'):
+        factors.append({"name": "Unemployment Rate", "weight": 0.15})
+    if data.get('prior_incidents'):
+        factors.append({"name": "Prior Incidents", "weight": 0.3})
+    if data.get('economic_stress'):
+        factors.append({"name": "Economic Stress", "weight": 0.2})
+    if data.get('location_risk'):
+        factors.append({"name": "Location Risk", "weight": 0.15})
+    
+    return _prediction_response(probability, factors, [
+        "Increase community policing in high-risk areas",
+        "Implement neighborhood watch programs",
+        "Improve street lighting in vulnerable locations",
+        "Deploy mobile surveillance units during peak hours"
+    ])
+
+
+def weather_response(data: Dict, probability: float) -> Dict:
+    """Build the weather PredictionResponse for one record and its probability"""
+    factors = []
+    if data.get('temperature'):
+        factors.append({"name": "Temperature", "weight": 0.2})
+    if data.get('precipitation'):
+        factors.append({"name": "Precipitation", "weight": 0.2})
+    if data.get('wind_speed'):
+        factors.append({"name": "Wind Speed", "weight": 0.3})
+    if data.get('humidity'):
+        factors.append({"name": "Humidity", "weight": 0.15})
+    if data.get('hour'):
+        factors.append({"name": "Time of Day", "weight": 0.15})
+    
+    return _prediction_response(probability, factors, [
+        "Monitor severe weather alerts",
+        "Prepare emergency evacuation routes",
+        "Ensure proper drainage systems",
+        "Stock emergency supplies"
+    ])
+
+
+def fraud_response(data: Dict, probability: float) -> Dict:
+    """Build the fraud PredictionResponse for one record and its probability"""
+    factors = []
+    if data.get('amount'):
+        factors.append({"name": "Transaction Amount", "weight": 0.25})
+    if data.get('victim_income'):
+        factors.append({"name": "Victim Income Level", "weight": 0.15})
+    if data.get('previous_frauds'):
+        factors.append({"name": "Previous Fraud History", "weight": 0.3})
+    if data.get('detection_time_hours'):
+        factors.append({"name": "Detection Time", "weight": 0.15})
+    if data.get('channel_encoded'):
+        factors.append({"name": "Channel Risk", "weight": 0.15})
+    
+    return _prediction_response(probability, factors, [
+        "Implement additional verification steps",
+        "Monitor transaction patterns",
+        "Set up fraud alerts and notifications",
+        "Educate users about common fraud schemes"
+    ])
+
+
+RESPONSE_BUILDERS = {
+    "crime": crime_response,
+    "weather": weather_response,
+    "fraud": fraud_response,
+}
+
+def area_risk_point(latitude: float, longitude: float, area_name: str, risk_score: float) -> Dict:
+    """Heatmap point for one location's crime risk probability"""
+    if risk_score > 0.7:
+        risk_level = "high"
+        color = "#ef4444"  # red
+    elif risk_score > 0.4:
+        risk_level = "medium"
+        color = "#f97316"  # orange
+    else:
+        risk_level = "low"
+        color = "#22c55e"  # green
+    
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "risk_score": round(risk_score, 3),
+        "risk_level": risk_level,
+        "color": color,
+        "area_name": area_name
+    }
+
 class MLService:
-    def __init__(self):
-        self.models_dir = Path(__file__).parent / "models"
+    def __init__(self, models_dir: Optional[str] = None, poll_interval: float = 10.0,
+                 mmap_mode: Optional[str] = "r", compile_max_rows: int = 0,
+                 cache_size: int = 0, cache_ttl: float = 3600.0, cache_digits: int = 0):
+        self.models_dir = Path(models_dir) if models_dir else Path(__file__).parent / "models"
         if not self.models_dir.exists():
             self.models_dir.mkdir(parents=True, exist_ok=True)
-        self.crime_model = None
-        self.weather_model = None
-        self.fraud_model = None
-        self.load_models()
+        # Models are unpickled on first use (or by load_models), not here
+        self.registry = ModelRegistry(self.models_dir, poll_interval, mmap_mode, compile_max_rows)
+        
+        # Positive-class probabilities keyed by (model, version, generation, feature bytes).
+        # With cache_digits > 0 features are rounded before lookup *and* scoring,
+        # so near-identical inputs share one entry and results don't depend on order.
+        self.prediction_cache = TTLCache(ttl=cache_ttl, maxsize=cache_size) if cache_size > 0 else None
+        self.cache_digits = cache_digits
+        self.cache_invalidations = 0
+        self._active_generations: Dict[str, int] = {}
+        self.registry.add_listener(self._on_model_swap)
+    
+    @property
+    def crime_model(self):
+        return self.registry.get("crime")
+    
+    @property
+    def weather_model(self):
+        return self.registry.get("weather")
+    
+    @property
+    def fraud_model(self):
+        return self.registry.get("fraud")
+    
+    def get_model(self, model_name: str, version: Optional[str] = None) -> Optional[Any]:
+        """The active model, or a specific version loaded side by side"""
+        return self.registry.get(model_name, version)
+    
+    def _on_model_swap(self, model_name: str, loaded) -> None:
+        """A new model version became active: drop the old version's cached predictions"""
+        replaced = model_name in self._active_generations
+        self._active_generations[model_name] = loaded.generation
+        if replaced and self.prediction_cache is not None:
+            self.prediction_cache.clear()
+            self.cache_invalidations += 1
+    
+    def cache_metrics(self) -> Dict:
+        if self.prediction_cache is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "digits": self.cache_digits,
+            "invalidations": self.cache_invalidations,
+            **self.prediction_cache.stats()
+        }
+    
+    def _score(self, model_name: str, matrix: np.ndarray) -> np.ndarray:
+        """
+        Positive-class probabilities for a feature matrix. Rows already in
+        the prediction cache are a lookup; the distinct remaining rows are
+        scored with one predict_proba call.
+        """
+        # One read of the active model, so the estimator and its cache key
+        # can't come from different versions if a swap happens meanwhile
+        loaded = self.registry.get_loaded(model_name)
+        if loaded is None:
+            raise RuntimeError(f"{model_name.title()} model not loaded")
+        model = loaded.model
+        cache = self.prediction_cache
+        if cache is None:
+            return model.predict_proba(matrix)[:, 1]
+        
+        matrix = quantize_features(matrix, self.cache_digits)
+        model_key = (loaded.version, loaded.generation)
+        probabilities = np.empty(len(matrix), dtype=np.float64)
+        missing: Dict[tuple, List[int]] = {}
+        for i, row in enumerate(matrix):
+            key = (model_name, model_key, row.tobytes())
+            cached = cache.get(key)
+            if cached is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                probabilities[i] = cached
+        if missing:
+            first_rows = [indexes[0] for indexes in missing.values()]
+            scored = model.predict_proba(matrix[first_rows])[:, 1]
+            for (key, indexes), probability in zip(missing.items(), scored.tolist()):
+                probabilities[indexes] = probability
+                cache.set(key, probability)
+        return probabilities
     
     def load_models(self):
-        """Load all ML models"""
+        """Load all ML models now instead of on first use"""
         try:
-            crime_path = self.models_dir / "crime_risk_model.pkl"
-            weather_path = self.models_dir / "weather_risk_model.pkl"
-            fraud_path = self.models_dir / "fraud_risk_model.pkl"
-            
-            if crime_path.exists():
-                self.crime_model = joblib.load(crime_path)
-                print("✅ Crime model loaded successfully")
-            else:
-                print("⚠️ Crime model not found")
-            
-            if weather_path.exists():
-                self.weather_model = joblib.load(weather_path)
-                print("✅ Weather model loaded successfully")
-            else:
-                print("⚠️ Weather model not found")
-            
-            if fraud_path.exists():
-                self.fraud_model = joblib.load(fraud_path)
-                print("✅ Fraud model loaded successfully")
-            else:
-                print("⚠️ Fraud model not found")
-                
+            self.registry.warm_up(list(MODEL_NAMES))
+            for name in MODEL_NAMES:
+                if self.registry.active_version(name) is None:
+                    print(f"⚠️ {name.title()} model not found")
         except Exception as e:
             print(f"❌ Error loading models: {e}")
     
@@ -56,60 +309,12 @@ class MLService:
             if self.crime_model is None:
                 return {"error": "Crime model not loaded", "probability": 0.0}
             
-            features = np.array([[
-                data.get('population_density', 1000),
-                data.get('unemployment_rate', 5.0),
-                data.get('income_level', 50000),
-                data.get('prior_incidents', 0),
-                data.get('location_risk', 0.5),
-                data.get('economic_stress', 0.5),
-                data.get('is_night', 0),
-                data.get('is_weekend', 0)
-            ]])
-            
-            probability = float(self.crime_model.predict_proba(features)[0][1])
-            is_high_risk = probability > 0.5
-            
-            if probability > 0.7:
-                risk_level = "critical"
-            elif probability > 0.5:
-                risk_level = "high"
-            elif probability > 0.3:
-                risk_level = "medium"
-            else:
-                risk_level = "low"
-            
-            factors = []
-            if data.get('population_density'):
-                factors.append({"name": "Population Density", "weight": 0.2})
-            if data.get('unemployment_rate'):
-                factors.append({"name": "Unemployment Rate", "weight": 0.15})
-            if data.get('prior_incidents'):
-                factors.append({"name": "Prior Incidents", "weight": 0.3})
-            if data.get('economic_stress'):
-                factors.append({"name": "Economic Stress", "weight": 0.2})
-            if data.get('location_risk'):
-                factors.append({"name": "Location Risk", "weight": 0.15})
-
-            return {
-                "risk_score": round(probability, 3),
-                "confidence": round(probability * 100, 1),
-                "factors": [{"name": f.get("name"), "weight": f.get("weight")} for f in factors],
-                "recommendations": [
-                    "Increase community policing in high-risk areas",
-                    "Implement neighborhood watch programs",
-                    "Improve street lighting in vulnerable locations",
-                    "Deploy mobile surveillance units during peak hours"
-                ]
-            }
+            features = build_feature_matrix([data], CRIME_FEATURES)
+            probability = float(self._score("crime", features)[0])
+            return crime_response(data, probability)
         except Exception as e:
             print(f"Error in crime prediction: {e}")
-            return {
-                "risk_score": 0.0,
-                "confidence": 0.0,
-                "factors": [],
-                "recommendations": ["Unable to generate recommendations due to error"]
-            }
+            return error_response()
     
     def predict_weather_risk(self, data: Dict) -> Dict:
         """
@@ -123,54 +328,12 @@ class MLService:
                 return {"error": "Weather model not loaded"}
             
             # Prepare the 11 required features
-            features = np.array([[
-                data.get('temperature', 25),                 # Temperature
-                data.get('precipitation', 0),                # Precipitation
-                data.get('wind_speed', 10),                  # Wind Speed
-                data.get('humidity', 60),                    # Humidity
-                data.get('weather_encoded', 0),              # Weather Code
-                data.get('hour', 12),                        # Hour
-                data.get('month', 6),                        # Month
-                data.get('pressure', 1013.25),               # Air Pressure (hPa)
-                data.get('visibility', 10),                  # Visibility (km)
-                data.get('wind_direction', 180),             # Wind Direction (degrees)
-                data.get('cloud_cover', 50)                  # Cloud Cover (%)
-            ]])
-            
-            prediction = int(self.weather_model.predict(features)[0])
-            probability = float(self.weather_model.predict_proba(features)[0][1])
-            
-            factors = []
-            if data.get('temperature'):
-                factors.append({"name": "Temperature", "weight": 0.2})
-            if data.get('precipitation'):
-                factors.append({"name": "Precipitation", "weight": 0.2})
-            if data.get('wind_speed'):
-                factors.append({"name": "Wind Speed", "weight": 0.3})
-            if data.get('humidity'):
-                factors.append({"name": "Humidity", "weight": 0.15})
-            if data.get('hour'):
-                factors.append({"name": "Time of Day", "weight": 0.15})
-
-            return {
-                "risk_score": round(probability, 3),
-                "confidence": round(probability * 100, 1),
-                "factors": [{"name": f.get("name"), "weight": f.get("weight")} for f in factors],
-                "recommendations": [
-                    "Monitor severe weather alerts",
-                    "Prepare emergency evacuation routes",
-                    "Ensure proper drainage systems",
-                    "Stock emergency supplies"
-                ]
-            }
+            features = build_feature_matrix([data], WEATHER_FEATURES)
+            probability = float(self._score("weather", features)[0])
+            return weather_response(data, probability)
         except Exception as e:
             print(f"Error in weather prediction: {e}")
-            return {
-                "risk_score": 0.0,
-                "confidence": 0.0,
-                "factors": [],
-                "recommendations": ["Unable to generate recommendations due to error"]
-            }
+            return error_response()
     
     def predict_fraud_risk(self, data: Dict) -> Dict:
         """
@@ -183,83 +346,96 @@ class MLService:
             if self.fraud_model is None:
                 return {"error": "Fraud model not loaded"}
             
-            features = np.array([[
-                data.get('amount', 1000),
-                data.get('victim_income', 50000),
-                data.get('previous_frauds', 0),
-                data.get('detection_time_hours', 24),
-                data.get('fraud_type_encoded', 0),
-                data.get('channel_encoded', 0)
-            ]])
-            
-            prediction = int(self.fraud_model.predict(features)[0])
-            probability = float(self.fraud_model.predict_proba(features)[0][1])
-            
-            factors = []
-            if data.get('amount'):
-                factors.append({"name": "Transaction Amount", "weight": 0.25})
-            if data.get('victim_income'):
-                factors.append({"name": "Victim Income Level", "weight": 0.15})
-            if data.get('previous_frauds'):
-                factors.append({"name": "Previous Fraud History", "weight": 0.3})
-            if data.get('detection_time_hours'):
-                factors.append({"name": "Detection Time", "weight": 0.15})
-            if data.get('channel_encoded'):
-                factors.append({"name": "Channel Risk", "weight": 0.15})
-
-            return {
-                "risk_score": round(probability, 3),
-                "confidence": round(probability * 100, 1),
-                "factors": [{"name": f.get("name"), "weight": f.get("weight")} for f in factors],
-                "recommendations": [
-                    "Implement additional verification steps",
-                    "Monitor transaction patterns",
-                    "Set up fraud alerts and notifications",
-                    "Educate users about common fraud schemes"
-                ]
-            }
+            features = build_feature_matrix([data], FRAUD_FEATURES)
+            probability = float(self._score("fraud", features)[0])
+            return fraud_response(data, probability)
         except Exception as e:
             print(f"Error in fraud prediction: {e}")
-            return {
-                "risk_score": 0.0,
-                "confidence": 0.0,
-                "factors": [],
-                "recommendations": ["Unable to generate recommendations due to error"]
-            }
+            return error_response()
     
-    def get_area_risk_scores(self, locations: List[Dict]) -> List[Dict]:
+    def _predict_proba_batch(self, model_name: str, rows: List[Dict], chunk_size: Optional[int]) -> List[float]:
+        """Score rows with one predict_proba call per chunk, preserving order"""
+        if getattr(self, f"{model_name}_model") is None:
+            raise RuntimeError(f"{model_name.title()} model not loaded")
+        
+        features = MODEL_FEATURES[model_name]
+        probabilities: List[float] = []
+        for chunk in iter_chunks(rows, chunk_size):
+            matrix = build_feature_matrix(chunk, features)
+            probabilities.extend(self._score(model_name, matrix).tolist())
+        return probabilities
+    
+    def predict_crime_risk_batch(self, rows: List[Dict], chunk_size: Optional[int] = DEFAULT_BATCH_CHUNK_SIZE) -> List[float]:
+        """
+        Predict crime risk probabilities for many records at once
+        Input: [{population_density, unemployment_rate, ...}, ...]
+        Output: [probability, ...] in the same order as the input
+        
+        Rows are scored in chunks of at most chunk_size so the feature
+        matrix stays bounded; pass None to score everything in one call.
+        """
+        return self._predict_proba_batch("crime", rows, chunk_size)
+    
+    def predict_weather_risk_batch(self, rows: List[Dict], chunk_size: Optional[int] = DEFAULT_BATCH_CHUNK_SIZE) -> List[float]:
+        """Predict weather risk probabilities for many records at once"""
+        return self._predict_proba_batch("weather", rows, chunk_size)
+    
+    def predict_fraud_risk_batch(self, rows: List[Dict], chunk_size: Optional[int] = DEFAULT_BATCH_CHUNK_SIZE) -> List[float]:
+        """Predict fraud risk probabilities for many records at once"""
+        return self._predict_proba_batch("fraud", rows, chunk_size)
+    
+    def predict_batch(self, model_name: str, rows: List[Dict], chunk_size: Optional[int] = DEFAULT_BATCH_CHUNK_SIZE) -> List[Dict]:
+        """
+        Full prediction responses for many records of one model
+        Input: model_name in {"crime", "weather", "fraud"} and a list of records
+        Output: [PredictionResponse dict, ...] in the same order as the input
+        """
+        if model_name not in MODEL_FEATURES:
+            raise ValueError(f"Unknown model: {model_name}")
+        
+        probabilities = self._predict_proba_batch(model_name, rows, chunk_size)
+        build_response = RESPONSE_BUILDERS[model_name]
+        return [build_response(row, probability) for row, probability in zip(rows, probabilities)]
+    
+    def get_area_risk_scores(self, locations: List[Dict], chunk_size: Optional[int] = DEFAULT_BATCH_CHUNK_SIZE) -> List[Dict]:
         """
         Calculate risk scores for multiple locations for heat map
         Input: [{"lat": float, "lng": float, "area_data": {...}}]
         Output: [{"lat": float, "lng": float, "risk_score": float, "risk_level": str}]
         """
-        results = []
-        for location in locations:
-            area_data = location.get('area_data', {})
-            crime_pred = self.predict_crime_risk(area_data)
-            
-            risk_score = crime_pred.get('probability', 0.0)
-            
-            if risk_score > 0.7:
-                risk_level = "high"
-                color = "#ef4444"  # red
-            elif risk_score > 0.4:
-                risk_level = "medium"
-                color = "#f97316"  # orange
-            else:
-                risk_level = "low"
-                color = "#22c55e"  # green
-            
-            results.append({
-                "latitude": location.get('lat'),
-                "longitude": location.get('lng'),
-                "risk_score": round(risk_score, 3),
-                "risk_level": risk_level,
-                "color": color,
-                "area_name": location.get('area_name', 'Unknown')
-            })
+        probabilities = self.predict_crime_risk_batch(
+            [location.get('area_data', {}) for location in locations],
+            chunk_size=chunk_size
+        )
         
-        return results
+        return [
+            area_risk_point(location.get('lat'), location.get('lng'), location.get('area_name', 'Unknown'), risk_score)
+            for location, risk_score in zip(locations, probabilities)
+        ]
+    
+    def score_matrix(self, model_name: str, matrix: np.ndarray, chunk_size: Optional[int] = DEFAULT_BATCH_CHUNK_SIZE) -> np.ndarray:
+        """
+        Positive-class probabilities for a prebuilt feature matrix whose
+        columns follow MODEL_FEATURES[model_name], scored in chunks of at
+        most chunk_size rows
+        """
+        if model_name not in MODEL_FEATURES:
+            raise ValueError(f"Unknown model: {model_name}")
+        if len(matrix) == 0:
+            return np.empty(0, dtype=np.float64)
+        step = chunk_size or len(matrix)
+        return np.concatenate([
+            self._score(model_name, matrix[start:start + step])
+            for start in range(0, len(matrix), step)
+        ])
 
 # Global ML service instance
-ml_service = MLService()
\ No newline at end of file
+ml_service = MLService(
+    settings.ml_models_dir or None,
+    settings.ml_model_poll_interval,
+    settings.ml_mmap_mode or None,
+    settings.ml_numpy_max_rows if settings.ml_inference_backend == "numpy" else 0,
+    cache_size=settings.ml_prediction_cache_size,
+    cache_ttl=settings.ml_prediction_cache_ttl,
+    cache_digits=settings.ml_prediction_cache_digits
+)
\ No newline at end of file
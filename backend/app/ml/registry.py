@@ -0,0 +1,421 @@
+"""
+Lazily loaded, versioned ML models.
+
+Model files live in the models directory as
+
+    <name>_risk_model.pkl              version "default"
+    <name>_risk_model-<version>.pkl    e.g. crime_risk_model-2025-06.pkl
+
+or as array exports with the same names and a .trees suffix (see
+app/ml/tree_arrays.py), which are memory-mapped and shared between
+worker processes. Of a pickle and an export of the same version, the
+newer file is served, so a retrained pickle isn't hidden by a stale export.
+
+Nothing is unpickled at import time: a model is loaded on its first
+get(), or by warm_up() in a background thread after startup, so worker
+cold start no longer depends on model size. Each name has an active
+version, the most recently modified file unless one was pinned with
+activate(). Pins are kept in an ACTIVE file in the models directory, so
+every worker's watcher applies them and they survive restarts. Other
+versions can be loaded side by side with get(name, version).
+
+A watcher thread rescans the directory every poll_interval seconds.
+When the active file of a loaded model changes, or a newer version
+appears, the replacement is loaded in the watcher thread and swapped in
+with a single assignment; requests already holding the old model finish
+with it. Copy new files in under a temporary name and rename them, so
+the watcher never sees a half-written pickle.
+"""
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from app.ml.tree_arrays import META_FILE, CompiledTreeModel, TreeEnsemble, compile_model
+
+DEFAULT_VERSION = "default"
+ACTIVE_FILE = "ACTIVE"  # JSON {name: version} of pinned models
+_FILE_PATTERN = re.compile(r"^(?P<name>[a-z0-9]+)_risk_model(?:-(?P<version>[A-Za-z0-9_.]+?))?\.(?P<kind>pkl|trees)$")
+
+
+@dataclass
+class ModelFile:
+    name: str
+    version: str
+    path: Path
+    size: int
+    mtime: float
+    kind: str = "pkl"  # "pkl" (joblib pickle) or "trees" (array export directory)
+
+    @property
+    def signature(self) -> Tuple[float, int]:
+        return self.mtime, self.size
+
+
+# Each load gets a new generation, so a reloaded file never shares cache keys
+_generations = itertools.count(1)
+
+
+@dataclass
+class LoadedModel:
+    name: str
+    version: str
+    path: Path
+    model: Any
+    signature: Tuple[float, int]
+    load_seconds: float
+    memory_bytes: int
+    mapped_bytes: int = 0
+    backend: str = "sklearn"
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+    generation: int = field(default_factory=lambda: next(_generations))
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "file": self.path.name,
+            "backend": self.backend,
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_bytes": self.memory_bytes,
+            "mapped_bytes": self.mapped_bytes,
+            "loaded_at": self.loaded_at.isoformat(),
+        }
+
+
+def model_memory_bytes(obj: Any, _seen: Optional[Dict[int, Any]] = None) -> int:
+    """
+    Bytes held in NumPy arrays reachable from an estimator, including
+    the node and value arrays of sklearn trees. Python object overhead
+    is not counted, so this is a lower bound that tracks model size.
+    """
+    # Holds each visited object so temporary __getstate__ dicts can't reuse an id
+    seen = _seen if _seen is not None else {}
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+    if isinstance(obj, np.memmap):
+        return 0  # shared page cache, not process memory
+    if isinstance(obj, np.ndarray):
+        total = obj.nbytes
+        if obj.dtype == object:
+            total += sum(model_memory_bytes(item, seen) for item in obj.ravel())
+        return total
+    if isinstance(obj, dict):
+        return sum(model_memory_bytes(value, seen) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(model_memory_bytes(item, seen) for item in obj)
+    if type(obj).__name__ == "Tree" and hasattr(obj, "__getstate__"):
+        # sklearn.tree._tree.Tree keeps its arrays in C; they surface through pickling state
+        return model_memory_bytes(obj.__getstate__(), seen)
+    if hasattr(obj, "__dict__"):
+        return model_memory_bytes(vars(obj), seen)
+    return 0
+
+
+class ModelRegistry:
+
+    def __init__(self, models_dir: Path, poll_interval: float = 10.0, mmap_mode: Optional[str] = "r",
+                 compile_max_rows: int = 0):
+        self.models_dir = Path(models_dir)
+        self.poll_interval = poll_interval
+        self.mmap_mode = mmap_mode
+        # > 0: pickled forests answer batches up to this size with the NumPy evaluator
+        self.compile_max_rows = compile_max_rows
+        self._loaded: Dict[Tuple[str, str], LoadedModel] = {}
+        self._active: Dict[str, LoadedModel] = {}
+        self._pins: Dict[str, str] = {}
+        self._pins_signature: Optional[Tuple[float, int]] = None
+        self._failed: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._stale_warned: set = set()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, LoadedModel], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.swaps = 0
+        self.load_errors = 0
+
+    # Discovery
+
+    def scan(self) -> Dict[str, Dict[str, ModelFile]]:
+        """{name: {version: ModelFile}} for every model file on disk"""
+        files: Dict[str, Dict[str, ModelFile]] = {}
+        if not self.models_dir.exists():
+            return files
+        for path in self.models_dir.iterdir():
+            match = _FILE_PATTERN.match(path.name)
+            if not match:
+                continue
+            kind = match.group("kind")
+            try:
+                # An export is complete once its meta.json exists
+                stat = (path / META_FILE).stat() if kind == "trees" else path.stat()
+            except OSError:
+                continue  # removed while scanning, or an export still being written
+            version = match.group("version") or DEFAULT_VERSION
+            versions = files.setdefault(match.group("name"), {})
+            model_file = ModelFile(match.group("name"), version, path, stat.st_size, stat.st_mtime, kind)
+            other = versions.get(version)
+            if other is not None:
+                # A .pkl and its .trees export: serve the export unless the
+                # pickle was replaced after it, which makes the export stale
+                pickle, export = (model_file, other) if kind == "pkl" else (other, model_file)
+                model_file = pickle if pickle.mtime > export.mtime else export
+                if model_file is pickle:
+                    self._warn_stale(export, pickle)
+            versions[version] = model_file
+        return files
+
+    def _warn_stale(self, export: ModelFile, pickle: ModelFile) -> None:
+        key = (export.path, export.mtime, pickle.mtime)
+        if key not in self._stale_warned:
+            self._stale_warned.add(key)
+            print(f"⚠️ {export.path.name} is older than {pickle.path.name}; serving the pickle "
+                  f"until it is re-exported (python -m app.ml.tree_arrays export)")
+
+    def _active_file(self, name: str, versions: Dict[str, ModelFile]) -> Optional[ModelFile]:
+        pinned = self.pins().get(name)
+        if pinned is not None:
+            return versions.get(pinned)
+        if not versions:
+            return None
+        return max(versions.values(), key=lambda f: (f.mtime, f.version))
+
+    # Loading
+
+    def _load(self, model_file: ModelFile) -> LoadedModel:
+        started = time.perf_counter()
+        if model_file.kind == "trees":
+            model = TreeEnsemble.load(model_file.path, mmap_mode=self.mmap_mode)
+        else:
+            model = joblib.load(model_file.path)
+            if self.compile_max_rows > 0:
+                model = compile_model(model, self.compile_max_rows)
+        loaded = LoadedModel(
+            name=model_file.name,
+            version=model_file.version,
+            path=model_file.path,
+            model=model,
+            signature=model_file.signature,
+            load_seconds=time.perf_counter() - started,
+            memory_bytes=model_memory_bytes(model),
+            mapped_bytes=getattr(model, "mapped_bytes", 0),
+            backend="numpy" if isinstance(model, (TreeEnsemble, CompiledTreeModel)) else "sklearn"
+        )
+        print(f"✅ {model_file.name.title()} model {model_file.version} loaded in {loaded.load_seconds:.2f}s")
+        return loaded
+
+    def _load_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(name, threading.Lock())
+
+    def _load_file(self, model_file: ModelFile) -> Optional[LoadedModel]:
+        """Load a file, reusing the loaded copy while the file is unchanged; hold the name's load lock"""
+        key = (model_file.name, model_file.version)
+        loaded = self._loaded.get(key)
+        if loaded is not None and loaded.signature == model_file.signature:
+            return loaded
+        if self._failed.get(key) == model_file.signature:
+            return None  # don't retry a broken file until it changes
+        try:
+            loaded = self._load(model_file)
+        except Exception as e:
+            self.load_errors += 1
+            self._failed[key] = model_file.signature
+            print(f"❌ Error loading {model_file.path.name}: {e}")
+            return None
+        self._failed.pop(key, None)
+        self._loaded[key] = loaded
+        return loaded
+
+    def _ensure(self, name: str, version: Optional[str]) -> Optional[LoadedModel]:
+        """Load (once) and return the requested version, or the active one"""
+        with self._load_lock(name):
+            if version is None and name in self._active:
+                return self._active[name]
+            versions = self.scan().get(name, {})
+            model_file = versions.get(version) if version is not None else self._active_file(name, versions)
+            if model_file is None:
+                return None
+            loaded = self._load_file(model_file)
+            if loaded is not None and model_file.version == self._active_version(name, versions):
+                self._swap(name, loaded)
+            return loaded
+
+    def _active_version(self, name: str, versions: Dict[str, ModelFile]) -> Optional[str]:
+        model_file = self._active_file(name, versions)
+        return model_file.version if model_file else None
+
+    def _swap(self, name: str, loaded: LoadedModel) -> None:
+        previous = self._active.get(name)
+        if previous is loaded:
+            return
+        self._active[name] = loaded
+        if previous is not None:
+            self.swaps += 1
+            print(f"🔄 {name.title()} model swapped to {loaded.version}")
+        for listener in list(self._listeners):
+            try:
+                listener(name, loaded)
+            except Exception as e:
+                print(f"⚠️ Model swap listener failed: {e}")
+
+    def get_loaded(self, name: str, version: Optional[str] = None) -> Optional[LoadedModel]:
+        """The LoadedModel for name (active version by default), loading it on first use"""
+        if version is None:
+            loaded = self._active.get(name)
+            if loaded is not None:
+                return loaded
+        return self._ensure(name, version)
+
+    def get(self, name: str, version: Optional[str] = None) -> Optional[Any]:
+        """The estimator for name (active version by default), loading it on first use"""
+        loaded = self.get_loaded(name, version)
+        return loaded.model if loaded is not None else None
+
+    def active_version(self, name: str) -> Optional[str]:
+        loaded = self._active.get(name)
+        return loaded.version if loaded is not None else None
+
+    def add_listener(self, callback: Callable[[str, LoadedModel], None]) -> None:
+        """Call callback(name, loaded_model) whenever a model becomes active"""
+        self._listeners.append(callback)
+
+    # Pins, shared by every worker through the ACTIVE file in the models directory
+
+    def pins(self) -> Dict[str, str]:
+        """{name: pinned version}, re-read whenever the ACTIVE file changes"""
+        path = self.models_dir / ACTIVE_FILE
+        try:
+            stat = path.stat()
+        except OSError:
+            self._pins, self._pins_signature = {}, None
+            return self._pins
+        signature = (stat.st_mtime, stat.st_size)
+        if signature != self._pins_signature:
+            try:
+                pins = json.loads(path.read_text())
+                self._pins = {str(name): str(version) for name, version in pins.items()}
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"⚠️ Ignoring unreadable {path}: {e}")
+                self._pins = {}
+            self._pins_signature = signature
+        return self._pins
+
+    def _write_pin(self, name: str, version: Optional[str]) -> None:
+        with self._lock:
+            self._pins_signature = None
+            pins = dict(self.pins())
+            if version is None:
+                pins.pop(name, None)
+            else:
+                pins[name] = version
+            path = self.models_dir / ACTIVE_FILE
+            staging = path.with_name(f".{ACTIVE_FILE}.{os.getpid()}.tmp")
+            staging.write_text(json.dumps(pins, indent=2, sort_keys=True))
+            os.replace(staging, path)
+            self._pins_signature = None
+
+    def activate(self, name: str, version: str) -> LoadedModel:
+        """Pin name to version for every worker (loading it here if needed) and swap it in"""
+        versions = self.scan().get(name, {})
+        if version not in versions:
+            raise KeyError(f"No {name} model version {version}")
+        self._write_pin(name, version)
+        loaded = self._ensure(name, version)
+        if loaded is None:
+            raise RuntimeError(f"Could not load {name} model version {version}")
+        return loaded
+
+    def unpin(self, name: str) -> None:
+        """Go back to following the newest file for name"""
+        self._write_pin(name, None)
+        self.refresh(names=[name])
+
+    def warm_up(self, names: Optional[List[str]] = None) -> None:
+        """Load the active version of every model (or of names)"""
+        for name in names or sorted(self.scan()):
+            self._ensure(name, None)
+
+    def refresh(self, names: Optional[List[str]] = None) -> None:
+        """Swap in a new active file for every model that is already loaded"""
+        files = self.scan()
+        for name in names or list(self._active):
+            if name not in self._active:
+                continue
+            model_file = self._active_file(name, files.get(name, {}))
+            current = self._active[name]
+            if model_file is None:
+                continue  # keep serving the last good model if its file disappeared
+            if (model_file.version, model_file.signature) == (current.version, current.signature):
+                continue
+            self._replace(name, model_file)
+
+    def _replace(self, name: str, model_file: ModelFile) -> None:
+        # Requests keep getting the current model until the new one is loaded
+        with self._load_lock(name):
+            loaded = self._load_file(model_file)
+            if loaded is not None:
+                self._swap(name, loaded)
+
+    def unload(self, name: str, version: str) -> bool:
+        """Drop a loaded non-active version to free its memory"""
+        with self._load_lock(name):
+            loaded = self._loaded.get((name, version))
+            if loaded is None or self._active.get(name) is loaded:
+                return False
+            del self._loaded[(name, version)]
+            return True
+
+    # Watcher
+
+    def start(self) -> None:
+        if self.poll_interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ Model registry refresh failed: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        files = self.scan()
+        models = {}
+        for name in sorted(set(files) | {name for name, _ in self._loaded}):
+            active = self._active.get(name)
+            models[name] = {
+                "active_version": active.version if active else None,
+                "pinned_version": self.pins().get(name),
+                "available_versions": sorted(files.get(name, {})),
+                "loaded": [
+                    loaded.info() for (loaded_name, _), loaded in sorted(self._loaded.items())
+                    if loaded_name == name
+                ],
+            }
+        return {
+            "models": models,
+            "swaps": self.swaps,
+            "load_errors": self.load_errors,
+            "memory_bytes": sum(loaded.memory_bytes for loaded in self._loaded.values()),
+            "mapped_bytes": sum(loaded.mapped_bytes for loaded in self._loaded.values()),
+        }
@@ -0,0 +1,285 @@
+"""
+Array-backed export of sklearn tree ensembles.
+
+joblib.load(..., mmap_mode="r") can't share a forest between worker
+processes: sklearn's Tree copies its node and value arrays into private
+C buffers when it is unpickled, so every worker holds its own copy. This
+module stores the trees of a fitted DecisionTreeClassifier,
+RandomForestClassifier or ExtraTreesClassifier as flat .npy arrays in a
+<name>_risk_model[-<version>].trees directory. np.load(mmap_mode="r")
+maps them read-only, so every worker shares a single copy through the page cache.
+
+The arrays, with all trees concatenated and child indexes global:
+
+    feature    intp    (nodes,)             split feature, 0 at leaves
+    threshold  float64 (nodes,)             go right when x[feature] > threshold
+    children   intp    (nodes, 2)           left and right child, the node itself at leaves
+    value      float64 (nodes, n_classes)   class probabilities at leaves
+    roots      intp    (trees,)             root node of every tree
+
+TreeEnsemble.predict_proba() walks every (row, tree) pair one level per
+step for max_depth steps, with one np.take per array and level; leaves
+point at themselves, so paths that end early stay put. Inputs must not
+contain NaN.
+
+The same evaluator doubles as a low-latency inference backend:
+compile_model() wraps a pickled forest so batches of up to max_rows rows
+skip sklearn's per-call validation and thread dispatch, which dominate
+single-record latency. Bigger batches still go to sklearn's Cython
+code, which is faster per row.
+
+    python -m app.ml.tree_arrays export               # every .pkl in app/ml/models
+    python -m app.ml.tree_arrays export crime_risk_model.pkl
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 2
+ARRAYS = ("feature", "threshold", "children", "value", "roots")
+META_FILE = "meta.json"
+
+# Rows walked at once by predict_proba; bounds the (rows, trees) index matrix
+DEFAULT_CHUNK_ROWS = 1024
+# Largest |predict_proba| difference compile_model() accepts against sklearn
+COMPILE_TOLERANCE = 1e-9
+
+
+class TreeEnsemble:
+    """Probability-averaging tree ensemble evaluated over flat NumPy arrays"""
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, classes: List[Any], n_features: int,
+                 max_depth: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = n_features
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, model: Any) -> "TreeEnsemble":
+        """Flatten a fitted tree classifier or forest of tree classifiers"""
+        estimators = getattr(model, "estimators_", None)
+        if estimators is None:
+            estimators = [model]
+        if not estimators or not all(hasattr(e, "tree_") for e in estimators):
+            raise TypeError(f"{type(model).__name__} is not a forest of decision trees")
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise TypeError("Multi-output trees are not supported")
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            count = tree.node_count
+            ids = np.arange(offset, offset + count, dtype=np.intp)
+            is_leaf = tree.children_left < 0
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+            children.append(np.stack([
+                np.where(is_leaf, ids, tree.children_left + offset),
+                np.where(is_leaf, ids, tree.children_right + offset)
+            ], axis=1).astype(np.intp))
+            leaf_values = tree.value[:, 0, :].astype(np.float64)
+            totals = leaf_values.sum(axis=1, keepdims=True)
+            values.append(np.divide(leaf_values, totals, out=np.zeros_like(leaf_values), where=totals > 0))
+            roots.append(offset)
+            offset += count
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=model.classes_.tolist(),
+            n_features=int(model.n_features_in_),
+            max_depth=max(int(e.tree_.max_depth) for e in estimators)
+        )
+
+    def save(self, path: Path) -> None:
+        """Write the arrays and meta.json; meta.json goes last and marks the export complete"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(path / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        meta = {
+            "format": FORMAT_VERSION,
+            "classes": self.classes_.tolist(),
+            "n_features": self.n_features_in_,
+            "max_depth": self.max_depth,
+            "n_trees": int(len(self.roots)),
+            "n_nodes": int(len(self.feature)),
+        }
+        (path / META_FILE).write_text(json.dumps(meta, indent=2))
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode: Optional[str] = "r") -> "TreeEnsemble":
+        """Open an export; with mmap_mode the arrays are mapped rather than read"""
+        path = Path(path)
+        meta = json.loads((path / META_FILE).read_text())
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tree export format {meta.get('format')}; re-run the export")
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode) for name in ARRAYS}
+        return cls(classes=meta["classes"], n_features=meta["n_features"],
+                   max_depth=meta["max_depth"], **arrays)
+
+    @property
+    def mapped_bytes(self) -> int:
+        """Bytes of arrays backed by a shared file mapping instead of private memory"""
+        return sum(getattr(self, name).nbytes for name in ARRAYS if isinstance(getattr(self, name), np.memmap))
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """(rows, trees) index of the leaf each row reaches in each tree"""
+        # sklearn rounds inputs to float32, then compares against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        flat_children = self.children.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            go_right = np.take(flat_x, row_offsets + np.take(self.feature, nodes)) > np.take(self.threshold, nodes)
+            nodes = np.take(flat_children, nodes * 2 + go_right)
+        return nodes
+
+    def predict_proba(self, X: np.ndarray, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> np.ndarray:
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected an (n, {self.n_features_in_}) feature matrix, got {X.shape}")
+        proba = np.empty((len(X), self.value.shape[1]), dtype=np.float64)
+        for start in range(0, len(X), chunk_rows):
+            leaves = self.leaves(X[start:start + chunk_rows])
+            proba[start:start + chunk_rows] = np.take(self.value, leaves, axis=0).mean(axis=1)
+        return proba
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class CompiledTreeModel:
+    """
+    A fitted sklearn forest whose batches of up to max_rows rows are
+    scored by its TreeEnsemble; bigger batches use the forest itself.
+    """
+
+    def __init__(self, model: Any, ensemble: TreeEnsemble, max_rows: int):
+        self.model = model
+        self.ensemble = ensemble
+        self.max_rows = max_rows
+        self.classes_ = ensemble.classes_
+        self.n_features_in_ = ensemble.n_features_in_
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if len(X) <= self.max_rows:
+            return self.ensemble.predict_proba(X)
+        return self.model.predict_proba(X)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def sample_inputs(ensemble: TreeEnsemble, rows: int = 1000, seed: int = 0) -> np.ndarray:
+    """Random rows near the thresholds the trees split on, where rounding differences would show"""
+    rng = np.random.default_rng(seed)
+    splits = ensemble.threshold[np.isfinite(ensemble.threshold)]
+    if not len(splits):
+        splits = np.zeros(1)
+    X = rng.choice(splits, size=(rows, ensemble.n_features_in_))
+    # Half the cells sit exactly on a split value, half are jittered around one
+    jitter = rng.normal(0, 1, X.shape) * (rng.random(X.shape) < 0.5)
+    return X + jitter
+
+
+def max_proba_difference(model: Any, ensemble: TreeEnsemble, X: np.ndarray) -> float:
+    return float(np.abs(model.predict_proba(X) - ensemble.predict_proba(X)).max())
+
+
+def compile_model(model: Any, max_rows: int, tolerance: float = COMPILE_TOLERANCE) -> Any:
+    """
+    CompiledTreeModel for a fitted tree classifier or forest, or the model
+    unchanged when it isn't one or the arrays disagree with predict_proba.
+    """
+    try:
+        ensemble = TreeEnsemble.from_sklearn(model)
+    except TypeError as e:
+        print(f"⚠️ Not compiling {type(model).__name__}: {e}")
+        return model
+    difference = max_proba_difference(model, ensemble, sample_inputs(ensemble, rows=256))
+    if difference > tolerance:
+        print(f"⚠️ Not compiling {type(model).__name__}: predictions differ by {difference:.2e}")
+        return model
+    return CompiledTreeModel(model, ensemble, max_rows)
+
+
+def export_model_file(pkl_path: Path, out_path: Optional[Path] = None) -> Path:
+    """
+    Export a pickled tree model next to it as <stem>.trees. The export is
+    written to a temporary directory and renamed into place, so a model
+    registry watching the directory never sees a partial export.
+    """
+    import joblib
+
+    pkl_path = Path(pkl_path)
+    out_path = Path(out_path) if out_path else pkl_path.with_suffix(".trees")
+    ensemble = TreeEnsemble.from_sklearn(joblib.load(pkl_path))
+    staging = Path(tempfile.mkdtemp(prefix=".export-", dir=out_path.parent))
+    try:
+        ensemble.save(staging)
+        # Keep the pickle's mtime so the registry sees the same version age
+        stat = pkl_path.stat()
+        os.utime(staging / META_FILE, (stat.st_atime, stat.st_mtime))
+        if out_path.exists():
+            shutil.rmtree(out_path)
+        staging.rename(out_path)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return out_path
+
+
+def check_export(pkl_path: Path, trees_path: Path, rows: int = 1000, seed: int = 0) -> float:
+    """Largest |predict_proba| difference between a pickle and its export"""
+    import joblib
+
+    ensemble = TreeEnsemble.load(trees_path)
+    return max_proba_difference(joblib.load(pkl_path), ensemble, sample_inputs(ensemble, rows, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export pickled tree models as memory-mappable arrays")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export")
+    export.add_argument("files", nargs="*", help="model .pkl files (default: every *_risk_model*.pkl)")
+    export.add_argument("--models-dir", default=str(Path(__file__).parent / "models"))
+    args = parser.parse_args()
+
+    models_dir = Path(args.models_dir)
+    files = [Path(f) if os.sep in f else models_dir / f for f in args.files] or sorted(models_dir.glob("*_risk_model*.pkl"))
+    for pkl_path in files:
+        try:
+            out_path = export_model_file(pkl_path)
+            error = check_export(pkl_path, out_path)
+            meta = json.loads((out_path / META_FILE).read_text())
+            print(f"✅ {pkl_path.name} -> {out_path.name} ({meta['n_trees']} trees, "
+                  f"{meta['n_nodes']} nodes, max |Δp| {error:.2e})")
+        except Exception as e:
+            print(f"❌ {pkl_path.name}: {e}")
+
+
+if __name__ == "__main__":
+    main()
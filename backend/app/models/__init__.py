@@ -1,4 +1,6 @@
 from app.database.connection import Base
 from app.models.user import User
 from app.models.alert import Alert
-from app.models.location import Location
\ No newline at end of file
+from app.models.alert_rollup import AlertDailyRollup
+from app.models.location import Location
+from app.models.outbox import FirebaseOutbox
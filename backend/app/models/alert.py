@@ -1,9 +1,25 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, Index, DDL, event
 from datetime import datetime
 from app.database.connection import Base
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Dashboard time windows and "active, newest first" listings
+        Index("ix_alerts_created_at", "created_at"),
+        Index("ix_alerts_is_active_created_at", "is_active", "created_at"),
+        # Admin filters on status/severity
+        Index("ix_alerts_status_severity", "status", "severity"),
+        # Map bounding-box queries
+        Index("ix_alerts_latitude_longitude", "latitude", "longitude"),
+        # alert_type ILIKE '%crime%' style filters (pg_trgm on PostgreSQL)
+        Index(
+            "ix_alerts_alert_type_trgm",
+            "alert_type",
+            postgresql_using="gin",
+            postgresql_ops={"alert_type": "gin_trgm_ops"}
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     alert_type = Column(String, nullable=False)  # fire, flood, earthquake, etc.
@@ -18,4 +34,13 @@ class Alert(Base):
     is_active = Column(Boolean, default=True)
     created_by = Column(Integer)  # user_id
     created_at = Column(DateTime, default=datetime.utcnow)
-    resolved_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    resolved_at = Column(DateTime, nullable=True)
+    report_count = Column(Integer, default=1, server_default="1")  # submissions merged into this alert
+    firebase_id = Column(String, nullable=True)  # key of the replicated node under /alerts
+
+# The trigram index needs the pg_trgm extension before the table is created
+event.listen(
+    Alert.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Date, Index, UniqueConstraint
+from app.database.connection import Base
+
+class AlertDailyRollup(Base):
+    """Alert counts per day and category, maintained as alerts change"""
+    __tablename__ = "alert_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "day", "alert_type", "severity", "status", "location_name",
+            name="uq_alert_daily_rollups_key"
+        ),
+        Index("ix_alert_daily_rollups_day", "day"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    alert_type = Column(String, nullable=False)
+    severity = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    location_name = Column(String, nullable=False, default="")  # "" when the alert has none
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, text
+from datetime import datetime
+from app.database.connection import Base
+
+class FirebaseOutbox(Base):
+    """
+    Pending Firebase writes, inserted in the same transaction as the rows
+    they mirror and drained by OutboxRelay (app/firebase/outbox.py).
+    """
+    __tablename__ = "firebase_outbox"
+    __table_args__ = (
+        Index(
+            "ix_firebase_outbox_pending",
+            "available_at", "id",
+            postgresql_where=text("processed_at IS NULL")
+        ),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String, nullable=False)  # e.g. alerts/<firebase key>
+    operation = Column(String, nullable=False)  # set, update, delete
+    payload = Column(Text)  # JSON document for set/update
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # retry backoff
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    processed_at = Column(DateTime, nullable=True)
@@ -0,0 +1,8 @@
+from app.realtime.broadcaster import (
+    AlertBroadcaster,
+    SubscriberFilter,
+    alert_broadcaster,
+    alert_event,
+)
+
+__all__ = ['AlertBroadcaster', 'SubscriberFilter', 'alert_broadcaster', 'alert_event']
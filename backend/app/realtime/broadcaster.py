@@ -0,0 +1,220 @@
+"""
+Fan-out of alert changes to WebSocket and SSE subscribers.
+
+Routes call publish() after they commit. The event is encoded to JSON
+once and handed to every subscriber whose filter matches, through a
+bounded per-subscriber queue. A subscriber that falls behind never
+blocks the fan-out: when its queue is full the backlog is discarded and
+replaced with a single "resync" message telling the client to refetch
+over REST and carry on with the stream.
+
+Subscribers only see events published by the same process; run one
+worker, or feed publish() from a shared source, when scaling out.
+"""
+import asyncio
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set
+
+from app.config import get_settings
+from app.geo import in_bbox
+
+settings = get_settings()
+
+# Fields sent for a new alert; updates only carry what changed
+ALERT_FIELDS = (
+    "id", "firebase_id", "alert_type", "severity", "title", "latitude",
+    "longitude", "location_name", "status", "is_active", "report_count", "created_at"
+)
+RESYNC_MESSAGE = json.dumps({"type": "resync"})
+
+
+@dataclass
+class BroadcastEvent:
+    payload: str  # encoded once, shared by all subscribers
+    alert_type: Optional[str]
+    severity: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+
+def _split_values(value: Optional[Any]) -> Optional[Set[str]]:
+    """'high,critical' or ['high', 'critical'] -> {'high', 'critical'}"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    values = {str(v).strip().lower() for v in value if str(v).strip()}
+    return values or None
+
+
+@dataclass
+class SubscriberFilter:
+    min_lat: Optional[float] = None
+    max_lat: Optional[float] = None
+    min_lng: Optional[float] = None
+    max_lng: Optional[float] = None
+    severities: Optional[Set[str]] = None
+    alert_types: Optional[Set[str]] = None
+
+    @classmethod
+    def from_params(cls, min_lat: Optional[float] = None, max_lat: Optional[float] = None,
+                    min_lng: Optional[float] = None, max_lng: Optional[float] = None,
+                    severity: Optional[Any] = None, alert_type: Optional[Any] = None) -> "SubscriberFilter":
+        """Build from query parameters or a WebSocket filter message"""
+        return cls(
+            min_lat=None if min_lat is None else float(min_lat),
+            max_lat=None if max_lat is None else float(max_lat),
+            min_lng=None if min_lng is None else float(min_lng),
+            max_lng=None if max_lng is None else float(max_lng),
+            severities=_split_values(severity),
+            alert_types=_split_values(alert_type)
+        )
+
+    @property
+    def has_bbox(self) -> bool:
+        return any(v is not None for v in (self.min_lat, self.max_lat, self.min_lng, self.max_lng))
+
+    def matches(self, event: BroadcastEvent) -> bool:
+        if self.severities is not None and (event.severity or "").lower() not in self.severities:
+            return False
+        if self.alert_types is not None and (event.alert_type or "").lower() not in self.alert_types:
+            return False
+        if self.has_bbox and not in_bbox(event.latitude, event.longitude, self.min_lat,
+                                         self.max_lat, self.min_lng, self.max_lng):
+            return False
+        return True
+
+
+@dataclass(eq=False)
+class Subscriber:
+    filter: SubscriberFilter
+    queue: asyncio.Queue
+    delivered: int = 0
+    resyncs: int = 0
+    connected_at: datetime = field(default_factory=datetime.utcnow)
+
+    def offer(self, message: str) -> bool:
+        """Queue a message without blocking; on overflow replace the backlog with a resync"""
+        try:
+            self.queue.put_nowait(message)
+            self.delivered += 1
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_MESSAGE)
+            self.resyncs += 1
+            return False
+
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def alert_event(event_type: str, alert, changes: Optional[Iterable[str]] = None) -> BroadcastEvent:
+    """
+    Delta event for an Alert row. Creates carry ALERT_FIELDS; updates
+    carry the changed fields; deletes carry only the ids.
+    """
+    if event_type == "created":
+        fields = ALERT_FIELDS
+    elif event_type == "deleted":
+        fields = ("id", "firebase_id")
+    else:
+        fields = ("id", "firebase_id") + tuple(c for c in (changes or ()) if c in ALERT_FIELDS)
+    data = {name: _json_value(getattr(alert, name, None)) for name in fields}
+    payload = json.dumps({
+        "type": f"alert.{event_type}",
+        "data": data,
+        "ts": datetime.utcnow().isoformat()
+    }, default=str)
+    return BroadcastEvent(
+        payload=payload,
+        alert_type=alert.alert_type,
+        severity=alert.severity,
+        latitude=alert.latitude,
+        longitude=alert.longitude
+    )
+
+
+class AlertBroadcaster:
+
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.resyncs = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Remember the event loop the subscriber queues belong to"""
+        self._loop = loop
+
+    def subscribe(self, subscriber_filter: SubscriberFilter) -> Optional[Subscriber]:
+        """New subscriber, or None when max_subscribers is reached"""
+        with self._lock:
+            if len(self.subscribers) >= self.max_subscribers:
+                return None
+            subscriber = Subscriber(subscriber_filter, asyncio.Queue(maxsize=self.queue_size))
+            self.subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, event: BroadcastEvent) -> None:
+        """Fan an event out; safe to call from request threads and the event loop"""
+        self.published += 1
+        if not self.subscribers or self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._fanout(event)
+        else:
+            self._loop.call_soon_threadsafe(self._fanout, event)
+
+    def publish_alert(self, event_type: str, alert, changes: Optional[Iterable[str]] = None) -> None:
+        """Build and publish an alert event; never raises into the caller"""
+        try:
+            self.publish(alert_event(event_type, alert, changes))
+        except Exception as e:
+            print(f"⚠️ Could not broadcast alert event: {e}")
+
+    def _fanout(self, event: BroadcastEvent) -> None:
+        with self._lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            if not subscriber.filter.matches(event):
+                continue
+            if subscriber.offer(event.payload):
+                self.delivered += 1
+            else:
+                self.resyncs += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            subscribers = list(self.subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "max_subscribers": self.max_subscribers,
+            "queued": sum(s.queue.qsize() for s in subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "resyncs": self.resyncs,
+        }
+
+
+alert_broadcaster = AlertBroadcaster(
+    queue_size=settings.realtime_queue_size,
+    max_subscribers=settings.realtime_max_subscribers
+)
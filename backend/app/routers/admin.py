@@ -1,16 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from collections import Counter
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, insert, or_, select
 from datetime import datetime, timedelta
-from pydantic import BaseModel
-from passlib.context import CryptContext
+from pydantic import BaseModel, ValidationError
+from app.config import get_settings
 from app.database.connection import get_db
 from app.models.user import User
 from app.models.alert import Alert
-from app.ml import ml_service, ML_AVAILABLE
+from app.models.alert_rollup import AlertDailyRollup
+from app.firebase.fanout import firebase_fanout
+from app.firebase.outbox import outbox_relay
+from app.ingest import alert_row, insert_alert_chunk
+from app.ml import area_feature_store, ml_service, ML_AVAILABLE
+from app.ml.ml_service import area_risk_point
+from app.schemas.alert import AlertImport
+from app.security import password_hasher
+from app.geo import CLUSTER_MAX_ZOOM, bbox_filters, cell_size_for_zoom, grid_cell_columns
+from app.utils.cache import TTLCache
+from app.utils.pagination import count_total, keyset_page
+from app.utils.streaming import is_csv_request, iter_csv_records, iter_json_records
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+settings = get_settings()
 
 # User schemas for request validation
 class UserCreate(BaseModel):
@@ -32,65 +46,49 @@ class UserUpdate(BaseModel):
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
+# Short-lived cache so many admins polling the dashboard share one scan
+overview_cache = TTLCache(ttl=settings.overview_cache_ttl, maxsize=4)
+
 @router.get("/overview")
 def get_overview_stats(db: Session = Depends(get_db)):
     """Get dashboard overview statistics"""
     try:
         today = datetime.utcnow().date()
-        
-        # Total alerts today
-        total_alerts_today = db.query(Alert).filter(
-            func.date(Alert.created_at) == today
-        ).count()
-        
-        # Crime alerts
-        crime_alerts = db.query(Alert).filter(
-            and_(
-                func.date(Alert.created_at) == today,
-                Alert.alert_type.ilike("%crime%")
-            )
-        ).count()
-        
-        # Fraud alerts
-        fraud_alerts = db.query(Alert).filter(
-            and_(
-                func.date(Alert.created_at) == today,
-                Alert.alert_type.ilike("%fraud%")
-            )
-        ).count()
-        
-        # Weather alerts
-        weather_alerts = db.query(Alert).filter(
-            and_(
-                func.date(Alert.created_at) == today,
-                or_(
-                    Alert.alert_type.ilike("%weather%"),
-                    Alert.alert_type.ilike("%flood%"),
-                    Alert.alert_type.ilike("%storm%")
-                )
-            )
-        ).count()
-        
-        # Active responders
-        active_responders = db.query(User).filter(
-            and_(
-                User.is_active == True,
-                or_(User.role == 'police', User.role == 'ngo')
-            )
-        ).count()
-        
-        return {
-            "totalAlertsToday": total_alerts_today,
-            "crimeAlerts": crime_alerts,
-            "fraudAlerts": fraud_alerts,
-            "weatherAlerts": weather_alerts,
-            "activeResponders": active_responders,
-            "avgResponseTime": 12.5
-        }
+        return overview_cache.get_or_set(today, lambda: _compute_overview_stats(db, today))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+def _compute_overview_stats(db: Session, today) -> dict:
+    """All overview counters in one pass over today's rollup rows"""
+    # Active responders
+    active_responders = select(func.count(User.id)).where(
+        User.is_active == True,
+        or_(User.role == 'police', User.role == 'ngo')
+    ).scalar_subquery()
+    
+    alert_type = AlertDailyRollup.alert_type
+    stats = db.query(
+        func.coalesce(func.sum(AlertDailyRollup.count), 0).label("total"),
+        func.coalesce(func.sum(AlertDailyRollup.count).filter(alert_type.ilike("%crime%")), 0).label("crime"),
+        func.coalesce(func.sum(AlertDailyRollup.count).filter(alert_type.ilike("%fraud%")), 0).label("fraud"),
+        func.coalesce(func.sum(AlertDailyRollup.count).filter(or_(
+            alert_type.ilike("%weather%"),
+            alert_type.ilike("%flood%"),
+            alert_type.ilike("%storm%")
+        )), 0).label("weather"),
+        active_responders.label("responders")
+    ).filter(AlertDailyRollup.day == today).one()
+    
+    return {
+        "totalAlertsToday": int(stats.total),
+        "crimeAlerts": int(stats.crime),
+        "fraudAlerts": int(stats.fraud),
+        "weatherAlerts": int(stats.weather),
+        "activeResponders": stats.responders,
+        "avgResponseTime": 12.5
+    }
+
 
 # ==================== ALERTS MANAGEMENT ====================
 @router.get("/alerts/all")
@@ -99,10 +97,18 @@ def get_all_alerts_admin(
     severity: str = None,
     status: str = None,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    total: str = Query("cached", pattern="^(exact|estimate|cached|none)$"),
     db: Session = Depends(get_db)
 ):
-    """Get all alerts with filters for admin dashboard"""
+    """
+    Get all alerts with filters for admin dashboard.
+    
+    Pages newest first by (created_at, id): pass `nextCursor` or
+    `prevCursor` back as `cursor`. `skip` still works for older clients.
+    `total` picks how the total is counted (see count_total).
+    """
     try:
         query = db.query(Alert)
         
@@ -117,10 +123,17 @@ def get_all_alerts_admin(
             query = query.filter(Alert.status == status)
         
         # Get total count
-        total = query.count()
+        filtered = bool(alert_type or severity or status)
+        total_count = count_total(
+            db, query, total, ("alerts", alert_type, severity, status), "alerts", filtered
+        )
         
         # Get paginated results
-        alerts = query.order_by(Alert.created_at.desc()).offset(skip).limit(limit).all()
+        next_cursor = prev_cursor = None
+        if skip and not cursor:
+            alerts = query.order_by(Alert.created_at.desc(), Alert.id.desc()).offset(skip).limit(limit).all()
+        else:
+            alerts, next_cursor, prev_cursor = keyset_page(query, Alert, cursor, limit)
         
         # Format response
         alert_list = []
@@ -140,11 +153,15 @@ def get_all_alerts_admin(
         
         return {
             "data": alert_list,
-            "total": total,
-            "page": skip // limit + 1,
-            "limit": limit
+            "total": total_count,
+            "page": None if cursor else skip // limit + 1,
+            "limit": limit,
+            "nextCursor": next_cursor,
+            "prevCursor": prev_cursor
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -154,22 +171,13 @@ def get_alerts_statistics(db: Session = Depends(get_db)):
     """Get alert statistics for charts"""
     try:
         # Alerts by type
-        alerts_by_type = db.query(
-            Alert.alert_type,
-            func.count(Alert.id).label('count')
-        ).group_by(Alert.alert_type).all()
+        alerts_by_type = _rollup_counts(db, AlertDailyRollup.alert_type)
         
         # Alerts by severity
-        alerts_by_severity = db.query(
-            Alert.severity,
-            func.count(Alert.id).label('count')
-        ).group_by(Alert.severity).all()
+        alerts_by_severity = _rollup_counts(db, AlertDailyRollup.severity)
         
         # Alerts by status
-        alerts_by_status = db.query(
-            Alert.status,
-            func.count(Alert.id).label('count')
-        ).group_by(Alert.status).all()
+        alerts_by_status = _rollup_counts(db, AlertDailyRollup.status)
         
         return {
             "byType": [{"name": t[0], "value": t[1]} for t in alerts_by_type],
@@ -180,6 +188,11 @@ def get_alerts_statistics(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+def _rollup_counts(db: Session, column, *filters) -> list:
+    """(value, count) pairs summed from the daily rollups, zero counts dropped"""
+    total = func.sum(AlertDailyRollup.count)
+    return db.query(column, total.label('count')).filter(*filters).group_by(column).having(total > 0).all()
+
 
 # ==================== USER MANAGEMENT ====================
 @router.get("/users")
@@ -187,10 +200,12 @@ def get_all_users(
     role: str = None,
     status: str = None,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    total: str = Query("cached", pattern="^(exact|estimate|cached|none)$"),
     db: Session = Depends(get_db)
 ):
-    """Get all users with filters"""
+    """Get all users with filters, newest first, paged by cursor like /alerts/all"""
     try:
         query = db.query(User)
         
@@ -200,8 +215,14 @@ def get_all_users(
             is_active = status.lower() == 'active'
             query = query.filter(User.is_active == is_active)
         
-        total = query.count()
-        users = query.offset(skip).limit(limit).all()
+        total_count = count_total(
+            db, query, total, ("users", role, status), "users", bool(role or status)
+        )
+        next_cursor = prev_cursor = None
+        if skip and not cursor:
+            users = query.order_by(User.created_at.desc(), User.id.desc()).offset(skip).limit(limit).all()
+        else:
+            users, next_cursor, prev_cursor = keyset_page(query, User, cursor, limit)
         
         user_list = []
         for user in users:
@@ -215,8 +236,15 @@ def get_all_users(
                 "createdAt": user.created_at.isoformat()
             })
         
-        return {"data": user_list, "total": total}
+        return {
+            "data": user_list,
+            "total": total_count,
+            "nextCursor": next_cursor,
+            "prevCursor": prev_cursor
+        }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -229,7 +257,7 @@ def create_user_admin(user: UserCreate, db: Session = Depends(get_db)):
         if existing:
             raise HTTPException(status_code=400, detail="Email already exists")
         
-        hashed_password = pwd_context.hash(user.password)
+        hashed_password = password_hasher.hash(user.password)
         db_user = User(
             username=user.username,
             email=user.email,
@@ -249,6 +277,231 @@ def create_user_admin(user: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
+class UserImportResult(BaseModel):
+    index: int
+    id: int | None = None
+    username: str | None = None
+    error: str | None = None
+
+class UserImportResponse(BaseModel):
+    total: int
+    created: int
+    failed: int
+    results: list[UserImportResult]
+
+def _existing_user_keys(db: Session, usernames: list[str], emails: list[str]) -> tuple[set, set]:
+    """Usernames and emails from the import that are already taken"""
+    taken_usernames, taken_emails = set(), set()
+    for i in range(0, max(len(usernames), len(emails)), 1000):
+        if usernames[i:i + 1000]:
+            taken_usernames.update(db.scalars(select(User.username).where(User.username.in_(usernames[i:i + 1000]))))
+        if emails[i:i + 1000]:
+            taken_emails.update(db.scalars(select(User.email).where(User.email.in_(emails[i:i + 1000]))))
+    return taken_usernames, taken_emails
+
+def _insert_users(db: Session, rows: list[dict]) -> list:
+    """One multi-row INSERT ... RETURNING per 1000 users, in one transaction"""
+    inserted = []
+    try:
+        for i in range(0, len(rows), 1000):
+            inserted.extend(db.execute(insert(User).returning(User.id, User.username), rows[i:i + 1000]).all())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return inserted
+
+@router.post("/users/import", response_model=UserImportResponse)
+async def import_users(request: Request, db: Session = Depends(get_db)):
+    """
+    Create many users in one request.
+    
+    Accepts a JSON array or an NDJSON stream of the `/admin/users`
+    payload. Passwords are hashed in parallel in the password process
+    pool and the users are inserted with bulk INSERT statements.
+    Records that are malformed or whose username/email is already taken
+    (in the database or earlier in the import) get a per-record `error`.
+    """
+    results: list[UserImportResult] = []
+    valid: list[tuple[int, UserCreate]] = []
+    try:
+        index = 0
+        async for record, parse_error in iter_json_records(request):
+            if index >= settings.user_import_max_records:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"At most {settings.user_import_max_records} users per import"
+                )
+            if parse_error:
+                results.append(UserImportResult(index=index, error=parse_error))
+            else:
+                try:
+                    valid.append((index, UserCreate.model_validate(record)))
+                except ValidationError as e:
+                    results.append(UserImportResult(index=index, error=_format_validation_error(e)))
+            index += 1
+        
+        taken_usernames, taken_emails = await run_in_threadpool(
+            _existing_user_keys, db,
+            [user.username for _, user in valid], [user.email for _, user in valid]
+        )
+        accepted: list[tuple[int, UserCreate]] = []
+        for index, user in valid:
+            if user.username in taken_usernames:
+                results.append(UserImportResult(index=index, username=user.username, error="Username already exists"))
+            elif user.email in taken_emails:
+                results.append(UserImportResult(index=index, username=user.username, error="Email already exists"))
+            else:
+                taken_usernames.add(user.username)
+                taken_emails.add(user.email)
+                accepted.append((index, user))
+        
+        hashes = await run_in_threadpool(password_hasher.hash_many, [user.password for _, user in accepted])
+        rows = [
+            {
+                "username": user.username,
+                "email": user.email,
+                "full_name": user.full_name,
+                "phone": user.phone,
+                "role": user.role,
+                "hashed_password": hashed_password
+            }
+            for (_, user), hashed_password in zip(accepted, hashes)
+        ]
+        inserted = await run_in_threadpool(_insert_users, db, rows) if rows else []
+        ids = {username: user_id for user_id, username in inserted}
+        for index, user in accepted:
+            results.append(UserImportResult(index=index, id=ids.get(user.username), username=user.username))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    
+    results.sort(key=lambda r: r.index)
+    failed = sum(1 for r in results if r.error is not None)
+    return UserImportResponse(total=len(results), created=len(results) - failed, failed=failed, results=results)
+
+
+class AlertBulkError(BaseModel):
+    index: int
+    error: str
+
+class AlertBulkResponse(BaseModel):
+    total: int
+    inserted: int
+    failed: int
+    chunks: int
+    seconds: float
+    rows_per_second: float
+    errors: list[AlertBulkError]
+    errors_truncated: bool = False
+    truncated: bool = False  # stopped at alert_bulk_max_rows; later records were not read
+
+@router.post("/alerts/bulk", response_model=AlertBulkResponse)
+async def bulk_import_alerts(
+    request: Request,
+    firebase: bool = False,
+    chunk_size: int | None = Query(None, ge=1, le=50000),
+    db: Session = Depends(get_db)
+):
+    """
+    Load historical alerts.
+    
+    Accepts a CSV stream with a header row (`Content-Type: text/csv`),
+    an NDJSON stream or a JSON array of AlertCreate records, optionally
+    with status, is_active, created_at and resolved_at. Rows are
+    validated as they stream in and written `chunk_size` at a time with
+    COPY (PostgreSQL) or one executemany INSERT, one commit per chunk,
+    while the next chunk is being parsed. A chunk the database rejects
+    fails only its own rows.
+    
+    Imported alerts are replicated to Firebase only with `firebase=true`;
+    they never trigger dedup or the live alert stream. At most
+    `alert_bulk_max_rows` records are read; past that the import stops
+    with `truncated` set, keeping the chunks already committed.
+    """
+    chunk_size = chunk_size or settings.alert_bulk_chunk_size
+    errors: list[AlertBulkError] = []
+    counts = {"total": 0, "inserted": 0, "failed": 0, "chunks": 0}
+    indexes: list[int] = []
+    rows: list[dict] = []
+    writing = None  # (indexes, task) of the chunk being committed
+    truncated = False
+    
+    def add_error(index: int, message: str):
+        counts["failed"] += 1
+        if len(errors) < settings.alert_bulk_max_errors:
+            errors.append(AlertBulkError(index=index, error=message))
+    
+    async def wait_for_write():
+        nonlocal writing
+        if writing is None:
+            return
+        chunk_indexes, task = writing
+        writing = None
+        try:
+            counts["inserted"] += await task
+            counts["chunks"] += 1
+        except Exception as e:
+            message = f"Chunk rejected: {getattr(e, 'orig', None) or e}"
+            for index in chunk_indexes:
+                add_error(index, message)
+    
+    async def flush():
+        nonlocal writing, indexes, rows
+        # One chunk in flight: the session is only used by one thread at a time
+        await wait_for_write()
+        if rows:
+            writing = (indexes, asyncio.create_task(run_in_threadpool(insert_alert_chunk, db, rows, firebase)))
+            indexes, rows = [], []
+    
+    started = time.perf_counter()
+    records = iter_csv_records(request) if is_csv_request(request) else iter_json_records(request)
+    try:
+        try:
+            now = datetime.utcnow()
+            async for record, parse_error in records:
+                index = counts["total"]
+                if index >= settings.alert_bulk_max_rows:
+                    truncated = True
+                    break
+                counts["total"] += 1
+                if parse_error:
+                    add_error(index, parse_error)
+                    continue
+                try:
+                    rows.append(alert_row(AlertImport.model_validate(record), now))
+                    indexes.append(index)
+                except ValidationError as e:
+                    add_error(index, _format_validation_error(e))
+                if len(rows) >= chunk_size:
+                    await flush()
+            await flush()
+        finally:
+            await wait_for_write()
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    
+    if firebase and counts["inserted"]:
+        firebase_fanout.submit(outbox_relay.drain_pending, description="outbox drain")
+    
+    seconds = time.perf_counter() - started
+    errors.sort(key=lambda e: e.index)
+    return AlertBulkResponse(
+        **counts,
+        seconds=round(seconds, 3),
+        rows_per_second=round(counts["inserted"] / seconds, 1) if seconds > 0 else 0.0,
+        errors=errors,
+        errors_truncated=counts["failed"] > len(errors),
+        truncated=truncated
+    )
+
 @router.put("/users/{user_id}")
 def update_user_admin(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
     """Update user"""
@@ -296,32 +549,27 @@ def get_ai_insights(db: Session = Depends(get_db)):
         seven_days_ago = datetime.utcnow() - timedelta(days=7)
         
         # Daily alert trends
-        daily_trends = db.query(
-            func.date(Alert.created_at).label('date'),
-            func.count(Alert.id).label('count')
-        ).filter(Alert.created_at >= seven_days_ago).group_by(
-            func.date(Alert.created_at)
-        ).all()
+        daily_trends = _rollup_counts(
+            db, AlertDailyRollup.day, AlertDailyRollup.day >= seven_days_ago.date()
+        )
         
         trends_data = [{"date": str(d[0]), "count": d[1]} for d in daily_trends]
         
         # Crime hotspots (top locations)
+        incidents = func.sum(AlertDailyRollup.count)
         hotspots = db.query(
-            Alert.location_name,
-            func.count(Alert.id).label('count')
+            AlertDailyRollup.location_name,
+            incidents.label('count')
         ).filter(
-            Alert.location_name.isnot(None)
-        ).group_by(Alert.location_name).order_by(
-            func.count(Alert.id).desc()
+            AlertDailyRollup.location_name != ""
+        ).group_by(AlertDailyRollup.location_name).having(incidents > 0).order_by(
+            incidents.desc()
         ).limit(5).all()
         
         hotspots_data = [{"location": h[0], "incidents": h[1]} for h in hotspots]
         
         # Severity distribution
-        severity_dist = db.query(
-            Alert.severity,
-            func.count(Alert.id).label('count')
-        ).group_by(Alert.severity).all()
+        severity_dist = _rollup_counts(db, AlertDailyRollup.severity)
         
         severity_data = [{"severity": s[0], "count": s[1]} for s in severity_dist]
         
@@ -341,17 +589,77 @@ def get_ai_insights(db: Session = Depends(get_db)):
 
 
 @router.get("/map/alerts")
-def get_map_alerts(db: Session = Depends(get_db)):
-    """Get alerts with coordinates for map visualization"""
+def get_map_alerts(
+    min_lat: float | None = Query(None, ge=-90, le=90),
+    max_lat: float | None = Query(None, ge=-90, le=90),
+    min_lng: float | None = Query(None, ge=-180, le=180),
+    max_lng: float | None = Query(None, ge=-180, le=180),
+    zoom: int | None = Query(None, ge=0, le=20),
+    limit: int = Query(2000, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    """
+    Get alerts with coordinates for map visualization.
+    
+    Only active alerts inside the optional bounding box are returned.
+    Below CLUSTER_MAX_ZOOM nearby alerts are grouped in SQL into count
+    bubbles on a zoom-sized grid; at higher zoom (or without a zoom)
+    individual alerts are returned, newest first. Either way at most
+    `limit` items are sent (the largest clusters first) and `truncated`
+    says whether more matched; for clusters `total` still counts every
+    matching alert.
+    """
     try:
-        alerts = db.query(Alert).filter(
-            Alert.is_active == True,
-            Alert.latitude.isnot(None),
-            Alert.longitude.isnot(None)
-        ).all()
+        conditions = [Alert.is_active == True] + bbox_filters(
+            Alert.latitude, Alert.longitude, min_lat, max_lat, min_lng, max_lng
+        )
+        
+        if zoom is not None and zoom < CLUSTER_MAX_ZOOM:
+            cell_size = cell_size_for_zoom(zoom)
+            cell_y, cell_x = grid_cell_columns(Alert.latitude, Alert.longitude, cell_size)
+            cells = db.query(
+                cell_y,
+                cell_x,
+                func.count(Alert.id).label("count"),
+                func.avg(Alert.latitude).label("latitude"),
+                func.avg(Alert.longitude).label("longitude"),
+                func.min(Alert.latitude).label("min_lat"),
+                func.max(Alert.latitude).label("max_lat"),
+                func.min(Alert.longitude).label("min_lng"),
+                func.max(Alert.longitude).label("max_lng")
+            ).filter(*conditions).group_by(cell_y, cell_x).order_by(
+                func.count(Alert.id).desc()
+            ).limit(limit + 1).all()
+            truncated = len(cells) > limit
+            cells = cells[:limit]
+            
+            clusters = [{
+                "id": f"{zoom}:{int(cell.cell_y)}:{int(cell.cell_x)}",
+                "count": cell.count,
+                "latitude": float(cell.latitude),
+                "longitude": float(cell.longitude),
+                "bounds": [cell.min_lat, cell.min_lng, cell.max_lat, cell.max_lng]
+            } for cell in cells]
+            
+            return {
+                "alerts": [],
+                "clusters": clusters,
+                "clustered": True,
+                "cellSize": cell_size,
+                "truncated": truncated,
+                "total": (
+                    db.query(func.count(Alert.id)).filter(*conditions).scalar() if truncated
+                    else sum(c["count"] for c in clusters)
+                )
+            }
+        
+        alerts = db.query(Alert).filter(*conditions).order_by(
+            Alert.created_at.desc()
+        ).limit(limit + 1).all()
+        truncated = len(alerts) > limit
         
         map_data = []
-        for alert in alerts:
+        for alert in alerts[:limit]:
             map_data.append({
                 "id": alert.id,
                 "type": alert.alert_type,
@@ -363,13 +671,46 @@ def get_map_alerts(db: Session = Depends(get_db)):
                 "timestamp": alert.created_at.isoformat()
             })
         
-        return {"alerts": map_data, "total": len(map_data)}
+        return {
+            "alerts": map_data,
+            "clusters": [],
+            "clustered": False,
+            "truncated": truncated,
+            "total": len(map_data)
+        }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
 # ==================== ML PREDICTIONS ====================
+@router.get("/models")
+def get_models():
+    """Model versions on disk, which one is active, and load time/memory of each loaded one"""
+    if not ML_AVAILABLE or ml_service is None:
+        raise HTTPException(status_code=503, detail="ML service not available")
+    return ml_service.registry.metrics()
+
+@router.post("/models/{model}/activate")
+def activate_model(model: str, version: str | None = None):
+    """
+    Pin `model` to `version` and hot-swap it in, or with no version go
+    back to serving the newest file. The pin is stored in the models
+    directory, so other workers switch on their next registry poll.
+    """
+    if not ML_AVAILABLE or ml_service is None:
+        raise HTTPException(status_code=503, detail="ML service not available")
+    try:
+        if version is None:
+            ml_service.registry.unpin(model)
+        else:
+            ml_service.registry.activate(model, version)
+        return {"model": model, "active_version": ml_service.registry.active_version(model)}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
 class RiskFactor(BaseModel):
     name: str
     weight: float
@@ -486,14 +827,138 @@ def predict_fraud(data: FraudPredictionRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+BATCH_REQUEST_MODELS: dict[str, type[BaseModel]] = {
+    "crime": CrimePredictionRequest,
+    "weather": WeatherPredictionRequest,
+    "fraud": FraudPredictionRequest,
+}
+
+class BatchPredictionResult(BaseModel):
+    index: int
+    result: PredictionResponse | None = None
+    error: str | None = None
+
+class BatchPredictionResponse(BaseModel):
+    model: str
+    total: int
+    succeeded: int
+    failed: int
+    results: list[BatchPredictionResult]
+    truncated: bool = False  # stopped at ml_batch_max_records; later records were not read
+
+@router.post("/predict/{model}/batch", response_model=BatchPredictionResponse)
+async def predict_batch(
+    model: str,
+    request: Request,
+    chunk_size: int = Query(1000, ge=1, le=10000)
+):
+    """
+    Score many records against one ML model in a single request.
+    
+    Accepts either a JSON array or an NDJSON stream
+    (`Content-Type: application/x-ndjson`) of the same payloads as the
+    single-record `/predict/{model}` endpoint. Valid records are scored
+    with one vectorized model call per `chunk_size` records. At most
+    `ml_batch_max_records` records are read; past that scoring stops
+    with `truncated` set.
+    
+    Returns:
+        BatchPredictionResponse with one result per input record, in
+        input order. Malformed records get a per-record `error` instead
+        of failing the whole batch.
+    """
+    request_model = BATCH_REQUEST_MODELS.get(model)
+    if request_model is None:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {model}")
+    if not ML_AVAILABLE or ml_service is None:
+        raise HTTPException(status_code=503, detail="ML service not available")
+    # The first access may load the model from disk, so keep it off the event loop
+    if await run_in_threadpool(getattr, ml_service, f"{model}_model") is None:
+        raise HTTPException(status_code=503, detail=f"{model.title()} model not loaded")
+    
+    results: list[BatchPredictionResult] = []
+    pending: list[tuple[int, dict]] = []
+    truncated = False
+    
+    async def flush():
+        if not pending:
+            return
+        predictions = await run_in_threadpool(
+            ml_service.predict_batch, model, [row for _, row in pending], None
+        )
+        for (index, _), prediction in zip(pending, predictions):
+            results.append(BatchPredictionResult(index=index, result=prediction))
+        pending.clear()
+    
+    try:
+        index = 0
+        async for record, parse_error in iter_json_records(request):
+            if index >= settings.ml_batch_max_records:
+                truncated = True
+                break
+            if parse_error:
+                results.append(BatchPredictionResult(index=index, error=parse_error))
+            else:
+                try:
+                    pending.append((index, request_model.model_validate(record).model_dump()))
+                except ValidationError as e:
+                    results.append(BatchPredictionResult(index=index, error=_format_validation_error(e)))
+            index += 1
+            if len(pending) >= chunk_size:
+                await flush()
+        await flush()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    
+    results.sort(key=lambda r: r.index)
+    failed = sum(1 for r in results if r.error is not None)
+    return BatchPredictionResponse(
+        model=model,
+        total=len(results),
+        succeeded=len(results) - failed,
+        failed=failed,
+        results=results,
+        truncated=truncated
+    )
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in e['loc']) or 'record'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+class HeatmapPoint(BaseModel):
+    latitude: float
+    longitude: float
+    risk_score: float
+    risk_level: str
+    color: str
+    area_name: str
+    alert_count: int = 1
+
 class HeatmapResponse(BaseModel):
-    heatmap: list[HeatmapLocation]
+    heatmap: list[HeatmapPoint]
     total_areas: int
     last_updated: datetime
     alert_density: dict[str, int]
+    mode: str = "points"
+    cell_size: float | None = None
+    truncated: bool = False
 
 @router.get("/map/heatmap", response_model=HeatmapResponse)
-def get_heatmap_data(db: Session = Depends(get_db)):
+def get_heatmap_data(
+    mode: str = Query("grid", pattern="^(grid|points)$"),
+    zoom: int = Query(10, ge=0, le=20),
+    min_lat: float | None = Query(None, ge=-90, le=90),
+    max_lat: float | None = Query(None, ge=-90, le=90),
+    min_lng: float | None = Query(None, ge=-180, le=180),
+    max_lng: float | None = Query(None, ge=-180, le=180),
+    chunk_size: int = Query(10000, ge=1, le=100000),
+    limit: int = Query(5000, ge=1, le=100000),
+    db: Session = Depends(get_db)
+):
     """
     Generate risk heatmap data for map visualization.
     
@@ -501,56 +966,116 @@ def get_heatmap_data(db: Session = Depends(get_db)):
     risk heatmap overlay for the map interface. Also provides alert
     density statistics by area.
     
+    In `grid` mode (default) alerts inside the optional bounding box are
+    binned in SQL into lat/lng cells sized for the requested `zoom`, and
+    the crime model is run once per cell with the cell's alert count as
+    `prior_incidents`. `points` mode emits one point per alert, with its
+    area's alert count from the daily rollups as `prior_incidents`.
+    Demographic features come from the area feature store in one bulk
+    lookup, and scoring is vectorized in chunks of `chunk_size` rows.
+    At most `limit` locations are scored (the busiest cells, or the
+    newest alerts) and `truncated` says whether more matched;
+    `alert_density` still counts every matching alert.
+    
     Returns:
         HeatmapResponse containing:
         - heatmap: List of locations with risk scores and metadata
         - total_areas: Number of areas analyzed
         - last_updated: Timestamp of the last data update
         - alert_density: Count of alerts by area/region
+        - mode / cell_size: Aggregation used and grid cell edge in degrees
+        - truncated: Whether locations beyond `limit` were left out
     """
     try:
-        # Get all active alerts with coordinates
-        alerts = db.query(Alert).filter(
-            Alert.latitude.isnot(None),
-            Alert.longitude.isnot(None)
-        ).all()
-        
-        # Prepare location data for ML predictions
-        locations = []
-        alert_counts: dict[str, int] = {}
-        
-        for alert in alerts:
-            area_name = alert.location_name or "Unknown"
-            alert_counts[area_name] = alert_counts.get(area_name, 0) + 1
-            
-            locations.append(HeatmapLocation(
-                lat=alert.latitude,
-                lng=alert.longitude,
-                area_name=area_name,
-                area_data={
-                    "population_density": 1500,  # Default values - you can fetch real data
-                    "unemployment_rate": 6.0,
-                    "income_level": 45000,
-                    "prior_incidents": alert_counts[area_name],
-                    "location_risk": 0.6,
-                    "economic_stress": 0.5,
-                    "is_night": 0,
-                    "is_weekend": 0
-                }
-            ))
-        
-        # Get risk scores from ML model
         if not ML_AVAILABLE or ml_service is None:
             raise HTTPException(status_code=503, detail="ML service not available")
-            
-        heatmap_data = ml_service.get_area_risk_scores(locations)
+        if ml_service.crime_model is None:
+            raise HTTPException(status_code=503, detail="Crime model not loaded")
+        
+        bounds = bbox_filters(Alert.latitude, Alert.longitude, min_lat, max_lat, min_lng, max_lng)
+        if mode == "grid":
+            cell_size = cell_size_for_zoom(zoom)
+            columns, alert_counts, truncated = _heatmap_grid_cells(db, bounds, cell_size, limit)
+            prior_incidents = columns["alert_count"]
+        else:
+            cell_size = None
+            columns, alert_counts, truncated = _heatmap_alert_points(db, bounds, limit)
+            prior_incidents = area_feature_store.incident_counts(db, columns["area_name"])
+        
+        # One feature lookup for every location, then one vectorized model call per chunk
+        features = area_feature_store.crime_features(
+            columns["area_name"], columns["lat"], columns["lng"], prior_incidents
+        )
+        risk_scores = ml_service.score_matrix("crime", features, chunk_size=chunk_size)
+        heatmap_data = [
+            {**area_risk_point(lat, lng, area_name, risk_score), "alert_count": count}
+            for lat, lng, area_name, risk_score, count in zip(
+                columns["lat"], columns["lng"], columns["area_name"], risk_scores.tolist(), columns["alert_count"]
+            )
+        ]
         
         return HeatmapResponse(
             heatmap=heatmap_data,
             total_areas=len(heatmap_data),
             last_updated=datetime.utcnow(),
-            alert_density=alert_counts
+            alert_density=alert_counts,
+            mode=mode,
+            cell_size=cell_size,
+            truncated=truncated
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+def _heatmap_grid_cells(db: Session, bounds: list, cell_size: float,
+                        limit: int) -> tuple[dict[str, list], dict[str, int], bool]:
+    """Aggregate alerts into grid cells in SQL; one heatmap location per cell (busiest `limit`), as columns"""
+    cell_y, cell_x = grid_cell_columns(Alert.latitude, Alert.longitude, cell_size)
+    cells = db.query(
+        cell_y,
+        cell_x,
+        func.count(Alert.id).label("count"),
+        func.avg(Alert.latitude).label("latitude"),
+        func.avg(Alert.longitude).label("longitude"),
+        func.max(Alert.location_name).label("area_name")
+    ).filter(*bounds).group_by(cell_y, cell_x).order_by(
+        func.count(Alert.id).desc()
+    ).limit(limit + 1).all()
+    truncated = len(cells) > limit
+    cells = cells[:limit]
+    
+    columns = {
+        "lat": [float(cell.latitude) for cell in cells],
+        "lng": [float(cell.longitude) for cell in cells],
+        "area_name": [cell.area_name or "Unknown" for cell in cells],
+        "alert_count": [cell.count for cell in cells],
+    }
+    return columns, _heatmap_area_counts(db, bounds), truncated
+
+def _heatmap_area_counts(db: Session, bounds: list) -> dict[str, int]:
+    """Alerts per location_name inside the bounds (a cell can span several areas)"""
+    areas = db.query(Alert.location_name, func.count(Alert.id)).filter(*bounds).group_by(Alert.location_name).all()
+    counts: dict[str, int] = {}
+    for location_name, count in areas:
+        area_name = location_name or "Unknown"
+        counts[area_name] = counts.get(area_name, 0) + count
+    return counts
+
+def _heatmap_alert_points(db: Session, bounds: list, limit: int) -> tuple[dict[str, list], dict[str, int], bool]:
+    """One heatmap location per alert (newest `limit`), as columns"""
+    alerts = db.query(Alert.latitude, Alert.longitude, Alert.location_name).filter(*bounds).order_by(
+        Alert.created_at.desc()
+    ).limit(limit + 1).all()
+    truncated = len(alerts) > limit
+    alerts = alerts[:limit]
+    
+    columns = {
+        "lat": [alert.latitude for alert in alerts],
+        "lng": [alert.longitude for alert in alerts],
+        "area_name": [alert.location_name or "Unknown" for alert in alerts],
+        "alert_count": [1] * len(alerts),
+    }
+    area_counts = _heatmap_area_counts(db, bounds) if truncated else dict(Counter(columns["area_name"]))
+    return columns, area_counts, truncated
@@ -1,15 +1,50 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.database.connection import get_db
+from app.database.connection import get_async_db
 from app.models.alert import Alert
-from app.firebase.realtime_alerts import FirebaseAlertService
+from app.analytics import record_alert_created_async
+from app.firebase.fanout import firebase_fanout
+from app.firebase.outbox import add_outbox_event, outbox_relay
+from app.firebase.realtime_alerts import STATUS_TIMESTAMP, generate_push_id, status_timestamp
+from app.ingest import alert_deduplicator
+from app.realtime import alert_broadcaster
+from app.storage import AttachmentTooLarge, store_uploads
+from app.config import get_settings
 from datetime import datetime
 import json
 
 router = APIRouter(prefix="/submit-alert", tags=["Alert Submission"])
-firebase_service = FirebaseAlertService()
+settings = get_settings()
 
+async def merge_duplicate_report(db: AsyncSession, alert_id: int, report: dict) -> Optional[Alert]:
+    """
+    Count another report against an active alert; None if it is no longer active.
+    The report's description is appended to the alert's, and the report
+    itself (description, files, timestamp) is added under the Firebase
+    node's reports/ so its attachments stay with the incident.
+    """
+    alert = (await db.execute(
+        select(Alert).where(Alert.id == alert_id, Alert.is_active == True).with_for_update()
+    )).scalar_one_or_none()
+    if alert is None:
+        return None
+    alert.report_count = (alert.report_count or 1) + 1
+    description = (report.get("description") or "").strip()
+    if description and description != (alert.description or "").strip():
+        alert.description = f"{alert.description}\n\n{description}" if alert.description else description
+    if alert.firebase_id:
+        add_outbox_event(db, f"alerts/{alert.firebase_id}", "update", {
+            "report_count": alert.report_count,
+            "description": alert.description,
+            f"reports/{generate_push_id()}": report
+        })
+    await db.commit()
+    return alert
+
+# The whole body is capped by BodySizeLimitMiddleware (see main.py) as it
+# streams in; store_uploads then enforces the per-file and per-request limits
 @router.post("/")
 async def submit_alert(
     category: str = Form(...),
@@ -26,11 +61,13 @@ async def submit_alert(
     files: Optional[List[UploadFile]] = File(None),
     file_captions: Optional[str] = Form(None),  # JSON string of captions
     is_verified: bool = Form(True),  # Default to True for backward compatibility
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Submit alert to both PostgreSQL (historical) and Firebase (real-time)
     This endpoint matches your frontend AlertSubmissionForm
+    The Firebase write is staged in the outbox in the same transaction,
+    so the alert reaches Firebase if and only if PostgreSQL commits
     """
     try:
         print("📝 Received alert submission with data:", {
@@ -62,22 +99,6 @@ async def submit_alert(
             "urgency_level": urgency_level
         }
         
-        # Save to PostgreSQL (historical data)
-        db_alert = Alert(
-            alert_type=alert_data["alert_type"],
-            severity=alert_data["severity"],
-            title=alert_data["title"],
-            description=alert_data["description"],
-            latitude=alert_data["latitude"],
-            longitude=alert_data["longitude"],
-            location_name=alert_data["location_name"],
-            status="active",
-            is_active=True
-        )
-        db.add(db_alert)
-        db.commit()
-        db.refresh(db_alert)
-        
         # Handle file captions if provided
         captions = []
         if file_captions:
@@ -86,33 +107,115 @@ async def submit_alert(
             except json.JSONDecodeError:
                 pass
 
-        # Process files if provided
+        # Stream attachments into the content-addressed store; identical
+        # files are kept once and thumbnails are built in the background
         file_info = []
-        if files:
-            for i, file in enumerate(files):
+        uploads = [file for file in files or [] if file.filename]
+        if uploads:
+            try:
+                stored = await store_uploads(uploads)
+            except AttachmentTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            for i, attachment in enumerate(stored):
                 caption = captions[i] if i < len(captions) else ""
                 file_info.append({
-                    "filename": file.filename,
+                    "filename": attachment.filename,
                     "caption": caption,
-                    # You can add file upload logic here
-                    # For example, save to cloud storage and store URL
+                    "sha256": attachment.sha256,
+                    "size": attachment.size,
+                    "content_type": attachment.content_type,
+                    "url": f"/attachments/{attachment.sha256}"
                 })
         
+        # Merge repeat reports of a recent nearby incident instead of
+        # creating another alert (0, 0 means the form sent no location)
+        if latitude or longitude:
+            await alert_deduplicator.ensure_warm_async(db)
+            duplicate_id = alert_deduplicator.find_duplicate(alert_data["alert_type"], latitude, longitude)
+            if duplicate_id is not None:
+                existing = await merge_duplicate_report(db, duplicate_id, {
+                    "description": description,
+                    "files": file_info,
+                    "incident_date": date,
+                    "incident_time": time,
+                    "urgency_level": urgency_level,
+                    "timestamp": datetime.utcnow().isoformat()
+                })
+                if existing is None:
+                    alert_deduplicator.remove(duplicate_id)
+                else:
+                    alert_deduplicator.merged += 1
+                    alert_broadcaster.publish_alert("updated", existing, ["report_count", "description"])
+                    if existing.firebase_id:
+                        firebase_fanout.submit(outbox_relay.drain_pending, description="outbox drain")
+                    return {
+                        "message": "Report merged into an existing alert",
+                        "postgresql_id": existing.id,
+                        "firebase_id": existing.firebase_id,
+                        "firebase_status": "queued" if existing.firebase_id else "skipped",
+                        "status": existing.status,
+                        "duplicate": True,
+                        "report_count": existing.report_count,
+                        "files": file_info,
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+        
         # Update alert data with file info and verification
         alert_data["files"] = file_info
         alert_data["is_verified"] = is_verified
         
-        # Save to Firebase (real-time)
-        firebase_alert_id = firebase_service.create_alert(alert_data)
+        # Save to PostgreSQL (historical data)
+        firebase_alert_id = generate_push_id()
+        created_at = datetime.utcnow()
+        timestamp = created_at.isoformat()
+        db_alert = Alert(
+            alert_type=alert_data["alert_type"],
+            severity=alert_data["severity"],
+            title=alert_data["title"],
+            description=alert_data["description"],
+            latitude=alert_data["latitude"],
+            longitude=alert_data["longitude"],
+            location_name=alert_data["location_name"],
+            status="active",
+            is_active=True,
+            firebase_id=firebase_alert_id,
+            created_at=created_at
+        )
+        db.add(db_alert)
+        await record_alert_created_async(db, db_alert)
+        await db.flush()
+
+        # Stage the Firebase (real-time) copy in the same transaction
+        add_outbox_event(db, f"alerts/{firebase_alert_id}", "set", {
+            **alert_data,
+            "id": firebase_alert_id,
+            "postgresql_id": db_alert.id,
+            "timestamp": timestamp,
+            "status": "active",
+            STATUS_TIMESTAMP: status_timestamp("active", timestamp)
+        })
+        await db.commit()
+        alert_deduplicator.add(db_alert)
+        alert_broadcaster.publish_alert("created", db_alert)
+        
+        # Nudge the relay so Firebase catches up without waiting for the
+        # next sweep; the outbox row is the durable record either way
+        firebase_fanout.submit(outbox_relay.drain_pending, description="outbox drain")
         
         return {
             "message": "Alert submitted successfully",
             "postgresql_id": db_alert.id,
             "firebase_id": firebase_alert_id,
+            "firebase_status": "queued",
             "status": "active",
-            "timestamp": datetime.utcnow().isoformat()
+            "duplicate": False,
+            "report_count": 1,
+            "files": file_info,
+            "timestamp": timestamp
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to submit alert: {str(e)}")
\ No newline at end of file
@@ -1,35 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.database.connection import get_db
+from typing import List, Optional
+from app.database.connection import get_db, get_async_db
 from app.models.alert import Alert
+from app.analytics import record_alert_created, record_alert_updated, record_alert_deleted, rollup_key
+from app.firebase.outbox import add_outbox_event
+from app.firebase.realtime_alerts import STATUS_TIMESTAMP, status_timestamp
+from app.config import get_settings
+from app.geo import location_index, parse_location_types
+from app.ingest import alert_deduplicator
+from app.realtime import alert_broadcaster
 from app.schemas.alert import AlertCreate, AlertResponse, AlertUpdate
+from app.schemas.location import NearbyLocationResponse
+from app.utils.pagination import keyset_cursors, keyset_filter, set_cursor_headers
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
+settings = get_settings()
 
 @router.get("/", response_model=List[AlertResponse])
-def get_all_alerts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    alerts = db.query(Alert).offset(skip).limit(limit).all()
+async def get_all_alerts(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List alerts newest first. Pass the X-Next-Cursor / X-Prev-Cursor
+    response headers back as `cursor` to page; `skip` is kept for
+    older clients and uses OFFSET.
+    """
+    if skip and not cursor:
+        result = await db.execute(
+            select(Alert).order_by(Alert.created_at.desc(), Alert.id.desc()).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
+    
+    try:
+        stmt, direction = keyset_filter(select(Alert), Alert, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = (await db.execute(stmt)).scalars().all()
+    alerts, next_cursor, prev_cursor = keyset_cursors(rows, direction, limit, bool(cursor))
+    set_cursor_headers(response, next_cursor, prev_cursor)
     return alerts
 
 @router.get("/active", response_model=List[AlertResponse])
-def get_active_alerts(db: Session = Depends(get_db)):
-    alerts = db.query(Alert).filter(Alert.is_active == True).all()
-    return alerts
+async def get_active_alerts(db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(Alert).filter(Alert.is_active == True))
+    return result.scalars().all()
 
 @router.get("/{alert_id}", response_model=AlertResponse)
-def get_alert(alert_id: int, db: Session = Depends(get_db)):
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+async def get_alert(alert_id: int, db: AsyncSession = Depends(get_async_db)):
+    alert = await db.get(Alert, alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     return alert
 
+@router.get("/{alert_id}/nearby", response_model=List[NearbyLocationResponse])
+def get_alert_nearby_locations(
+    alert_id: int,
+    location_type: Optional[str] = None,
+    radius_km: Optional[float] = Query(None, gt=0),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """
+    Locations (hospitals, shelters, police stations...) inside the alert's
+    radius, nearest first. radius_km overrides the alert's own radius.
+    """
+    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    
+    radius = radius_km or alert.radius or settings.geofence_default_radius_km
+    location_index.ensure_loaded(db)
+    nearby = location_index.within_radius(
+        alert.latitude, alert.longitude, radius, parse_location_types(location_type)
+    )
+    return nearby[:limit]
+
 @router.post("/", response_model=AlertResponse)
 def create_alert(alert: AlertCreate, db: Session = Depends(get_db)):
     db_alert = Alert(**alert.dict())
     db.add(db_alert)
+    record_alert_created(db, db_alert)
     db.commit()
     db.refresh(db_alert)
+    alert_deduplicator.add(db_alert)
+    alert_broadcaster.publish_alert("created", db_alert)
     return db_alert
 
 @router.put("/{alert_id}", response_model=AlertResponse)
@@ -38,11 +99,23 @@ def update_alert(alert_id: int, alert_update: AlertUpdate, db: Session = Depends
     if not db_alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    for key, value in alert_update.dict(exclude_unset=True).items():
+    previous_key = rollup_key(db_alert)
+    changes = alert_update.dict(exclude_unset=True)
+    for key, value in changes.items():
         setattr(db_alert, key, value)
+    record_alert_updated(db, db_alert, previous_key)
+    if db_alert.firebase_id and changes:
+        if "status" in changes and db_alert.created_at:
+            changes[STATUS_TIMESTAMP] = status_timestamp(db_alert.status, db_alert.created_at.isoformat())
+        add_outbox_event(db, f"alerts/{db_alert.firebase_id}", "update", changes)
     
     db.commit()
     db.refresh(db_alert)
+    if changes:
+        resolved = changes.get("status") == "resolved" or changes.get("is_active") is False
+        if resolved:
+            alert_deduplicator.remove(db_alert.id)
+        alert_broadcaster.publish_alert("resolved" if resolved else "updated", db_alert, changes)
     return db_alert
 
 @router.delete("/{alert_id}")
@@ -51,6 +124,11 @@ def delete_alert(alert_id: int, db: Session = Depends(get_db)):
     if not db_alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
+    record_alert_deleted(db, db_alert)
+    if db_alert.firebase_id:
+        add_outbox_event(db, f"alerts/{db_alert.firebase_id}", "delete")
     db.delete(db_alert)
     db.commit()
+    alert_deduplicator.remove(db_alert.id)
+    alert_broadcaster.publish_alert("deleted", db_alert)
     return {"message": "Alert deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from app.storage import attachment_store
+import json
+import os
+
+router = APIRouter(prefix="/attachments", tags=["Attachments"])
+
+# Types served inline; anything else is sent as an opaque download so an
+# uploaded HTML or SVG file can't run script on the API origin
+INLINE_CONTENT_TYPES = {
+    "image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp", "image/heic", "image/heif",
+}
+DOWNLOAD_CONTENT_TYPES = INLINE_CONTENT_TYPES | {"application/pdf"}
+
+def _content_type(path: str) -> str:
+    """Allowlisted content type from the metadata sidecar, if processing has finished"""
+    try:
+        with open(path + ".json") as f:
+            content_type = (json.load(f).get("content_type") or "").split(";")[0].strip().lower()
+    except (OSError, ValueError, AttributeError):
+        return "application/octet-stream"
+    return content_type if content_type in DOWNLOAD_CONTENT_TYPES else "application/octet-stream"
+
+@router.get("/{sha256}")
+def get_attachment(sha256: str):
+    """Stored attachment by content hash; cacheable forever once its type is known"""
+    path = attachment_store.path_for(sha256)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    media_type = _content_type(path)
+    headers = {"X-Content-Type-Options": "nosniff"}
+    if media_type in DOWNLOAD_CONTENT_TYPES:
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        # The metadata sidecar may not be written yet; don't pin the fallback type
+        headers["Cache-Control"] = "no-cache"
+    if media_type not in INLINE_CONTENT_TYPES:
+        headers["Content-Disposition"] = f'attachment; filename="{sha256}"'
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+@router.get("/{sha256}/thumbnail")
+def get_attachment_thumbnail(sha256: str):
+    """JPEG thumbnail of an image attachment, once the worker pool has built it"""
+    path = attachment_store.path_for(sha256)
+    if path is None or not os.path.exists(path + ".thumb.jpg"):
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return FileResponse(
+        path + ".thumb.jpg",
+        media_type="image/jpeg",
+        headers={"Cache-Control": "public, max-age=31536000, immutable", "X-Content-Type-Options": "nosniff"}
+    )
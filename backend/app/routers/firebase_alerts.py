@@ -1,9 +1,12 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any, List, Optional
+from app.config import get_settings
+from app.firebase.mirror import alert_mirror
 from app.firebase.realtime_alerts import FirebaseAlertService
-from datetime import datetime
+from datetime import datetime, timezone
 
 router = APIRouter(prefix="/firebase/alerts", tags=["Firebase Alerts"])
+settings = get_settings()
 
 # Initialize Firebase service lazily
 firebase_service = None
@@ -11,28 +14,56 @@ firebase_service = None
 def get_firebase_service():
     global firebase_service
     if firebase_service is None:
-        firebase_service = FirebaseAlertService()
+        firebase_service = FirebaseAlertService(mirror=alert_mirror if settings.firebase_mirror else None)
     return firebase_service
 
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    """Match the naive UTC isoformat() timestamps stored on alerts"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+def _query_alerts(status: Optional[str], since: Optional[datetime], until: Optional[datetime],
+                  cursor: Optional[str], limit: int) -> Dict[str, Any]:
+    service = get_firebase_service()
+    alerts, next_cursor = service.query_alerts(
+        status=status,
+        since=_timestamp(since),
+        until=_timestamp(until),
+        before=cursor,
+        limit=limit
+    )
+    return {"alerts": alerts, "nextCursor": next_cursor}
+
 @router.get("/")
-def get_all_firebase_alerts():
-    """Get all alerts from Firebase"""
+def get_all_firebase_alerts(
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Newest alerts from Firebase, filtered server-side by status and
+    timestamp window. Pass nextCursor back as `cursor` for older pages.
+    """
     try:
-        service = get_firebase_service()
-        alerts = service.get_all_alerts()
-        if not alerts:
-            return {"alerts": []}
-        return {"alerts": alerts}
+        return _query_alerts(status, since, until, cursor, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/active")
-def get_active_firebase_alerts():
+def get_active_firebase_alerts(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
     """Get only active alerts from Firebase"""
     try:
-        service = get_firebase_service()
-        alerts = service.get_active_alerts()
-        return {"alerts": alerts}
+        return _query_alerts("active", since, until, cursor, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
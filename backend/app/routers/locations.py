@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database.connection import get_db
+from app.geo import location_index, parse_location_types
 from app.models.location import Location
-from app.schemas.location import LocationCreate, LocationResponse
+from app.schemas.location import LocationCreate, LocationResponse, NearbyLocationResponse
 
 router = APIRouter(prefix="/locations", tags=["Locations"])
 
@@ -12,6 +13,20 @@ def get_all_locations(db: Session = Depends(get_db)):
     locations = db.query(Location).all()
     return locations
 
+# Declared before /{location_id} so "near" is not parsed as an id
+@router.get("/near", response_model=List[NearbyLocationResponse])
+def get_nearest_locations(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=500),
+    max_km: Optional[float] = Query(None, gt=0),
+    location_type: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """k nearest locations to a point, nearest first; location_type is comma-separated"""
+    location_index.ensure_loaded(db)
+    return location_index.nearest(lat, lng, k, max_km, parse_location_types(location_type))
+
 @router.get("/{location_id}", response_model=LocationResponse)
 def get_location(location_id: int, db: Session = Depends(get_db)):
     location = db.query(Location).filter(Location.id == location_id).first()
@@ -25,4 +40,5 @@ def create_location(location: LocationCreate, db: Session = Depends(get_db)):
     db.add(db_location)
     db.commit()
     db.refresh(db_location)
+    location_index.add(db_location)
     return db_location
\ No newline at end of file
@@ -1,17 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
-from passlib.context import CryptContext
+from typing import List, Optional
 from app.database.connection import get_db
 from app.models.user import User
+from app.security import password_hasher
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
+from app.utils.pagination import keyset_page, set_cursor_headers
 
 router = APIRouter(prefix="/users", tags=["Users"])
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 @router.get("/", response_model=List[UserResponse])
-def get_all_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(User).offset(skip).limit(limit).all()
+def get_all_users(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    List users newest first. Pass the X-Next-Cursor / X-Prev-Cursor
+    response headers back as `cursor` to page; `skip` is kept for
+    older clients and uses OFFSET.
+    """
+    query = db.query(User)
+    if skip and not cursor:
+        return query.order_by(User.created_at.desc(), User.id.desc()).offset(skip).limit(limit).all()
+    
+    try:
+        users, next_cursor, prev_cursor = keyset_page(query, User, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_cursor_headers(response, next_cursor, prev_cursor)
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -33,7 +52,7 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = password_hasher.hash(user.password)
     user_data = user.dict()
     user_data.pop("password")
     user_data["hashed_password"] = hashed_password
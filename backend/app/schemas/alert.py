@@ -15,6 +15,13 @@ class AlertBase(BaseModel):
 class AlertCreate(AlertBase):
     created_by: Optional[int] = None
 
+class AlertImport(AlertCreate):
+    """A row of /admin/alerts/bulk; historical alerts keep their own status and times"""
+    status: str = "active"
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
+
 class AlertUpdate(BaseModel):
     status: Optional[str] = None
     is_active: Optional[bool] = None
@@ -25,6 +32,7 @@ class AlertResponse(AlertBase):
     is_active: bool
     created_at: datetime
     resolved_at: Optional[datetime] = None
+    report_count: Optional[int] = 1
     
     class Config:
         from_attributes = True
\ No newline at end of file
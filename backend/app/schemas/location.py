@@ -17,4 +17,7 @@ class LocationResponse(LocationBase):
     id: int
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class NearbyLocationResponse(LocationResponse):
+    distance_km: float
@@ -0,0 +1,3 @@
+from app.security.passwords import PasswordHasher, password_hasher
+
+__all__ = ['PasswordHasher', 'password_hasher']
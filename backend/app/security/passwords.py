@@ -0,0 +1,200 @@
+"""
+bcrypt hashing in a dedicated process pool.
+
+bcrypt is deliberately slow (~100-250 ms of CPU per hash at the default
+cost), so hashing inline in request threads starves every other
+endpoint during bulk onboarding. Hashes run in
+password_hash_workers processes instead; at most
+password_hash_max_pending hashes are queued before callers wait, which
+keeps a bulk import from building an unbounded backlog. Batches are
+split into tasks of at most HASH_BATCH_SIZE hashes so that bound holds
+for them too. A pool whose worker died is replaced and the task retried
+once, whether the failure shows up on submit or on the result.
+Set password_hash_workers=0 to hash inline (tests, tiny deployments).
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from passlib.context import CryptContext
+
+from app.config import get_settings
+
+settings = get_settings()
+
+HASH_BATCH_SIZE = 16  # most hashes per pool task in hash_many
+
+_contexts: Dict[int, CryptContext] = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    """One CryptContext per cost factor, per process"""
+    context = _contexts.get(rounds)
+    if context is None:
+        context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        _contexts[rounds] = context
+    return context
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _hash_batch(passwords: List[str], rounds: int) -> List[str]:
+    context = _context(rounds)
+    return [context.hash(password) for password in passwords]
+
+
+def _verify(password: str, hashed: str, rounds: int) -> bool:
+    return _context(rounds).verify(password, hashed)
+
+
+class PasswordHasher:
+
+    def __init__(self, workers: int, rounds: int, max_pending: int):
+        self.workers = workers
+        self.rounds = rounds
+        self.max_pending = max(1, max_pending)
+        self._pending = 0  # hashes submitted and not finished
+        self._slots = threading.Condition()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.hashed = 0
+        self.pool_restarts = 0
+
+    def _pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs the event loop, DB pool
+                # and Firebase threads is not safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _acquire(self, cost: int) -> None:
+        """Wait until cost more hashes fit under max_pending (all at once, so callers can't deadlock)"""
+        with self._slots:
+            while self._pending and self._pending + cost > self.max_pending:
+                self._slots.wait()
+            self._pending += cost
+
+    def _release(self, cost: int) -> None:
+        with self._slots:
+            self._pending -= cost
+            self._slots.notify_all()
+
+    def _submit(self, fn, *args, cost: int = 1) -> Future:
+        """Run fn in the pool, waiting for free slots when the queue is full"""
+        pool = self._pool()
+        if pool is None:
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._acquire(cost)
+        try:
+            try:
+                future = pool.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died (OOM kill etc.); start a fresh pool once
+                self._reset(pool)
+                pool = self._pool()
+                future = pool.submit(fn, *args)
+        except BaseException:
+            self._release(cost)
+            raise
+        future.pool = pool
+        future.add_done_callback(lambda _: self._release(cost))
+        return future
+
+    def _reset(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self.pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, fn, *args, cost: int = 1):
+        """Submit and wait; a worker killed mid-task gets one retry on a fresh pool"""
+        future = self._submit(fn, *args, cost=cost)
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self._reset(future.pool)
+            return self._submit(fn, *args, cost=cost).result()
+
+    async def _run_async(self, fn, *args):
+        future = self._submit(fn, *args)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self._reset(future.pool)
+            return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def hash(self, password: str) -> str:
+        """Hash from a sync route; the calling thread waits without holding the GIL"""
+        result = self._run(_hash, password, self.rounds)
+        self.hashed += 1
+        return result
+
+    async def hash_async(self, password: str) -> str:
+        result = await self._run_async(_hash, password, self.rounds)
+        self.hashed += 1
+        return result
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._run(_verify, password, hashed, self.rounds)
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        return await self._run_async(_verify, password, hashed, self.rounds)
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """Hash a batch across all workers, in order"""
+        if not passwords:
+            return []
+        workers = max(1, self.workers)
+        # A few tasks per worker balances load without per-hash IPC; the
+        # cap keeps each task's share of max_pending small
+        batch_size = max(1, min(HASH_BATCH_SIZE, self.max_pending, len(passwords) // (workers * 4)))
+        batches = [passwords[i:i + batch_size] for i in range(0, len(passwords), batch_size)]
+        futures = [self._submit(_hash_batch, batch, self.rounds, cost=len(batch)) for batch in batches]
+        hashes = []
+        for batch, future in zip(batches, futures):
+            try:
+                hashes.extend(future.result())
+            except BrokenProcessPool:
+                self._reset(future.pool)
+                hashes.extend(self._run(_hash_batch, batch, self.rounds, cost=len(batch)))
+        self.hashed += len(hashes)
+        return hashes
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "hashed": self.hashed,
+            "pending": self._pending,
+            "pool_restarts": self.pool_restarts,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    rounds=settings.password_bcrypt_rounds,
+    max_pending=settings.password_hash_max_pending
+)
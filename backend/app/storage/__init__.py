@@ -0,0 +1,14 @@
+from app.storage.attachments import (
+    AttachmentStore,
+    AttachmentTooLarge,
+    LocalAttachmentStore,
+    StoredAttachment,
+    attachment_processor,
+    attachment_store,
+    store_uploads,
+)
+
+__all__ = [
+    'AttachmentStore', 'AttachmentTooLarge', 'LocalAttachmentStore', 'StoredAttachment',
+    'attachment_processor', 'attachment_store', 'store_uploads'
+]
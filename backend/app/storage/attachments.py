@@ -0,0 +1,238 @@
+"""
+Content-addressed storage for alert attachments.
+
+Uploads are streamed in attachment_chunk_size pieces into a temporary
+file while a SHA-256 is computed, so memory per upload is one chunk no
+matter the file size. The per-file and per-request limits are checked
+as each file is copied out of the parsed form; the body as a whole is
+capped earlier, while it streams in, by BodySizeLimitMiddleware. The finished file is moved to <root>/ab/cd/<sha256>;
+if that object already exists the new copy is discarded, so identical
+files are stored once. Thumbnails (when Pillow is installed) and a
+metadata sidecar are produced afterwards in a worker pool.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import get_settings
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are skipped without Pillow
+    Image = None
+
+settings = get_settings()
+
+
+class AttachmentTooLarge(Exception):
+    """An upload exceeded the per-file or per-request size limit"""
+
+
+@dataclass
+class StoredAttachment:
+    sha256: str
+    size: int
+    filename: Optional[str]
+    content_type: Optional[str]
+    duplicate: bool  # the object was already stored
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class AttachmentStore(ABC):
+    """Interface for attachment backends; objects are addressed by SHA-256"""
+
+    @abstractmethod
+    def temp_file(self):
+        """Writable binary file for an upload in progress; must have .name"""
+
+    @abstractmethod
+    def commit(self, temp_path: str, sha256: str) -> bool:
+        """Move a finished upload into place; False if the object already existed"""
+
+    @abstractmethod
+    def discard(self, temp_path: str) -> None:
+        """Drop an unfinished upload"""
+
+    @abstractmethod
+    def path_for(self, sha256: str) -> Optional[str]:
+        """Local filesystem path of an object, or None if it is not stored"""
+
+    @abstractmethod
+    def write_sidecar(self, sha256: str, suffix: str, data: bytes) -> None:
+        """Store derived data (metadata, thumbnail) next to an object"""
+
+
+class LocalAttachmentStore(AttachmentStore):
+    """Objects under root/ab/cd/<sha256>, with sidecars next to them"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._tmp_dir = os.path.join(self.root, "tmp")
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def temp_file(self):
+        # Created on first write rather than at import
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self._tmp_dir, delete=False)
+
+    def commit(self, temp_path: str, sha256: str) -> bool:
+        path = self._object_path(sha256)
+        if os.path.exists(path):
+            os.unlink(temp_path)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return True
+
+    def discard(self, temp_path: str) -> None:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+
+    def path_for(self, sha256: str) -> Optional[str]:
+        if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+            return None
+        path = self._object_path(sha256)
+        return path if os.path.exists(path) else None
+
+    def write_sidecar(self, sha256: str, suffix: str, data: bytes) -> None:
+        path = self._object_path(sha256) + suffix
+        with open(path + ".part", "wb") as f:
+            f.write(data)
+        os.replace(path + ".part", path)
+
+
+class UploadBudget:
+    """Bytes still allowed for the current request"""
+
+    def __init__(self, max_request_bytes: int, max_file_bytes: int):
+        self.remaining = max_request_bytes
+        self.max_file_bytes = max_file_bytes
+
+
+async def store_upload(upload: UploadFile, store: AttachmentStore, budget: UploadBudget,
+                       chunk_size: Optional[int] = None) -> StoredAttachment:
+    """Stream one upload into the store, hashing as it goes"""
+    chunk_size = chunk_size or settings.attachment_chunk_size
+    digest = hashlib.sha256()
+    size = 0
+    temp = store.temp_file()
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > budget.max_file_bytes:
+                raise AttachmentTooLarge(
+                    f"{upload.filename} is larger than {budget.max_file_bytes} bytes"
+                )
+            if size > budget.remaining:
+                raise AttachmentTooLarge("Attachments exceed the per-request size limit")
+            digest.update(chunk)
+            await run_in_threadpool(temp.write, chunk)
+        temp.close()
+        budget.remaining -= size
+        sha256 = digest.hexdigest()
+        created = await run_in_threadpool(store.commit, temp.name, sha256)
+    except BaseException:
+        temp.close()
+        store.discard(temp.name)
+        raise
+    return StoredAttachment(
+        sha256=sha256,
+        size=size,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        duplicate=not created
+    )
+
+
+class AttachmentProcessor:
+    """Builds thumbnails and metadata sidecars off the request path"""
+
+    def __init__(self, store: AttachmentStore, workers: int, thumbnail_size: int):
+        self.store = store
+        self.thumbnail_size = thumbnail_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="attachments")
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+
+    def submit(self, attachment: StoredAttachment):
+        """Schedule processing of a newly stored object (duplicates were processed already)"""
+        if attachment.duplicate:
+            return None
+        return self._executor.submit(self._process, attachment)
+
+    def _process(self, attachment: StoredAttachment) -> None:
+        try:
+            path = self.store.path_for(attachment.sha256)
+            if path is None:
+                return
+            metadata: Dict[str, Any] = {
+                "sha256": attachment.sha256,
+                "size": attachment.size,
+                "content_type": attachment.content_type,
+            }
+            if Image is not None and (attachment.content_type or "").startswith("image/"):
+                metadata.update(self._thumbnail(path, attachment.sha256))
+            self.store.write_sidecar(attachment.sha256, ".json", json.dumps(metadata).encode())
+            with self._lock:
+                self.processed += 1
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            print(f"⚠️ Attachment processing failed for {attachment.sha256}: {e}")
+
+    def _thumbnail(self, path: str, sha256: str) -> Dict[str, Any]:
+        import io
+
+        with Image.open(path) as image:
+            width, height = image.size
+            image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, "JPEG", quality=80)
+        self.store.write_sidecar(sha256, ".thumb.jpg", buffer.getvalue())
+        return {"width": width, "height": height, "thumbnail": True}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"processed": self.processed, "failed": self.failed}
+
+
+async def store_uploads(files: List[UploadFile]) -> List[StoredAttachment]:
+    """Store every upload of a request within the request's size budget"""
+    if len(files) > settings.attachment_max_files:
+        raise AttachmentTooLarge(f"At most {settings.attachment_max_files} attachments per request")
+    budget = UploadBudget(settings.attachment_max_request_bytes, settings.attachment_max_bytes)
+    stored = []
+    for upload in files:
+        attachment = await store_upload(upload, attachment_store, budget)
+        attachment_processor.submit(attachment)
+        stored.append(attachment)
+    return stored
+
+
+attachment_store: AttachmentStore = LocalAttachmentStore(settings.attachments_dir)
+attachment_processor = AttachmentProcessor(
+    attachment_store,
+    workers=settings.attachment_workers,
+    thumbnail_size=settings.attachment_thumbnail_size
+)
@@ -0,0 +1,73 @@
+"""
+Request body size limits enforced while the body streams in.
+
+A dependency or handler only runs after Starlette has read (and, for
+multipart forms, spooled) the whole body, which is too late to protect
+the server. BodySizeLimitMiddleware sits in front of the app instead:
+it answers 413 straight away when Content-Length is over the limit for
+the path, and otherwise counts the bytes handed to the app and aborts
+with 413 as soon as they pass it, so a chunked or mislabelled upload is
+cut off after at most one extra chunk.
+"""
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+
+class BodySizeLimitMiddleware:
+    """ASGI middleware capping request bodies per path prefix"""
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        # Longest prefix wins
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def _limit_for(self, path: str) -> Optional[int]:
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope, receive, send):
+        limit = self._limit_for(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers") or []:
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                await self._reject(scope, receive, send)
+                return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as e:
+            # Raised from limited_receive outside FastAPI's body parsing,
+            # e.g. by a handler streaming request.stream() itself
+            if e.status_code != 413 or response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse({"detail": "Request body too large"}, status_code=413,
+                                headers={"Connection": "close"})
+        await response(scope, receive, send)
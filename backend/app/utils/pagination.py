@@ -0,0 +1,121 @@
+"""
+Keyset (cursor) pagination on (created_at, id), newest first.
+
+Cursors are opaque base64 tokens holding the boundary row's key and the
+paging direction, so each page is an index range scan rather than an
+OFFSET that re-reads every earlier row.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Hashable, List, Optional, Tuple
+
+from fastapi import Response
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Query, Session
+
+from app.config import get_settings
+from app.utils.cache import TTLCache
+
+TOTAL_MODES = ("exact", "estimate", "cached", "none")
+
+settings = get_settings()
+total_cache = TTLCache(ttl=settings.pagination_total_cache_ttl, maxsize=256)
+
+
+def encode_cursor(created_at: datetime, row_id: int, direction: str) -> str:
+    payload = json.dumps({"t": created_at.isoformat(), "i": row_id, "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, str]:
+    """Returns (created_at, id, direction); raises ValueError for bad cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload["t"]), int(payload["i"]), direction
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def keyset_filter(query, model, cursor: Optional[str], limit: int) -> Tuple[Any, str]:
+    """
+    Apply the cursor bound, ordering and limit to a Query or Select.
+    Returns (query, direction); fetch it and pass the rows to keyset_cursors.
+    """
+    key = tuple_(model.created_at, model.id)
+    direction = "next"
+    if cursor:
+        created_at, row_id, direction = decode_cursor(cursor)
+        if direction == "next":
+            query = query.filter(key < tuple_(created_at, row_id))
+        else:
+            query = query.filter(key > tuple_(created_at, row_id))
+
+    if direction == "next":
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+    return query.limit(limit + 1), direction
+
+
+def keyset_cursors(rows: List[Any], direction: str, limit: int, had_cursor: bool) -> Tuple[List[Any], Optional[str], Optional[str]]:
+    """Trim the over-fetched rows and build the next/prev cursors"""
+    has_more = len(rows) > limit
+    rows = list(rows[:limit])
+    if direction == "prev":
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    first, last = rows[0], rows[-1]
+    more_after = has_more if direction == "next" else True
+    more_before = had_cursor if direction == "next" else has_more
+    next_cursor = encode_cursor(last.created_at, last.id, "next") if more_after else None
+    prev_cursor = encode_cursor(first.created_at, first.id, "prev") if more_before else None
+    return rows, next_cursor, prev_cursor
+
+
+def keyset_page(query: Query, model, cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str], Optional[str]]:
+    """
+    Fetch one page of query ordered by (created_at, id) descending.
+    Returns (rows, next_cursor, prev_cursor); a cursor is None when there
+    is nothing further in that direction.
+    """
+    query, direction = keyset_filter(query, model, cursor, limit)
+    return keyset_cursors(query.all(), direction, limit, bool(cursor))
+
+
+def set_cursor_headers(response: Response, next_cursor: Optional[str], prev_cursor: Optional[str]) -> None:
+    """Expose cursors on list endpoints whose body is a bare JSON array"""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if prev_cursor:
+        response.headers["X-Prev-Cursor"] = prev_cursor
+
+
+def count_total(db: Session, query: Query, mode: str, cache_key: Hashable, table_name: str, filtered: bool) -> Optional[int]:
+    """
+    Total row count for a listing according to mode:
+    exact    - COUNT(*) on every call
+    estimate - planner estimate from pg_class.reltuples for unfiltered
+               PostgreSQL listings, otherwise the cached count
+    cached   - COUNT(*) reused for PAGINATION_TOTAL_CACHE_TTL seconds
+    none     - skip counting
+    """
+    if mode == "none":
+        return None
+    if mode == "exact":
+        return query.order_by(None).count()
+    if mode == "estimate" and not filtered and db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+            {"table": table_name}
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return total_cache.get_or_set(cache_key, lambda: query.order_by(None).count())
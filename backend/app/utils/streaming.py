@@ -0,0 +1,137 @@
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import Request
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+MAX_LINE_BYTES = 1024 * 1024  # longer lines (or CSV rows) are dropped with an error
+
+
+def is_ndjson_request(request: Request) -> bool:
+    """True when the request body is declared as newline-delimited JSON"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    return content_type in NDJSON_CONTENT_TYPES
+
+
+def _decode_line(line: bytes) -> Tuple[Optional[str], Optional[str]]:
+    try:
+        return line.decode("utf-8").rstrip("\r"), None
+    except UnicodeDecodeError as e:
+        return None, f"Invalid UTF-8: {e}"
+
+
+async def iter_body_lines(request: Request,
+                          max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[Optional[str], Optional[str]]]:
+    """
+    Yield (line, error) pairs from the request body as it streams in; a
+    line that isn't valid UTF-8 or is longer than max_line_bytes is an
+    error for that line only, and the rest of a long line is skipped
+    without being buffered
+    """
+    too_long = f"Line longer than {max_line_bytes} bytes"
+    buffer = b""
+    skipping = False  # inside a line already reported as too long
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+            elif len(line) > max_line_bytes:
+                yield None, too_long
+            else:
+                yield _decode_line(line)
+        if len(buffer) > max_line_bytes:
+            if not skipping:
+                yield None, too_long
+                skipping = True
+            buffer = b""
+    if buffer and not skipping:
+        yield _decode_line(buffer)
+
+
+async def iter_json_records(request: Request) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+    """
+    Yield (record, error) pairs from a JSON array or an NDJSON body.
+    NDJSON lines are parsed one at a time, so a malformed line produces
+    an error entry for that line only. Blank NDJSON lines are skipped.
+    """
+    if is_ndjson_request(request):
+        async for line, decode_error in iter_body_lines(request):
+            if decode_error:
+                yield None, decode_error
+                continue
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield None, f"Invalid JSON: {e}"
+        return
+
+    try:
+        payload = json.loads(await request.body() or b"[]")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON body: {e}")
+    if not isinstance(payload, list):
+        raise ValueError("Expected a JSON array of records")
+    for record in payload:
+        yield record, None
+
+
+def is_csv_request(request: Request) -> bool:
+    """True when the request body is declared as CSV"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    return content_type in CSV_CONTENT_TYPES
+
+
+async def iter_csv_records(request: Request,
+                           max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Yield (record, error) pairs from a CSV body with a header row, as it
+    streams in. Quoted fields may span lines. Empty cells are left out of the
+    record, so schema defaults apply, and rows with the wrong number of
+    cells or longer than max_line_bytes produce an error entry.
+    """
+    header: Optional[List[str]] = None
+    pending = ""
+    dropped_quote = False  # skipping the rest of a quoted field in an over-long row
+    async for line, decode_error in iter_body_lines(request, max_line_bytes):
+        if decode_error:
+            # Drops the row, including the part of a quoted field read so far
+            pending = ""
+            yield None, decode_error
+            continue
+        if dropped_quote:
+            if line.count('"') % 2:
+                dropped_quote = False
+            continue
+        pending += line
+        if len(pending) > max_line_bytes:
+            dropped_quote = bool(pending.count('"') % 2)
+            pending = ""
+            yield None, f"Row longer than {max_line_bytes} characters"
+            continue
+        if pending.count('"') % 2:
+            # Inside a quoted field that continues on the next line
+            pending += "\n"
+            continue
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+        try:
+            cells = next(csv.reader([text]))
+        except csv.Error as e:
+            yield None, f"Invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            continue
+        if len(cells) != len(header):
+            yield None, f"Expected {len(header)} columns, got {len(cells)}"
+            continue
+        yield {name: cell for name, cell in zip(header, cells) if cell != ""}, None
+    if pending.strip():
+        yield None, "Invalid CSV: unterminated quoted field"
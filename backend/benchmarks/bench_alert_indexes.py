@@ -0,0 +1,168 @@
+"""
+Query plans and timings for the alert hot-path filters, before and after
+the indexes declared on the Alert model.
+
+Point DATABASE_URL (or --url) at a scratch database: the script seeds the
+`alerts` table with synthetic rows and drops/recreates its indexes.
+
+    cd backend
+    python -m benchmarks.bench_alert_indexes --url postgresql://localhost/safe360_bench --rows 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, text
+
+from app.database.connection import Base
+from app.database.migrations import drop_indexes, ensure_indexes
+from app.models.alert import Alert
+
+ALERT_TYPES = ["crime", "fraud", "weather", "flood", "storm", "fire", "earthquake", "cyber_crime"]
+SEVERITIES = ["low", "medium", "high", "critical"]
+STATUSES = ["active", "resolved", "archived"]
+
+# (label, SQL) pairs mirroring the filters used by the routers
+QUERIES = [
+    ("overview: created_at half-open range",
+     "SELECT count(*) FROM alerts WHERE created_at >= :today AND created_at < :tomorrow"),
+    ("overview: date(created_at) = today",
+     "SELECT count(*) FROM alerts WHERE date(created_at) = :today_date"),
+    ("alerts/active: is_active newest first",
+     "SELECT id FROM alerts WHERE is_active = true ORDER BY created_at DESC LIMIT 100"),
+    ("admin/alerts/all: status + severity",
+     "SELECT id FROM alerts WHERE status = 'active' AND severity = 'critical' "
+     "ORDER BY created_at DESC LIMIT 100"),
+    ("overview: alert_type ILIKE '%crime%'",
+     "SELECT count(*) FROM alerts WHERE alert_type ILIKE '%crime%'"),
+    ("insights: last 7 days by day",
+     "SELECT date(created_at), count(*) FROM alerts WHERE created_at >= :week_ago GROUP BY date(created_at)"),
+    ("map: active alerts in bbox",
+     "SELECT id FROM alerts WHERE is_active = true AND latitude BETWEEN 18.9 AND 19.3 "
+     "AND longitude BETWEEN 72.7 AND 73.1"),
+]
+
+
+def seed(engine, rows: int, chunk_size: int = 50000):
+    """Fill the alerts table with rows spread over a year across India"""
+    Base.metadata.create_all(bind=engine, tables=[Alert.__table__])
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM alerts"))
+
+    if engine.dialect.name == "postgresql":
+        # Generate rows server-side; much faster than shipping them over the wire
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO alerts (alert_type, severity, title, latitude, longitude,
+                                    location_name, status, is_active, created_at)
+                SELECT ((:types)::text[])[1 + floor(random() * :n_types)::int],
+                       ((:severities)::text[])[1 + floor(random() * 4)::int],
+                       'Benchmark alert',
+                       8 + random() * 27,
+                       68 + random() * 29,
+                       'Area ' || floor(random() * 500)::int,
+                       ((:statuses)::text[])[1 + floor(random() * 3)::int],
+                       random() < 0.2,
+                       now() - random() * interval '365 days'
+                FROM generate_series(1, :rows)
+            """), {
+                "types": ALERT_TYPES, "n_types": len(ALERT_TYPES),
+                "severities": SEVERITIES, "statuses": STATUSES, "rows": rows
+            })
+        return
+
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for start in range(0, rows, chunk_size):
+            batch = [{
+                "alert_type": rng.choice(ALERT_TYPES),
+                "severity": rng.choice(SEVERITIES),
+                "title": "Benchmark alert",
+                "latitude": 8 + rng.random() * 27,
+                "longitude": 68 + rng.random() * 29,
+                "location_name": f"Area {rng.randrange(500)}",
+                "status": rng.choice(STATUSES),
+                "is_active": rng.random() < 0.2,
+                "created_at": now - timedelta(seconds=rng.random() * 365 * 86400),
+            } for _ in range(min(chunk_size, rows - start))]
+            conn.execute(insert(Alert.__table__), batch)
+
+
+def explain(conn, sql: str, params: dict) -> str:
+    if conn.dialect.name == "postgresql":
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params).fetchall()
+    elif conn.dialect.name == "sqlite":
+        plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).fetchall()
+        return "\n".join(str(row[-1]) for row in plan)
+    else:
+        plan = conn.execute(text(f"EXPLAIN {sql}"), params).fetchall()
+    return "\n".join(str(row[0]) for row in plan)
+
+
+def run_queries(engine, repeats: int) -> dict:
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    params = {
+        "today": today,
+        "tomorrow": today + timedelta(days=1),
+        "today_date": today.date() if engine.dialect.name == "postgresql" else today.date().isoformat(),
+        "week_ago": today - timedelta(days=7),
+    }
+    results = {}
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE alerts"))
+        elif engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+        for label, sql in QUERIES:
+            if engine.dialect.name == "sqlite":
+                sql = sql.replace("ILIKE", "LIKE")
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[label] = (statistics.median(timings), explain(conn, sql, params))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="database URL (defaults to DATABASE_URL from settings)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse rows from a previous run")
+    parser.add_argument("--plans", action="store_true", help="print full query plans")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from app.database.connection import engine
+
+    if not args.skip_seed:
+        start = time.perf_counter()
+        seed(engine, args.rows)
+        print(f"Seeded {args.rows:,} alerts in {time.perf_counter() - start:.1f}s")
+
+    drop_indexes(engine)
+    before = run_queries(engine, args.repeats)
+    start = time.perf_counter()
+    ensure_indexes(engine)
+    print(f"Built indexes in {time.perf_counter() - start:.1f}s")
+    after = run_queries(engine, args.repeats)
+
+    print(f"\n{'query':<42} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for label, _ in QUERIES:
+        b, a = before[label][0], after[label][0]
+        print(f"{label:<42} {b:>10.2f} {a:>10.2f} {b / a if a else float('inf'):>7.1f}x")
+
+    if args.plans:
+        for label, _ in QUERIES:
+            print(f"\n=== {label}\n--- before\n{before[label][1]}\n--- after\n{after[label][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Requests per second for the same query served by a sync `def` endpoint on
+a blocking Session (Starlette threadpool) and an `async def` endpoint on
+an AsyncSession.
+
+Each request runs the /alerts/active query plus a simulated round-trip
+latency inside the database (pg_sleep on PostgreSQL, a registered
+sleep_ms() function on SQLite), so the comparison shows how concurrency
+scales when requests spend their time waiting on the database.
+
+    cd backend
+    pip install aiosqlite httpx   # asyncpg for PostgreSQL
+    python -m benchmarks.bench_async_db --url sqlite:///./bench_async.db --concurrency 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database.connection import Base, async_database_url
+from app.models.alert import Alert
+
+
+def _sleep_ms(ms):
+    time.sleep(ms / 1000)
+    return 0
+
+
+def build_app(url: str, latency_ms: float, pool_size: int) -> FastAPI:
+    is_sqlite = url.startswith("sqlite")
+    sync_engine = create_engine(url, pool_size=pool_size, max_overflow=0)
+    async_engine = create_async_engine(async_database_url(url), pool_size=pool_size, max_overflow=0)
+
+    if is_sqlite:
+        @event.listens_for(sync_engine, "connect")
+        def _register_sync(dbapi_connection, _):
+            dbapi_connection.create_function("sleep_ms", 1, _sleep_ms)
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _register_async(dbapi_connection, _):
+            dbapi_connection.create_function("sleep_ms", 1, _sleep_ms)
+
+        latency_sql = text("SELECT sleep_ms(:ms)")
+    else:
+        latency_sql = text("SELECT pg_sleep(:ms / 1000.0)")
+
+    Base.metadata.create_all(bind=sync_engine, tables=[Alert.__table__])
+    SyncSession = sessionmaker(bind=sync_engine)
+    AsyncSessionFactory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionFactory() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync/alerts/active")
+    def sync_active(db: Session = Depends(get_sync_db)):
+        db.execute(latency_sql, {"ms": latency_ms})
+        return len(db.execute(select(Alert).filter(Alert.is_active == True).limit(50)).scalars().all())
+
+    @app.get("/async/alerts/active")
+    async def async_active(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(latency_sql, {"ms": latency_ms})
+        result = await db.execute(select(Alert).filter(Alert.is_active == True).limit(50))
+        return len(result.scalars().all())
+
+    app.state.engines = (sync_engine, async_engine)
+    return app
+
+
+async def hammer(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+async def main_async(args):
+    app = build_app(args.url, args.latency_ms, args.pool_size)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm both pools before measuring
+        await hammer(client, "/sync/alerts/active", args.pool_size, args.pool_size)
+        await hammer(client, "/async/alerts/active", args.pool_size, args.pool_size)
+
+        print(f"{'path':<8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for name in ("sync", "async"):
+            r = await hammer(client, f"/{name}/alerts/active", args.requests, args.concurrency)
+            print(f"{name:<8} {r['rps']:>9.1f} {r['p50']:>8.1f} {r['p99']:>8.1f}")
+
+    sync_engine, async_engine = app.state.engines
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///./bench_async.db")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="simulated database round trip")
+    parser.add_argument("--pool-size", type=int, default=200, help="connections for each engine")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Geofence queries on the grid SpatialIndex against a naive haversine scan
+over every location.
+
+Locations are synthetic points clustered around a set of cities (so
+density looks like real facility data), queries are radius lookups and
+k-nearest searches around random points near those cities. Results
+from both methods are compared for correctness.
+
+    cd backend
+    python -m benchmarks.bench_geofence --locations 100000 --queries 500
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.geo.spatial_index import SpatialIndex, haversine_km
+
+TYPES = ("hospital", "shelter", "police_station", "fire_station")
+
+
+def make_points(count: int, cities: int, seed: int):
+    rng = random.Random(seed)
+    centres = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(cities)]
+    points = []
+    for i in range(count):
+        lat, lng = rng.choice(centres)
+        points.append((
+            i,
+            max(-90.0, min(90.0, lat + rng.gauss(0, 0.5))),
+            (lng + rng.gauss(0, 0.5) + 180.0) % 360.0 - 180.0,
+            rng.choice(TYPES)
+        ))
+    return centres, points
+
+
+def naive_within(points, lat, lng, radius_km):
+    found = []
+    for key, p_lat, p_lng, _ in points:
+        distance = haversine_km(lat, lng, p_lat, p_lng)
+        if distance <= radius_km:
+            found.append((key, distance))
+    found.sort(key=lambda r: r[1])
+    return found
+
+
+def naive_nearest(points, lat, lng, k):
+    distances = [(key, haversine_km(lat, lng, p_lat, p_lng)) for key, p_lat, p_lng, _ in points]
+    distances.sort(key=lambda r: r[1])
+    return distances[:k]
+
+
+def timed(fn, queries):
+    samples = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(*query))
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, results
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<28} mean {statistics.mean(samples):9.3f} ms   p50 {samples[len(samples) // 2]:9.3f} ms   p99 {p99:9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, default=100000)
+    parser.add_argument("--cities", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--naive-queries", type=int, default=50, help="the naive scan is slow; time fewer queries")
+    parser.add_argument("--radius-km", type=float, default=10.0)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--cell-deg", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    centres, points = make_points(args.locations, args.cities, args.seed)
+    start = time.perf_counter()
+    index = SpatialIndex(args.cell_deg)
+    for key, lat, lng, location_type in points:
+        index.insert(key, lat, lng, key)
+    print(f"Indexed {len(index)} locations in {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"(cell {args.cell_deg} deg)")
+
+    rng = random.Random(args.seed + 1)
+    probes = []
+    for _ in range(args.queries):
+        lat, lng = rng.choice(centres)
+        probes.append((lat + rng.gauss(0, 0.5), lng + rng.gauss(0, 0.5)))
+    naive_probes = probes[:args.naive_queries]
+
+    radius_index, radius_results = timed(lambda lat, lng: index.within_radius(lat, lng, args.radius_km), probes)
+    radius_naive, radius_expected = timed(lambda lat, lng: naive_within(points, lat, lng, args.radius_km), naive_probes)
+    knn_index, knn_results = timed(lambda lat, lng: index.nearest(lat, lng, args.k), probes)
+    knn_naive, knn_expected = timed(lambda lat, lng: naive_nearest(points, lat, lng, args.k), naive_probes)
+
+    for got, expected in zip(radius_results, radius_expected):
+        assert [key for key, _ in got] == [key for key, _ in expected], "radius results differ"
+    for got, expected in zip(knn_results, knn_expected):
+        assert [round(d, 6) for _, d in got] == [round(d, 6) for _, d in expected], "k-nearest results differ"
+
+    print(f"\nRadius {args.radius_km} km (avg {statistics.mean(len(r) for r in radius_results):.1f} hits)")
+    report("  grid index", radius_index)
+    report("  naive haversine scan", radius_naive)
+    print(f"  speedup {statistics.mean(radius_naive) / statistics.mean(radius_index):.0f}x")
+    print(f"\n{args.k} nearest")
+    report("  grid index", knn_index)
+    report("  naive haversine scan", knn_naive)
+    print(f"  speedup {statistics.mean(knn_naive) / statistics.mean(knn_index):.0f}x")
+    print("\nResults match the naive scan.")
+
+
+if __name__ == "__main__":
+    main()
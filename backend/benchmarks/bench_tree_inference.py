@@ -0,0 +1,65 @@
+"""
+predict_proba latency of the bundled tree models through sklearn versus
+the flat-array NumPy evaluator (app/ml/tree_arrays.py), at batch sizes
+1, 100 and 10k, plus the largest probability difference between the two.
+
+"auto" is what ml_inference_backend=numpy serves: the NumPy evaluator up
+to --max-rows rows per call and sklearn above that.
+
+    cd backend
+    python -m benchmarks.bench_tree_inference --repeats 200
+"""
+import argparse
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from app.ml.tree_arrays import CompiledTreeModel, TreeEnsemble, max_proba_difference, sample_inputs
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / "app" / "ml" / "models"
+BATCH_SIZES = (1, 100, 10000)
+
+
+def latencies_ms(predict, X: np.ndarray, repeats: int) -> np.ndarray:
+    predict(X)  # warm-up
+    samples = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        samples[i] = (time.perf_counter() - start) * 1000
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models-dir", default=str(MODELS_DIR))
+    parser.add_argument("--repeats", type=int, default=200, help="calls per batch size (10k batches use a tenth)")
+    parser.add_argument("--max-rows", type=int, default=512, help="largest batch the auto backend sends to NumPy")
+    args = parser.parse_args()
+
+    for path in sorted(Path(args.models_dir).glob("*_risk_model*.pkl")):
+        model = joblib.load(path)
+        try:
+            ensemble = TreeEnsemble.from_sklearn(model)
+        except TypeError as e:
+            print(f"{path.name}: skipped ({e})")
+            continue
+        auto = CompiledTreeModel(model, ensemble, args.max_rows)
+        print(f"{path.name}: {ensemble.n_trees} trees, {len(ensemble.feature)} nodes, depth {ensemble.max_depth}")
+        print(f"  {'batch':>6}  {'backend':<8} {'p50 ms':>9} {'p99 ms':>9} {'rows/s':>12}   max |Δp|")
+        for batch in BATCH_SIZES:
+            X = sample_inputs(ensemble, rows=batch, seed=batch)
+            repeats = max(5, args.repeats // 10) if batch >= 10000 else args.repeats
+            difference = max_proba_difference(model, ensemble, X)
+            for label, predict in (("sklearn", model.predict_proba), ("numpy", ensemble.predict_proba),
+                                   ("auto", auto.predict_proba)):
+                samples = latencies_ms(predict, X, repeats)
+                p50, p99 = np.percentile(samples, [50, 99])
+                difference_text = f"{difference:.1e}" if label == "numpy" else ""
+                print(f"  {batch:>6}  {label:<8} {p50:9.3f} {p99:9.3f} {batch / (p50 / 1000):12.0f}   {difference_text}")
+
+
+if __name__ == "__main__":
+    main()
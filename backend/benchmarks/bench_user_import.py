@@ -0,0 +1,145 @@
+"""
+Users created per second, and latency of an unrelated endpoint while
+users are being created, for:
+
+  inline   - bcrypt in the request thread (the old behaviour)
+  pool     - bcrypt in the PasswordHasher process pool
+  import   - POST /admin/users/import (parallel hashing + bulk INSERT)
+
+    cd backend
+    python -m benchmarks.bench_user_import --users 200 --rounds 10 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base, get_db
+from app.routers import admin, users
+from app.security import PasswordHasher
+
+
+def build_app(url: str) -> FastAPI:
+    engine = create_engine(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(users.router)
+    app.include_router(admin.router)
+    app.dependency_overrides[get_db] = override_get_db
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    return app
+
+
+def use_hasher(hasher: PasswordHasher) -> None:
+    users.password_hasher = hasher
+    admin.password_hasher = hasher
+
+
+def user_payload(prefix: str, i: int) -> dict:
+    return {"username": f"{prefix}{i}", "email": f"{prefix}{i}@example.com", "password": f"pw-{i}-secret"}
+
+
+async def probe_latency(client: httpx.AsyncClient, stop: asyncio.Event, samples: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/ping")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def run_creates(client: httpx.AsyncClient, prefix: str, count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(i):
+        async with semaphore:
+            response = await client.post("/users/", json=user_payload(prefix, i))
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(create(i) for i in range(count)))
+    return time.perf_counter() - start
+
+
+async def run_import(client: httpx.AsyncClient, prefix: str, count: int) -> float:
+    start = time.perf_counter()
+    response = await client.post("/admin/users/import", json=[user_payload(prefix, i) for i in range(count)])
+    response.raise_for_status()
+    assert response.json()["created"] == count, response.json()
+    return time.perf_counter() - start
+
+
+async def measure(app: FastAPI, label: str, work) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        stop = asyncio.Event()
+        samples: list = []
+        probe = asyncio.create_task(probe_latency(client, stop, samples))
+        elapsed, count = await work(client)
+        stop.set()
+        await probe
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] if samples else 0.0
+    print(f"{label:<8} {count / elapsed:8.1f} users/s   /ping p50 {statistics.median(samples) if samples else 0:7.1f} ms"
+          f"   p99 {p99:7.1f} ms")
+
+
+async def main_async(args) -> None:
+    app = build_app(args.url)
+    inline = PasswordHasher(workers=0, rounds=args.rounds, max_pending=args.concurrency)
+    pool = PasswordHasher(workers=args.workers, rounds=args.rounds, max_pending=args.workers * 4)
+    pool.hash("warm-up")  # start the worker processes outside the timing
+
+    print(f"{args.users} users, bcrypt cost {args.rounds}, {args.workers} hash workers, "
+          f"{args.concurrency} concurrent requests, {os.cpu_count()} CPUs")
+    use_hasher(inline)
+    await measure(app, "inline", lambda c: _timed_creates(c, "inline", args))
+    use_hasher(pool)
+    await measure(app, "pool", lambda c: _timed_creates(c, "pool", args))
+    await measure(app, "import", lambda c: _timed_import(c, "import", args))
+    pool.shutdown()
+
+
+async def _timed_creates(client, prefix, args):
+    return await run_creates(client, prefix, args.users, args.concurrency), args.users
+
+
+async def _timed_import(client, prefix, args):
+    return await run_import(client, prefix, args.users), args.users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="database URL (default: a temporary SQLite file)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    if args.url is None:
+        args.url = f"sqlite:///{tempfile.mkdtemp()}/bench_users.db"
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
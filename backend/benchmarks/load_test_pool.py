@@ -0,0 +1,94 @@
+"""
+Concurrent load against the SQLAlchemy connection pool.
+
+Each simulated request checks out a session, runs a small query and holds
+the connection for --hold-ms (standing in for request work), the way
+get_db() sessions are used by the routers. Every pool configuration given
+with --config SIZE:OVERFLOW is run with the same load so their throughput,
+latency and checkout waits can be compared.
+
+    cd backend
+    python -m benchmarks.load_test_pool --workers 64 --requests 2000 --config 5:10 --config 20:20
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import get_settings
+from app.database.pool_metrics import InstrumentedQueuePool, pool_metrics
+
+
+def run(url: str, pool_size: int, max_overflow: int, pool_timeout: float,
+        workers: int, requests: int, hold_ms: float) -> dict:
+    engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=True,
+    )
+    Session = sessionmaker(bind=engine)
+    pool_metrics.reset()
+
+    def one_request(_):
+        start = time.perf_counter()
+        db = Session()
+        try:
+            db.execute(text("SELECT 1")).scalar()
+            time.sleep(hold_ms / 1000)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__
+        finally:
+            db.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r[0] * 1000 for r in results if r[1] is None)
+    errors = sum(1 for r in results if r[1] is not None)
+    snapshot = pool_metrics.snapshot(engine.pool)
+    engine.dispose()
+    return {
+        "config": f"{pool_size}:{max_overflow}",
+        "rps": (requests - errors) / elapsed,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0,
+        "errors": errors,
+        **snapshot,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="database URL (defaults to DATABASE_URL from settings)")
+    parser.add_argument("--workers", type=int, default=64, help="concurrent simulated requests")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--hold-ms", type=float, default=10.0, help="time each request holds its connection")
+    parser.add_argument("--pool-timeout", type=float, default=30.0)
+    parser.add_argument("--config", action="append", default=[],
+                        help="SIZE:OVERFLOW pool configuration, repeatable (default 5:10 and 20:20)")
+    args = parser.parse_args()
+
+    url = args.url or get_settings().database_url
+    configs = args.config or ["5:10", "20:20"]
+
+    print(f"{'pool':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'wait avg':>9} "
+          f"{'wait p95':>9} {'wait max':>9} {'overflow':>9} {'timeouts':>9} {'errors':>7}")
+    for config in configs:
+        size, overflow = (int(v) for v in config.split(":"))
+        r = run(url, size, overflow, args.pool_timeout, args.workers, args.requests, args.hold_ms)
+        print(f"{r['config']:>7} {r['rps']:>9.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{r['wait_ms_avg']:>9.2f} {r['wait_ms_p95']:>9.2f} {r['wait_ms_max']:>9.2f} "
+              f"{r['overflow_checkouts']:>9} {r['timeouts']:>9} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Per-worker memory of the ML models when every worker unpickles its own
+copy (.pkl) versus when workers map the shared array export (.trees).
+
+Starts --workers processes that are all alive at the same time. Each
+process loads every model in the directory through ModelRegistry, scores
+a batch so all tree pages are touched, and reports from
+/proc/self/smaps_rollup (Linux):
+
+  RSS      resident pages, shared ones counted in full by every worker
+  PSS      shared pages split between the processes mapping them
+  private  pages only this worker holds
+
+Both numbers are reported before loading and after. Without exports the
+pickles are exported to a temporary directory first.
+
+    cd backend
+    python -m benchmarks.measure_model_rss --workers 4
+"""
+import argparse
+import multiprocessing
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / "app" / "ml" / "models"
+
+
+def memory_kb() -> dict:
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[1].isdigit():
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "private": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def worker(models_dir: str, loaded_barrier, done_barrier, results) -> None:
+    from app.ml.registry import ModelRegistry
+
+    import sklearn.ensemble  # noqa: F401 - count library code in the baseline, not the models
+    before = memory_kb()
+    registry = ModelRegistry(Path(models_dir), poll_interval=0)
+    registry.warm_up()
+    rng = np.random.default_rng(0)
+    for name in registry.scan():
+        model = registry.get(name)
+        model.predict_proba(rng.normal(0, 100, (2048, model.n_features_in_)))
+    loaded_barrier.wait()  # every worker has its models before anyone measures
+    after = memory_kb()
+    results.put((before, after))
+    done_barrier.wait()
+
+
+def run(label: str, models_dir: Path, workers: int) -> None:
+    context = multiprocessing.get_context("spawn")
+    loaded_barrier = context.Barrier(workers)
+    done_barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(str(models_dir), loaded_barrier, done_barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    def mean(which, key):
+        return sum(sample[which][key] for sample in samples) / len(samples) / 1024
+
+    print(f"{label:<7} per worker  RSS {mean(0, 'rss'):7.1f} -> {mean(1, 'rss'):7.1f} MiB"
+          f"   PSS {mean(0, 'pss'):7.1f} -> {mean(1, 'pss'):7.1f} MiB"
+          f"   private {mean(0, 'private'):7.1f} -> {mean(1, 'private'):7.1f} MiB"
+          f"   | models add {workers * (mean(1, 'pss') - mean(0, 'pss')):7.1f} MiB PSS in total")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models-dir", default=str(MODELS_DIR))
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from app.ml.tree_arrays import export_model_file
+
+    source = Path(args.models_dir)
+    pickles = sorted(source.glob("*_risk_model*.pkl"))
+    if not pickles:
+        raise SystemExit(f"No *_risk_model*.pkl files in {source}")
+
+    pickle_dir = Path(tempfile.mkdtemp(prefix="models-pkl-"))
+    trees_dir = Path(tempfile.mkdtemp(prefix="models-trees-"))
+    try:
+        for path in pickles:
+            shutil.copy(path, pickle_dir / path.name)
+            export_model_file(path, trees_dir / path.with_suffix(".trees").name)
+        print(f"{len(pickles)} models, {args.workers} workers")
+        run("pickle", pickle_dir, args.workers)
+        run("mmap", trees_dir, args.workers)
+    finally:
+        shutil.rmtree(pickle_dir, ignore_errors=True)
+        shutil.rmtree(trees_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+# Settings are read at import time, so configure them before importing app
+_db_dir = tempfile.mkdtemp(prefix="safe360-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test.db")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("FIREBASE_CREDENTIALS_PATH", os.path.join(_db_dir, "missing.json"))
+os.environ.setdefault("FIREBASE_BACKEND", "memory")
+os.environ.setdefault("ML_WARMUP", "false")
+
+import pytest
+
+from app.database.connection import Base, SessionLocal, engine
+import app.models  # noqa: F401 - register all tables on Base.metadata
+
+
+@pytest.fixture
+def db_session_factory():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield SessionLocal
+    Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,82 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from app.database.connection import dispose_async_engine, get_async_session_factory
+from app.ingest.dedup import AlertDeduplicator
+from app.models.alert import Alert
+from app.models.outbox import FirebaseOutbox
+from app.routers.alert_submission import merge_duplicate_report
+
+
+def deduplicator(**options):
+    return AlertDeduplicator(radius_km=0.5, window=timedelta(minutes=30), refresh_interval=0, **options)
+
+
+def insert_alert(session_factory, **fields):
+    fields = {"alert_type": "Fire", "severity": "high", "title": "Fire", "latitude": 19.0760,
+              "longitude": 72.8777, "created_at": datetime.utcnow(), **fields}
+    db = session_factory()
+    alert = Alert(**fields)
+    db.add(alert)
+    db.commit()
+    db.refresh(alert)
+    db.expunge(alert)
+    db.close()
+    return alert
+
+
+def test_finds_nearby_alert_of_the_same_category(db_session_factory):
+    dedup = deduplicator()
+    alert = insert_alert(db_session_factory)
+    db = db_session_factory()
+    dedup.ensure_warm(db)
+    db.close()
+
+    assert dedup.find_duplicate("fire", 19.0770, 72.8780) == alert.id
+    assert dedup.find_duplicate("flood", 19.0770, 72.8780) is None
+    assert dedup.find_duplicate("fire", 19.2, 72.8780) is None
+    assert dedup.find_duplicate("fire", 19.0770, 72.8780, at=datetime.utcnow() + timedelta(hours=1)) is None
+
+
+def test_catch_up_sees_rows_committed_after_newer_ones(db_session_factory):
+    dedup = deduplicator()
+    db = db_session_factory()
+    dedup.ensure_warm(db)
+    db.close()
+    # This worker commits id 5 while another worker's id 2 is still uncommitted
+    dedup.add(insert_alert(db_session_factory, id=5, latitude=10.0, longitude=10.0))
+    late = insert_alert(db_session_factory, id=2, created_at=datetime.utcnow() - timedelta(seconds=30))
+
+    db = db_session_factory()
+    dedup.ensure_warm(db)
+    dedup.ensure_warm(db)
+    db.close()
+
+    assert dedup.find_duplicate("fire", 19.0770, 72.8780) == late.id
+    assert len(dedup.index) == 2 and len(dedup._expiry) == 2
+
+
+def test_merge_appends_description_and_keeps_the_report(db_session_factory):
+    alert = insert_alert(db_session_factory, description="Smoke from the roof", firebase_id="-Nabc")
+    report = {"description": "Flames visible now", "files": [], "timestamp": "2025-01-01T00:00:00"}
+
+    async def merge():
+        try:
+            async with get_async_session_factory()() as db:
+                return await merge_duplicate_report(db, alert.id, report)
+        finally:
+            await dispose_async_engine()
+
+    merged = asyncio.run(merge())
+    assert merged.report_count == 2
+    assert merged.description == "Smoke from the roof\n\nFlames visible now"
+
+    db = db_session_factory()
+    event = db.query(FirebaseOutbox).one()
+    db.close()
+    assert event.path == "alerts/-Nabc" and event.operation == "update"
+    payload = json.loads(event.payload)
+    [report_path] = [path for path in payload if path.startswith("reports/")]
+    assert payload[report_path] == report
+    assert payload["report_count"] == 2
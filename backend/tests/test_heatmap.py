@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from app.models.alert import Alert
+from app.routers.admin import _heatmap_alert_points, _heatmap_grid_cells
+
+
+def add_alerts(session_factory, *locations):
+    db = session_factory()
+    now = datetime.utcnow()
+    for i, (lat, lng, name) in enumerate(locations):
+        db.add(Alert(alert_type="fire", severity="high", title=f"alert {i}", latitude=lat, longitude=lng,
+                     location_name=name, created_at=now + timedelta(minutes=i)))
+    db.commit()
+    db.close()
+
+
+def test_grid_cells_keep_the_busiest_up_to_limit(db_session_factory):
+    add_alerts(
+        db_session_factory,
+        (19.05, 72.85, "Bandra"), (19.06, 72.86, "Bandra"), (19.07, 72.84, "Khar"),
+        (18.52, 73.85, "Pune"), (18.53, 73.86, "Pune"),
+        (28.61, 77.21, "Delhi"),
+    )
+    db = db_session_factory()
+    columns, area_counts, truncated = _heatmap_grid_cells(db, [], 1.0, limit=2)
+    assert truncated
+    assert columns["alert_count"] == [3, 2]
+    # Density still counts alerts in the cells that were left out
+    assert area_counts == {"Bandra": 2, "Khar": 1, "Pune": 2, "Delhi": 1}
+
+    columns, _, truncated = _heatmap_grid_cells(db, [], 1.0, limit=3)
+    assert not truncated
+    assert sorted(columns["alert_count"]) == [1, 2, 3]
+    db.close()
+
+
+def test_alert_points_keep_the_newest_up_to_limit(db_session_factory):
+    add_alerts(db_session_factory, (19.05, 72.85, "Bandra"), (18.52, 73.85, "Pune"), (28.61, 77.21, "Delhi"))
+    db = db_session_factory()
+    columns, area_counts, truncated = _heatmap_alert_points(db, [], limit=2)
+    assert truncated
+    assert columns["area_name"] == ["Delhi", "Pune"]
+    assert area_counts == {"Bandra": 1, "Pune": 1, "Delhi": 1}
+    db.close()
@@ -0,0 +1,159 @@
+import threading
+import time
+
+import pytest
+
+from app.firebase.memory import InMemoryDatabase, InMemoryEvent
+from app.firebase.mirror import AlertMirror
+
+
+def alert(status, timestamp, **fields):
+    return {"status": status, "timestamp": timestamp, **fields}
+
+
+@pytest.fixture
+def mirror():
+    mirror = AlertMirror(check_interval=0.01)
+    yield mirror
+    mirror.stop()
+
+
+def test_initial_put_replaces_tree(mirror):
+    mirror.apply_event("put", "/", {"stale": alert("active", "2025-01-01")})
+    mirror.apply_event("put", "/", {
+        "a": alert("active", "2025-01-02T10:00:00"),
+        "b": alert("resolved", "2025-01-03T10:00:00"),
+    })
+
+    assert mirror.ready
+    assert set(mirror.get_all()) == {"a", "b"}
+    alerts, cursor = mirror.query_alerts(status="active")
+    assert list(alerts) == ["a"] and cursor is None
+
+
+def test_put_and_patch_events_update_indexes(mirror):
+    mirror.apply_event("put", "/", {"a": alert("active", "2025-01-01T00:00:00")})
+    mirror.apply_event("put", "/b", alert("active", "2025-01-02T00:00:00", title="Flood"))
+    mirror.apply_event("patch", "/a", {"status": "resolved"})
+    mirror.apply_event("put", "/b/title", "Flash flood")
+
+    assert mirror.get("a")["status"] == "resolved"
+    assert mirror.get("b")["title"] == "Flash flood"
+    assert list(mirror.query_alerts(status="active")[0]) == ["b"]
+    assert list(mirror.query_alerts(status="resolved")[0]) == ["a"]
+
+    mirror.apply_event("put", "/b", None)
+    assert mirror.get("b") is None
+    assert mirror.query_alerts(status="active")[0] == {}
+
+
+def test_query_pages_newest_first_with_cursor(mirror):
+    mirror.apply_event("put", "/", {
+        f"k{i}": alert("active", f"2025-01-0{i}T00:00:00") for i in range(1, 6)
+    })
+
+    page, cursor = mirror.query_alerts(limit=2)
+    assert list(page) == ["k4", "k5"] and cursor == "2025-01-04T00:00:00|k4"
+    page, cursor = mirror.query_alerts(limit=2, before=cursor)
+    assert list(page) == ["k2", "k3"]
+
+
+def paginate(query_alerts, **filters):
+    pages, cursor = [], None
+    while True:
+        page, cursor = query_alerts(limit=2, before=cursor, **filters)
+        pages.append(list(page))
+        if cursor is None:
+            return pages
+
+
+def same_second_alerts():
+    return {
+        "k1": alert("active", "2025-01-01T00:00:00"),
+        "k2": alert("active", "2025-01-02T00:00:00"),
+        "k3": alert("active", "2025-01-02T00:00:00"),
+        "k4": alert("resolved", "2025-01-02T00:00:00"),
+        "k5": alert("active", "2025-01-02T00:00:00"),
+        "k6": alert("active", "2025-01-03T00:00:00"),
+    }
+
+
+def test_cursor_pages_through_alerts_sharing_a_timestamp(mirror):
+    mirror.apply_event("put", "/", same_second_alerts())
+
+    assert paginate(mirror.query_alerts) == [["k5", "k6"], ["k3", "k4"], ["k1", "k2"]]
+    assert paginate(mirror.query_alerts, status="active") == [["k5", "k6"], ["k2", "k3"], ["k1"]]
+
+
+def test_firebase_queries_page_through_alerts_sharing_a_timestamp():
+    from app.firebase.realtime_alerts import STATUS_TIMESTAMP, FirebaseAlertService, status_timestamp
+
+    alerts = InMemoryDatabase().reference("alerts")
+    for key, value in same_second_alerts().items():
+        alerts.child(key).set({**value, STATUS_TIMESTAMP: status_timestamp(value["status"], value["timestamp"])})
+    service = FirebaseAlertService(ref=alerts)
+
+    assert paginate(service.query_alerts) == [["k5", "k6"], ["k3", "k4"], ["k1", "k2"]]
+    assert paginate(service.query_alerts, status="active") == [["k5", "k6"], ["k2", "k3"], ["k1"]]
+
+
+def test_bad_event_is_counted_not_raised(mirror):
+    mirror._on_event(InMemoryEvent("patch", "/a", ["not", "a", "dict"]))
+    assert mirror.errors == 1
+
+
+def test_follows_live_writes_on_the_in_memory_backend(mirror):
+    database = InMemoryDatabase()
+    alerts = database.reference("alerts")
+    alerts.child("a").set(alert("active", "2025-01-01T00:00:00"))
+
+    mirror.start(alerts)
+    assert mirror.ready and set(mirror.get_all()) == {"a"}
+
+    alerts.child("b").set(alert("active", "2025-01-02T00:00:00"))
+    database.reference("/").update({"alerts/a/status": "resolved"})
+    assert mirror.get("b") is not None
+    assert mirror.get("a")["status"] == "resolved"
+
+
+def test_resync_recovers_writes_missed_while_disconnected(mirror):
+    database = InMemoryDatabase()
+    alerts = database.reference("alerts")
+    mirror.start(alerts)
+
+    mirror._registration.close()  # the stream drops
+    alerts.child("missed").set(alert("active", "2025-01-01T00:00:00"))
+    assert mirror.get("missed") is None
+
+    mirror.resync()
+    assert mirror.resyncs == 1 and mirror.ready
+    assert mirror.get("missed") is not None
+    assert len(database.listeners) == 1
+
+
+def test_watchdog_resubscribes_when_listener_thread_dies(mirror):
+    database = InMemoryDatabase()
+    alerts = database.reference("alerts")
+    mirror.start(alerts)
+
+    dead = threading.Thread(target=lambda: None)
+    dead.start()
+    dead.join()
+    mirror._registration._thread = dead
+    alerts.child("a").set(alert("active", "2025-01-01T00:00:00"))
+
+    deadline = time.monotonic() + 2
+    while mirror.resyncs == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert mirror.resyncs >= 1
+    assert mirror.get("a") is not None
+
+
+def test_watchdog_resyncs_a_stale_mirror(mirror):
+    mirror.max_staleness = 0.05
+    mirror.start(InMemoryDatabase().reference("alerts"))
+
+    deadline = time.monotonic() + 2
+    while mirror.resyncs == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert mirror.resyncs >= 1
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.firebase.memory import InMemoryDatabase
+from app.firebase.outbox import OutboxRelay, add_outbox_event, retry_dead
+from app.models.outbox import FirebaseOutbox
+
+
+class FlakyRoot:
+    """Root reference over an InMemoryDatabase that fails updates touching chosen paths"""
+
+    def __init__(self, database: InMemoryDatabase):
+        self.database = database
+        self.failing = set()
+        self.updates = []
+
+    def update(self, value):
+        if any(path.split("/")[:2] == failing.split("/") for path in value for failing in self.failing):
+            raise ConnectionError("firebase unavailable")
+        self.updates.append(value)
+        self.database.reference("/").update(value)
+
+
+@pytest.fixture
+def firebase():
+    return FlakyRoot(InMemoryDatabase())
+
+
+@pytest.fixture
+def relay(db_session_factory, firebase):
+    return OutboxRelay(db_session_factory, lambda: firebase, batch_size=100, max_attempts=3, poll_interval=1)
+
+
+def enqueue(session_factory, *events):
+    db = session_factory()
+    for path, operation, payload in events:
+        add_outbox_event(db, path, operation, payload)
+    db.commit()
+    db.close()
+
+
+def make_due(session_factory):
+    """Skip the retry backoff"""
+    db = session_factory()
+    db.query(FirebaseOutbox).update({"available_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    db.close()
+
+
+def outbox_rows(session_factory):
+    db = session_factory()
+    rows = db.query(FirebaseOutbox).order_by(FirebaseOutbox.id).all()
+    db.close()
+    return rows
+
+
+def test_drain_applies_events_in_order(db_session_factory, relay, firebase):
+    enqueue(db_session_factory,
+            ("alerts/a", "set", {"status": "active", "title": "Fire"}),
+            ("alerts/a", "update", {"status": "resolved"}),
+            ("alerts/b", "set", {"status": "active"}),
+            ("alerts/b", "delete", None))
+
+    assert relay.drain_pending() == 4
+    assert firebase.database.reference("alerts").get() == {"a": {"status": "resolved", "title": "Fire"}}
+    assert all(row.processed_at is not None for row in outbox_rows(db_session_factory))
+
+
+def test_failed_batch_is_retried_with_one_available_at(db_session_factory, relay, firebase):
+    enqueue(db_session_factory, ("alerts/a", "set", {"n": 1}), ("alerts/b", "set", {"n": 1}))
+    firebase.failing = {"alerts/a"}
+
+    assert relay.drain_pending() == 0
+    rows = outbox_rows(db_session_factory)
+    assert [row.attempts for row in rows] == [1, 1]
+    assert rows[0].available_at == rows[1].available_at > datetime.utcnow()
+    assert "firebase unavailable" in rows[0].last_error
+
+    firebase.failing = set()
+    assert relay.drain_pending() == 0  # still backing off
+    make_due(db_session_factory)
+    assert relay.drain_pending() == 2
+    assert firebase.database.reference("alerts").get() == {"a": {"n": 1}, "b": {"n": 1}}
+
+
+def test_later_event_waits_for_failed_event_on_same_path(db_session_factory, relay, firebase):
+    enqueue(db_session_factory, ("alerts/a", "set", {"status": "active"}))
+    firebase.failing = {"alerts/a"}
+    relay.drain_pending()
+
+    # The delete is due immediately, but must not overtake the pending set
+    enqueue(db_session_factory, ("alerts/a", "delete", None), ("alerts/b", "set", {"n": 1}))
+    firebase.failing = set()
+    assert relay.drain_pending() == 1
+    assert firebase.database.reference("alerts").get() == {"b": {"n": 1}}
+
+    make_due(db_session_factory)
+    assert relay.drain_pending() == 2
+    assert firebase.database.reference("alerts/a").get() is None
+    assert [list(update) for update in firebase.updates[1:]] == [["alerts/a"], ["alerts/a"]]
+
+
+def test_dead_event_holds_its_path_until_retried(db_session_factory, relay, firebase):
+    enqueue(db_session_factory, ("alerts/a", "set", {"v": 1}))
+    firebase.failing = {"alerts/a"}
+    for _ in range(relay.max_attempts):
+        make_due(db_session_factory)
+        relay.drain_pending()
+    assert outbox_rows(db_session_factory)[0].attempts == relay.max_attempts
+
+    firebase.failing = set()
+    enqueue(db_session_factory, ("alerts/a", "update", {"v": 2}), ("alerts/b", "set", {"v": 1}))
+    assert relay.drain_pending() == 1
+    assert firebase.database.reference("alerts/a").get() is None
+    assert relay.metrics()["dead"] == 1
+
+    db = db_session_factory()
+    assert retry_dead(db, relay.max_attempts) == 1
+    db.close()
+    assert relay.drain_pending() == 2
+    assert firebase.database.reference("alerts/a").get() == {"v": 2}
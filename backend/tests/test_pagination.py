@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.alert import Alert
+from app.utils.pagination import decode_cursor, keyset_page
+
+
+@pytest.fixture
+def alert_ids(db_session_factory):
+    """Seven alerts, three of them sharing one created_at; ids newest first"""
+    base = datetime(2025, 1, 1)
+    times = [base, base + timedelta(hours=1), base + timedelta(hours=2), base + timedelta(hours=2),
+             base + timedelta(hours=2), base + timedelta(hours=3), base + timedelta(hours=4)]
+    db = db_session_factory()
+    for i, created_at in enumerate(times, start=1):
+        db.add(Alert(id=i, alert_type="fire", severity="low", title=f"alert {i}",
+                     latitude=0.0, longitude=0.0, created_at=created_at))
+    db.commit()
+    db.close()
+    return [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_next_pages_cover_every_row_once(db_session_factory, alert_ids):
+    db = db_session_factory()
+    pages, cursor = [], None
+    while True:
+        rows, cursor, prev_cursor = keyset_page(db.query(Alert), Alert, cursor, 2)
+        assert (prev_cursor is None) == (not pages)
+        pages.append([row.id for row in rows])
+        if cursor is None:
+            break
+    db.close()
+    assert pages == [[7, 6], [5, 4], [3, 2], [1]]
+
+
+def test_prev_cursor_returns_the_previous_page(db_session_factory, alert_ids):
+    db = db_session_factory()
+    _, first_next, _ = keyset_page(db.query(Alert), Alert, None, 3)
+    rows, _, prev_cursor = keyset_page(db.query(Alert), Alert, first_next, 3)
+    assert [row.id for row in rows] == [4, 3, 2]
+
+    rows, next_cursor, prev_again = keyset_page(db.query(Alert), Alert, prev_cursor, 3)
+    assert [row.id for row in rows] == [7, 6, 5]
+    assert prev_again is None
+    rows, _, _ = keyset_page(db.query(Alert), Alert, next_cursor, 3)
+    assert [row.id for row in rows] == [4, 3, 2]
+    db.close()
+
+
+def test_bad_cursor_is_a_value_error():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
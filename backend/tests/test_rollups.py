@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+from app.analytics import rollups
+from app.analytics.rollups import (
+    apply_rollup_deltas, rebuild_rollups, record_alert_created, record_alert_deleted, record_alert_updated,
+    rollup_key
+)
+from app.models.alert import Alert
+from app.models.alert_rollup import AlertDailyRollup
+
+
+def rollup_counts(db):
+    return {
+        (row.day, row.alert_type, row.severity, row.status, row.location_name): row.count
+        for row in db.query(AlertDailyRollup)
+        if row.count
+    }
+
+
+def new_alert(day, alert_type="fire", location_name="Pune"):
+    return Alert(alert_type=alert_type, severity="high", title=alert_type, latitude=0.0, longitude=0.0,
+                 location_name=location_name, created_at=datetime(2025, 1, day, 12))
+
+
+@pytest.fixture(params=["upsert", "update-then-insert"])
+def upsert_mode(request, monkeypatch):
+    if request.param == "update-then-insert":
+        monkeypatch.setattr(rollups, "UPSERT_DIALECTS", {})
+    return request.param
+
+
+def test_incremental_deltas_match_a_rebuild(db_session_factory, upsert_mode):
+    db = db_session_factory()
+    alerts = [new_alert(1), new_alert(1), new_alert(2, "flood"), new_alert(2, location_name=None)]
+    for alert in alerts:
+        db.add(alert)
+        db.flush()
+        record_alert_created(db, alert)
+    db.commit()
+
+    previous_key = rollup_key(alerts[0])
+    alerts[0].status = "resolved"
+    record_alert_updated(db, alerts[0], previous_key)
+    record_alert_deleted(db, alerts[2])
+    db.delete(alerts[2])
+    db.commit()
+    incremental = rollup_counts(db)
+
+    rebuild_rollups(db)
+    assert incremental == rollup_counts(db)
+    assert sum(incremental.values()) == 3
+    db.close()
+
+
+def test_bulk_deltas_add_to_existing_rows(db_session_factory, upsert_mode):
+    db = db_session_factory()
+    alert = new_alert(1)
+    db.add(alert)
+    db.flush()
+    record_alert_created(db, alert)
+    apply_rollup_deltas(db, [
+        {**rollup_key(alert), "count": 4},
+        {**rollup_key(new_alert(3, "flood")), "count": 2},
+    ])
+    db.commit()
+
+    counts = rollup_counts(db)
+    assert counts[tuple(rollup_key(alert).values())] == 5
+    assert sum(counts.values()) == 7
+    db.close()
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from app.geo.spatial_index import SpatialIndex, haversine_km
+
+
+@pytest.fixture
+def points():
+    rng = random.Random(0)
+    points = {i: (rng.uniform(-60, 60), rng.uniform(-180, 180)) for i in range(2000)}
+    # Clusters around the antimeridian and a pole-ward latitude
+    points.update({2000 + i: (rng.uniform(-1, 1), rng.choice([-1, 1]) * rng.uniform(179, 180)) for i in range(50)})
+    points.update({3000 + i: (rng.uniform(80, 89.9), rng.uniform(-180, 180)) for i in range(50)})
+    return points
+
+
+@pytest.fixture
+def index(points):
+    index = SpatialIndex(cell_deg=0.5)
+    for key, (lat, lng) in points.items():
+        index.insert(key, lat, lng, key)
+    return index
+
+
+def brute_force(points, lat, lng, radius_km):
+    return sorted(key for key, (p_lat, p_lng) in points.items() if haversine_km(lat, lng, p_lat, p_lng) <= radius_km)
+
+
+@pytest.mark.parametrize("lat,lng,radius_km", [
+    (19.07, 72.87, 500), (0.0, 179.9, 200), (0.0, -179.9, 300), (85.0, 10.0, 800), (-30.0, 0.0, 2000),
+])
+def test_within_radius_matches_brute_force(index, points, lat, lng, radius_km):
+    results = index.within_radius(lat, lng, radius_km)
+    assert sorted(key for key, _ in results) == brute_force(points, lat, lng, radius_km)
+    distances = [distance for _, distance in results]
+    assert distances == sorted(distances)
+
+
+def test_nearest_matches_brute_force(index, points):
+    for lat, lng in [(19.07, 72.87), (0.0, 179.95), (88.0, -100.0)]:
+        expected = sorted(points, key=lambda key: haversine_km(lat, lng, *points[key]))[:5]
+        assert [key for key, _ in index.nearest(lat, lng, 5)] == expected
+
+
+def test_insert_moves_and_remove_drops_points(index):
+    index.insert(0, 10.0, 10.0, 0)
+    assert [key for key, _ in index.within_radius(10.0, 10.0, 1)] == [0]
+    assert index.remove(0)
+    assert not index.remove(0)
+    assert index.within_radius(10.0, 10.0, 1) == []
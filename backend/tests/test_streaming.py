@@ -0,0 +1,54 @@
+import asyncio
+
+from app.utils.streaming import iter_body_lines, iter_csv_records
+
+
+class StreamedRequest:
+    """Just enough of a Request for the streaming helpers"""
+
+    def __init__(self, *chunks: bytes, content_type: str = "application/x-ndjson"):
+        self.chunks = chunks
+        self.headers = {"content-type": content_type}
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def collect(iterator):
+    async def run():
+        return [item async for item in iterator]
+    return asyncio.run(run())
+
+
+def test_lines_split_across_chunks():
+    request = StreamedRequest(b'{"a": 1}\n{"a"', b': 2}\n\xff\n{"a": 3}')
+    assert collect(iter_body_lines(request)) == [
+        ('{"a": 1}', None),
+        ('{"a": 2}', None),
+        (None, "Invalid UTF-8: 'utf-8' codec can't decode byte 0xff in position 0: invalid start byte"),
+        ('{"a": 3}', None),
+    ]
+
+
+def test_long_line_is_one_error_and_not_buffered():
+    request = StreamedRequest(b"ok\n" + b"x" * 8, b"x" * 8, b"x" * 8 + b"\nafter\n", b"y" * 20)
+    assert collect(iter_body_lines(request, max_line_bytes=10)) == [
+        ("ok", None),
+        (None, "Line longer than 10 bytes"),
+        ("after", None),
+        (None, "Line longer than 10 bytes"),
+    ]
+
+
+def test_long_csv_row_skips_the_rest_of_its_quoted_field():
+    request = StreamedRequest(
+        b'title,severity\n',
+        b'"a very long\nquoted field\nspanning lines",high\n',
+        b'short,low\n',
+        content_type="text/csv"
+    )
+    assert collect(iter_csv_records(request, max_line_bytes=20)) == [
+        (None, "Row longer than 20 characters"),
+        ({"title": "short", "severity": "low"}, None),
+    ]
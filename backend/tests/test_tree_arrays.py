@@ -0,0 +1,50 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from app.ml.tree_arrays import CompiledTreeModel, TreeEnsemble, compile_model, export_model_file, sample_inputs
+
+MODELS = [
+    lambda: RandomForestClassifier(n_estimators=8, max_depth=6, random_state=0),
+    lambda: ExtraTreesClassifier(n_estimators=8, max_depth=6, random_state=0),
+    lambda: DecisionTreeClassifier(max_depth=6, random_state=0),
+]
+
+
+def training_data(n_classes: int, rows: int = 300, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, 4)) * [1, 10, 100, 0.1]
+    y = np.digitize(X[:, 0] + X[:, 1] / 10 + rng.normal(0, 0.5, rows), np.linspace(-1, 1, n_classes - 1))
+    return X, np.array(["low", "medium", "high"])[y] if n_classes == 3 else y
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+@pytest.mark.parametrize("make_model", MODELS)
+def test_mmapped_export_matches_predict_proba(tmp_path, make_model, n_classes):
+    X, y = training_data(n_classes)
+    model = make_model().fit(X, y)
+    joblib.dump(model, tmp_path / "risk_model.pkl")
+
+    trees_path = export_model_file(tmp_path / "risk_model.pkl")
+    assert trees_path == tmp_path / "risk_model.trees"
+    ensemble = TreeEnsemble.load(trees_path, mmap_mode="r")
+    assert isinstance(ensemble.threshold, np.memmap)
+
+    assert ensemble.classes_.tolist() == model.classes_.tolist()
+    for inputs in (X, sample_inputs(ensemble, rows=500), training_data(n_classes, seed=1)[0]):
+        assert np.allclose(ensemble.predict_proba(inputs), model.predict_proba(inputs))
+        assert (ensemble.predict(inputs) == model.predict(inputs)).all()
+
+
+def test_compile_model_only_wraps_tree_models():
+    X, y = training_data(2)
+    forest = RandomForestClassifier(n_estimators=4, random_state=0).fit(X, y)
+    compiled = compile_model(forest, max_rows=1000)
+    assert isinstance(compiled, CompiledTreeModel)
+    assert np.allclose(compiled.predict_proba(X), forest.predict_proba(X))
+
+    linear = LogisticRegression().fit(X, y)
+    assert compile_model(linear, max_rows=100) is linear